@@ -0,0 +1,166 @@
+"""Сборка статических страниц: CSS и JS в отдельных файлах с хэшем в имени
+
+Встроенные в страницу блоки <style> и <script> (без src) выносятся в
+assets/<страница>.<хэш>.css|js. Имя меняется вместе с содержимым, поэтому
+такие файлы отдаются с Cache-Control: immutable и не запрашиваются повторно,
+а сама страница становится в несколько раз меньше. Каждый файл сразу
+сжимается в .gz и, если установлен пакет brotli, в .br.
+
+Запуск из корня проекта (собирает index.html и home.html в dist/):
+    python asset_pipeline.py
+"""
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+
+try:
+    import brotli
+except ImportError:  # brotli не обязателен, тогда только gzip
+    brotli = None
+
+PAGES = ['index.html', 'home.html']
+ASSETS_SUBDIR = 'assets'
+MANIFEST_NAME = 'manifest.json'
+
+# Хэшированные файлы не меняются никогда: год и immutable
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+# Расширения, которые ищутся рядом с файлом, в порядке предпочтения
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+_INLINE_BLOCKS = re.compile(r'<(style|script)>(.*?)</\1>', re.S)
+
+
+def fingerprint(name, content):
+    """Имя файла с хэшем содержимого: home.css -> home.3f2a9c01b7.css"""
+    stem, ext = os.path.splitext(name)
+    return f'{stem}.{hashlib.sha256(content).hexdigest()[:10]}{ext}'
+
+
+def precompress(path):
+    """Запись сжатых копий файла (.gz и .br), если они меньше оригинала
+
+    gzip пишется без времени в заголовке, поэтому повторная сборка
+    дает те же байты. Возвращает {кодировка: размер}.
+    """
+    with open(path, 'rb') as file:
+        data = file.read()
+    variants = {'gzip': gzip.compress(data, 9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11)
+
+    sizes = {}
+    for encoding, suffix in ENCODINGS:
+        compressed = variants.get(encoding)
+        if compressed is None or len(compressed) >= len(data):
+            continue
+        with open(path + suffix, 'wb') as file:
+            file.write(compressed)
+        sizes[encoding] = len(compressed)
+    return sizes
+
+
+def accepted_encodings(header):
+    """Кодировки из Accept-Encoding, кроме явно запрещенных (q=0)"""
+    accepted = set()
+    for item in (header or '').split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def negotiate(path, accept_encoding):
+    """(путь к файлу, Content-Encoding) лучшей готовой копии для клиента"""
+    accepted = accepted_encodings(accept_encoding)
+    for encoding, suffix in ENCODINGS:
+        if (encoding in accepted or '*' in accepted) and os.path.exists(path + suffix):
+            return path + suffix, encoding
+    return path, None
+
+
+def extract_inline_assets(html, page_name):
+    """Вынос встроенных <style> и <script> страницы в отдельные файлы
+
+    Возвращает (новый HTML, {имя файла с хэшем: содержимое}). Блоки
+    остаются на своих местах в виде <link> и <script src>, поэтому порядок
+    выполнения скриптов не меняется. Блоки с атрибутами не трогаются.
+    """
+    stem = os.path.splitext(page_name)[0]
+    counts = {}
+    assets = {}
+
+    def replace(match):
+        tag, body = match.group(1), match.group(2)
+        ext = 'css' if tag == 'style' else 'js'
+        counts[ext] = counts.get(ext, 0) + 1
+        suffix = '' if counts[ext] == 1 else f'-{counts[ext]}'
+        name = fingerprint(f'{stem}{suffix}.{ext}', body.encode('utf-8'))
+        assets[name] = body.strip() + '\n'
+        url = f'{ASSETS_SUBDIR}/{name}'
+        if tag == 'style':
+            return f'<link rel="stylesheet" href="{url}">'
+        return f'<script src="{url}"></script>'
+
+    return _INLINE_BLOCKS.sub(replace, html), assets
+
+
+def build_site(pages, out_dir):
+    """Сборка страниц в out_dir: страницы, assets/ и manifest.json
+
+    Возвращает манифест {страница: {'size': ..., 'assets': {...}, ...}}
+    с размерами исходной страницы, собранной страницы и ее файлов.
+    """
+    assets_dir = os.path.join(out_dir, ASSETS_SUBDIR)
+    os.makedirs(assets_dir, exist_ok=True)
+    manifest = {}
+    for page in pages:
+        with open(page, encoding='utf-8') as file:
+            source = file.read()
+        html, assets = extract_inline_assets(source, os.path.basename(page))
+
+        built = {}
+        for name, content in assets.items():
+            path = os.path.join(assets_dir, name)
+            with open(path, 'w', encoding='utf-8') as file:
+                file.write(content)
+            built[name] = {'size': len(content.encode('utf-8')), **precompress(path)}
+
+        page_path = os.path.join(out_dir, os.path.basename(page))
+        with open(page_path, 'w', encoding='utf-8') as file:
+            file.write(html)
+        manifest[os.path.basename(page)] = {
+            'source_size': len(source.encode('utf-8')),
+            'size': len(html.encode('utf-8')),
+            **precompress(page_path),
+            'assets': built,
+        }
+
+    with open(os.path.join(out_dir, MANIFEST_NAME), 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def is_fingerprinted(name):
+    """Есть ли в имени файла хэш содержимого (name.<10 hex>.ext)"""
+    return re.search(r'\.[0-9a-f]{10}\.\w+$', name) is not None
+
+
+if __name__ == '__main__':
+    out_dir = sys.argv[1] if len(sys.argv) > 1 else 'dist'
+    manifest = build_site(PAGES, out_dir)
+    print(f'Сборка в {out_dir}/' + ('' if brotli else ' (brotli не установлен, только gzip)'))
+    for page, info in manifest.items():
+        print(f'  {page}: {info["source_size"]} -> {info["size"]} байт, gzip {info.get("gzip")}')
+        for name, sizes in info['assets'].items():
+            print(f'    {ASSETS_SUBDIR}/{name}: {sizes}')
@@ -0,0 +1,272 @@
+"""Асинхронный сервер для Flask API (database.py) на asyncio
+
+Все соединения обслуживает один цикл событий: чтение запроса, ожидание
+медленных клиентов и отправка ответа не занимают потоков. В пул потоков
+(по умолчанию DB_POOL_SIZE, по числу соединений с базой) уходит только
+готовый запрос - выполнение view Flask с его запросами к SQLite, - и
+потоковые ответы (?stream=1) читаются из базы там же, пачками.
+
+Маршруты, сессии и формат JSON - те же, что у database.py: это то же
+приложение, поэтому тысячи медленных клиентов не блокируют поиск
+и избранное, пока рабочих потоков хватает на сами запросы к базе.
+
+Запуск из корня проекта:
+    python async_server.py --port 5001
+"""
+import argparse
+import asyncio
+import contextvars
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote_to_bytes
+
+MAX_HEADER_SIZE = 64 * 1024
+MAX_BODY_SIZE = 1024 * 1024
+BODY_TIMEOUT = 30.0         # секунд на получение тела запроса
+KEEP_ALIVE_TIMEOUT = 75.0   # секунд простоя соединения между запросами
+CHUNK_SIZE = 64 * 1024      # байт тела ответа за один переход в пул потоков
+
+_REASONS = {400: 'Bad Request', 413: 'Payload Too Large', 431: 'Request Header Fields Too Large',
+            500: 'Internal Server Error', 501: 'Not Implemented'}
+
+
+class BadRequest(Exception):
+    def __init__(self, status):
+        super().__init__(status)
+        self.status = status
+
+
+class AsyncWSGIServer:
+    """HTTP/1.1 с keep-alive поверх asyncio для WSGI-приложения
+
+    Приложение вызывается в пуле из workers потоков. Каждый запрос
+    выполняется в своей копии contextvars, поэтому контекст Flask
+    (в том числе stream_with_context) переживает переходы между потоками.
+    """
+
+    def __init__(self, app, workers=8):
+        self.app = app
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='db')
+        self.server = None
+        self.handlers = set()  # задачи открытых соединений
+
+    async def start(self, host='127.0.0.1', port=5001):
+        self.server = await asyncio.start_server(self.handle, host, port,
+                                                 limit=MAX_HEADER_SIZE, backlog=4096)
+        return self.server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for task in list(self.handlers):
+            task.cancel()
+        await asyncio.gather(*self.handlers, return_exceptions=True)
+        self.executor.shutdown(wait=False)
+
+    @property
+    def connections(self):
+        return len(self.handlers)
+
+    async def handle(self, reader, writer):
+        task = asyncio.current_task()
+        self.handlers.add(task)
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'),
+                                                  KEEP_ALIVE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self.send_error(writer, 431)
+                    break
+
+                try:
+                    environ, keep_alive = await self.read_request(head, reader, writer)
+                except BadRequest as e:
+                    await self.send_error(writer, e.status)
+                    break
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+
+                if not await self.respond(environ, writer, keep_alive):
+                    break
+        finally:
+            self.handlers.discard(task)
+            writer.close()
+
+    async def read_request(self, head, reader, writer):
+        """WSGI environ из заголовков и тела запроса; (environ, keep-alive)"""
+        try:
+            request_line, *lines = head[:-4].decode('latin-1').split('\r\n')
+            method, target, version = request_line.split(' ')
+        except ValueError:
+            raise BadRequest(400)
+        if not version.startswith('HTTP/1.'):
+            raise BadRequest(400)
+
+        headers = {}
+        for line in lines:
+            name, sep, value = line.partition(':')
+            if not sep:
+                raise BadRequest(400)
+            name = name.strip()
+            if '_' in name:
+                # X_Foo и X-Foo дали бы один ключ HTTP_X_FOO: такой заголовок
+                # мог бы подменить заголовок, выставленный прокси
+                continue
+            key = name.upper().replace('-', '_')
+            value = value.strip()
+            if key in headers:
+                # Повторы объединяются через запятую, а Cookie - через «; » (RFC 6265)
+                value = f'{headers[key]}{"; " if key == "COOKIE" else ","}{value}'
+            headers[key] = value
+
+        if 'chunked' in headers.get('TRANSFER_ENCODING', '').lower():
+            raise BadRequest(501)
+        try:
+            length = int(headers.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            raise BadRequest(400)
+        if length > MAX_BODY_SIZE:
+            raise BadRequest(413)
+        body = await asyncio.wait_for(reader.readexactly(length), BODY_TIMEOUT) if length else b''
+
+        connection = headers.get('CONNECTION', '').lower()
+        keep_alive = 'close' not in connection if version == 'HTTP/1.1' else 'keep-alive' in connection
+
+        path, _, query = target.partition('?')
+        host, port = writer.get_extra_info('sockname')[:2]
+        peer = writer.get_extra_info('peername') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': method,
+            'SCRIPT_NAME': '',
+            'PATH_INFO': unquote_to_bytes(path).decode('latin-1'),
+            'QUERY_STRING': query,
+            'SERVER_NAME': host,
+            'SERVER_PORT': str(port),
+            'SERVER_PROTOCOL': version,
+            'REMOTE_ADDR': peer[0],
+            'REMOTE_PORT': str(peer[1]),
+            'CONTENT_TYPE': headers.pop('CONTENT_TYPE', ''),
+            'CONTENT_LENGTH': headers.pop('CONTENT_LENGTH', ''),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False,
+        }
+        environ.update((f'HTTP_{key}', value) for key, value in headers.items())
+        return environ, keep_alive
+
+    async def respond(self, environ, writer, keep_alive):
+        """Выполнение приложения в пуле и отправка ответа; False - закрыть соединение"""
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['status'], started['headers'] = status, headers
+
+        def run_app():
+            result = self.app(environ, start_response)
+            return result, iter(result)
+
+        try:
+            result, body = await loop.run_in_executor(self.executor, context.run, run_app)
+        except Exception:
+            await self.send_error(writer, 500)
+            return False
+
+        try:
+            chunks, done = await loop.run_in_executor(self.executor, context.run, read_chunks, body)
+            headers = list(started['headers'])
+            names = {name.lower() for name, value in headers}
+            version = environ['SERVER_PROTOCOL']
+            if 'content-length' in names:
+                chunked = False
+            elif done:
+                headers.append(('Content-Length', str(sum(map(len, chunks)))))
+                chunked = False
+            else:
+                chunked = version == 'HTTP/1.1'
+                keep_alive = keep_alive and chunked
+                if chunked:
+                    headers.append(('Transfer-Encoding', 'chunked'))
+            headers.append(('Connection', 'keep-alive' if keep_alive else 'close'))
+
+            head = f'{version} {started["status"]}\r\n'
+            head += ''.join(f'{name}: {value}\r\n' for name, value in headers)
+            writer.write(head.encode('latin-1') + b'\r\n')
+
+            # Медленный клиент ждет в drain(), не занимая поток пула
+            while True:
+                for chunk in chunks:
+                    if chunk:
+                        writer.write(b'%x\r\n%s\r\n' % (len(chunk), chunk) if chunked else chunk)
+                await writer.drain()
+                if done:
+                    break
+                chunks, done = await loop.run_in_executor(self.executor, context.run,
+                                                          read_chunks, body)
+            if chunked:
+                writer.write(b'0\r\n\r\n')
+                await writer.drain()
+            return keep_alive
+        except Exception:
+            # Клиент отключился или ответ оборвался после отправки заголовков:
+            # остается только закрыть соединение
+            return False
+        finally:
+            if hasattr(result, 'close'):
+                await loop.run_in_executor(self.executor, context.run, result.close)
+
+    async def send_error(self, writer, status):
+        reason = _REASONS.get(status, 'Error')
+        body = reason.encode()
+        writer.write(f'HTTP/1.1 {status} {reason}\r\nContent-Type: text/plain\r\n'
+                     f'Content-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode() + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+
+def read_chunks(body):
+    """Следующие куски тела ответа, не больше CHUNK_SIZE байт; (куски, закончилось ли)"""
+    chunks, size = [], 0
+    for chunk in body:
+        chunks.append(chunk)
+        size += len(chunk)
+        if size >= CHUNK_SIZE:
+            return chunks, False
+    return chunks, True
+
+
+async def serve(app, host, port, workers):
+    server = AsyncWSGIServer(app, workers)
+    host, port = await server.start(host, port)
+    print(f'Асинхронный сервер API: http://{host}:{port} ({workers} потоков для базы)')
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.close()
+
+
+if __name__ == '__main__':
+    from database import app
+
+    parser = argparse.ArgumentParser(description='Асинхронный сервер для Flask API')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5001)
+    parser.add_argument('--workers', type=int, default=app.config['DB_POOL_SIZE'],
+                        help='потоков для выполнения запросов к базе')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(app, args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
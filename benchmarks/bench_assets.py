@@ -0,0 +1,113 @@
+"""Экономия байт и времени загрузки от сборки страниц и сжатия ответов
+
+Для настоящих страниц проекта (index.html, home.html и главной Django)
+сравнивается, сколько байт уходит клиенту сейчас и после сборки:
+при первом визите (страница + CSS/JS в сжатом виде) и при повторном
+(файлы с хэшем уже в кэше браузера, приходит только сжатая страница).
+Время передачи - оценка для канала --kbps с задержкой --rtt. Отдельно
+замеряется gzip JSON-ответа Flask API.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_assets --kbps 1600 --rtt 150
+"""
+import argparse
+import gzip
+import os
+import tempfile
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from asset_pipeline import PAGES, build_site  # noqa: E402
+from benchmarks.bench_recipe_list_serializer import fill, measure  # noqa: E402
+from benchmarks.fixtures import create_api_database  # noqa: E402
+from database import app, ensure_schema  # noqa: E402
+
+
+def transfer_ms(size, round_trips, args):
+    """Оценка времени загрузки: задержки плюс передача по каналу"""
+    return round_trips * args.rtt + size * 8 / args.kbps
+
+
+def compressed_size(info):
+    """Размер лучшей готовой копии файла из манифеста сборки"""
+    return min(info.get('br', info['size']), info.get('gzip', info['size']))
+
+
+def site_rows(out_dir):
+    """(страница, сейчас, первый визит, повторный визит) для статических страниц"""
+    rows = []
+    for page, info in build_site(PAGES, out_dir).items():
+        assets = sum(compressed_size(asset) for asset in info['assets'].values())
+        page_size = compressed_size(info)
+        rows.append((page, info['source_size'], page_size + assets, page_size))
+    return rows
+
+
+def django_home_row():
+    """То же для главной Django: шаблон плюс static/recipes/home.css и home.js"""
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        fill(1000)
+        client = Client()
+        html = client.get('/').content
+        html_gzip = len(client.get('/', HTTP_ACCEPT_ENCODING='gzip').content)
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+    assets = 0
+    inline = len(html)
+    for name in ('home.css', 'home.js'):
+        with open(os.path.join(settings.BASE_DIR, 'static', 'recipes', name), 'rb') as file:
+            data = file.read()
+        inline += len(data)
+        assets += len(gzip.compress(data, 9))
+    return 'Django /', inline, html_gzip + assets, html_gzip
+
+
+def json_gzip(tmp, args):
+    """Размеры и время сжатия страницы /api/recipes?limit=100"""
+    db_name = create_api_database(os.path.join(tmp, 'recipes.db'), recipes=500)
+    app.config.update(DATABASE=db_name, DB_POOL_ENABLED=False)
+    ensure_schema(db_name)
+    client = app.test_client()
+    url = '/api/recipes?limit=100'
+    plain = client.get(url).data
+    compressed = client.get(url, headers={'Accept-Encoding': 'gzip'}).data
+    seconds = measure(lambda: gzip.compress(plain, app.config['GZIP_LEVEL']), args.rounds)
+    return len(plain), len(compressed), seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--kbps', type=float, default=1600, help='скорость канала, кбит/с')
+    parser.add_argument('--rtt', type=float, default=150, help='задержка, мс')
+    parser.add_argument('--rounds', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rows = site_rows(os.path.join(tmp, 'dist')) + [django_home_row()]
+        plain, compressed, seconds = json_gzip(tmp, args)
+
+    print(f'Канал {args.kbps:.0f} кбит/с, задержка {args.rtt:.0f} мс (оценка)')
+    print(f'{"страница":<12}{"сейчас":>10}{"1-й визит":>12}{"повторный":>12}'
+          f'{"мс сейчас":>12}{"мс 1-й":>9}{"мс повт.":>10}')
+    for page, before, first, repeat in rows:
+        print(f'{page:<12}{before:>10}{first:>12}{repeat:>12}'
+              f'{transfer_ms(before, 1, args):>12.0f}'
+              f'{transfer_ms(first, 2, args):>9.0f}'
+              f'{transfer_ms(repeat, 1, args):>10.0f}')
+    print(f'JSON /api/recipes?limit=100: {plain} -> {compressed} байт gzip '
+          f'({plain / compressed:.1f}x), сжатие {seconds * 1000:.2f} мс, '
+          f'передача {transfer_ms(plain, 0, args):.0f} -> {transfer_ms(compressed, 0, args):.0f} мс')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""Поиск и избранное под нагрузкой при множестве медленных клиентов
+
+Каждый сервер запускается в отдельном процессе на одной и той же базе:
+  threaded - Flask (werkzeug) с потоком на каждое соединение;
+  pool     - Flask с фиксированным числом рабочих потоков (как gthread-воркер);
+  async    - async_server.py: соединения в asyncio, запросы к базе в пуле.
+Сначала открываются --slow соединений, которые так и не дописывают
+заголовки, затем --requests запросов поиска и избранного идут параллельно
+по --concurrency. Печатаются задержки, отказы, потоки и память сервера.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_async_server --slow 500 --requests 400
+"""
+import argparse
+import asyncio
+import os
+import resource
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from werkzeug.serving import BaseWSGIServer, make_server
+
+from benchmarks.fixtures import create_api_database
+
+SERVERS = ['threaded', 'pool', 'async']
+QUERIES = ['борщ', 'курица', 'суп', 'салат', 'пирог']
+
+
+class PoolWSGIServer(BaseWSGIServer):
+    """werkzeug с фиксированным пулом потоков вместо потока на соединение"""
+    multithread = True
+
+    def __init__(self, host, port, app, workers):
+        super().__init__(host, port, app)
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_in_pool, request, client_address)
+
+    def process_in_pool(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def run_server(kind, port, db_name, workers):
+    """Режим дочернего процесса: запуск одного из серверов"""
+    from async_server import serve
+    from database import app
+
+    app.config.update(DATABASE=db_name, DB_POOL_SIZE=workers)
+    if kind == 'threaded':
+        make_server('127.0.0.1', port, app, threaded=True).serve_forever()
+    elif kind == 'pool':
+        PoolWSGIServer('127.0.0.1', port, app, workers).serve_forever()
+    else:
+        asyncio.run(serve(app, '127.0.0.1', port, workers))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_ready(port, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.05)
+    raise RuntimeError(f'сервер на порту {port} не запустился')
+
+
+def process_status(pid):
+    """(потоков, RSS в МБ) процесса по /proc; None, если недоступно"""
+    try:
+        with open(f'/proc/{pid}/status') as file:
+            fields = dict(line.split(':', 1) for line in file)
+    except OSError:
+        return None, None
+    return int(fields['Threads']), int(fields['VmRSS'].split()[0]) / 1024
+
+
+async def fetch(port, path, cookie, timeout):
+    """Время ответа на один GET или None при ошибке и таймауте"""
+    started = time.perf_counter()
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout)
+        writer.write(f'GET {path} HTTP/1.1\r\nHost: localhost\r\nCookie: {cookie}\r\n'
+                     f'Connection: close\r\n\r\n'.encode())
+        data = await asyncio.wait_for(reader.read(), timeout - (time.perf_counter() - started))
+        writer.close()
+    except (OSError, asyncio.TimeoutError):
+        return None
+    if not data.startswith(b'HTTP/1.1 200') and not data.startswith(b'HTTP/1.0 200'):
+        return None
+    return time.perf_counter() - started
+
+
+async def load(port, args, cookie):
+    """Медленные клиенты, затем нагрузка поиском и избранным"""
+    slow = []
+    for _ in range(args.slow):
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        except OSError:
+            break
+        writer.write(b'GET /api/recipes HTTP/1.1\r\nHost: localhost\r\n')
+        slow.append(writer)
+    await asyncio.sleep(0.5)
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(number):
+        if number % 2:
+            path = '/api/favorites'
+        else:
+            path = '/api/recipes/search?q=' + quote(QUERIES[number % len(QUERIES)])
+        async with semaphore:
+            return await fetch(port, path, cookie, args.timeout)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one(number) for number in range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    for writer in slow:
+        writer.close()
+    return len(slow), results, elapsed
+
+
+def session_cookie(user_id):
+    from database import app
+    value = app.session_interface.get_signing_serializer(app).dumps({'user_id': user_id})
+    return f'{app.config["SESSION_COOKIE_NAME"]}={value}'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--slow', type=int, default=500, help='медленных соединений')
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=8, help='потоков у pool и async')
+    parser.add_argument('--timeout', type=float, default=10.0, help='секунд на запрос')
+    parser.add_argument('--servers', nargs='+', choices=SERVERS, default=SERVERS)
+    parser.add_argument('--serve', choices=SERVERS, help=argparse.SUPPRESS)
+    parser.add_argument('--port', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--db', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        run_server(args.serve, args.port, args.db, args.workers)
+        return
+
+    # Клиентам и серверу нужно по дескриптору на каждое соединение
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+    print(f'Медленных соединений: {args.slow}, запросов: {args.requests} '
+          f'по {args.concurrency} параллельно, рабочих потоков: {args.workers}')
+    print(f'{"сервер":<10}{"открыто":>9}{"успешно":>9}{"отказы":>8}{"запр/с":>9}'
+          f'{"p50 мс":>9}{"p99 мс":>9}{"потоков":>9}{"RSS МБ":>8}')
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = create_api_database(os.path.join(tmp, 'recipes.db'), recipes=2000)
+        cookie = session_cookie(1)
+        for kind in args.servers:
+            port = free_port()
+            server = subprocess.Popen(
+                [sys.executable, '-m', 'benchmarks.bench_async_server', '--serve', kind,
+                 '--port', str(port), '--db', db_name, '--workers', str(args.workers)],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                wait_ready(port)
+                asyncio.run(fetch(port, '/api/recipes', cookie, args.timeout))  # миграции базы
+                opened, results, elapsed = asyncio.run(load(port, args, cookie))
+                threads, rss = process_status(server.pid)
+            finally:
+                server.kill()
+                server.wait()
+
+            ok = sorted(result for result in results if result is not None)
+            failed = len(results) - len(ok)
+            p50 = statistics.median(ok) * 1000 if ok else float('nan')
+            p99 = ok[min(len(ok) - 1, int(len(ok) * 0.99))] * 1000 if ok else float('nan')
+            print(f'{kind:<10}{opened:>9}{len(ok):>9}{failed:>8}{len(ok) / elapsed:>9.0f}'
+                  f'{p50:>9.1f}{p99:>9.1f}{threads or 0:>9}{rss or 0:>8.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Сравнение пропускной способности Flask API с пулом соединений и без него
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_db_pool --requests 2000 --threads 4
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.fixtures import create_api_database
+from database import app
+
+
+def run(urls, total, threads):
+    """Выполнение total запросов по кругу из urls, возвращает запросов в секунду"""
+    def worker(count, offset):
+        client = app.test_client()
+        for i in range(count):
+            response = client.get(urls[(offset + i) % len(urls)])
+            assert response.status_code == 200
+
+    per_thread = total // threads
+    started = time.perf_counter()
+    with ThreadPoolExecutor(threads) as executor:
+        for future in [executor.submit(worker, per_thread, n) for n in range(threads)]:
+            future.result()
+    return per_thread * threads / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--recipes', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--threads', type=int, default=4)
+    args = parser.parse_args()
+
+    scenarios = {
+        '/api/recipes': ['/api/recipes'],
+        '/api/recipes/<id>': [f'/api/recipes/{i}' for i in range(1, args.recipes + 1)],
+    }
+    results = {name: {} for name in scenarios}
+
+    for pooled in (False, True):
+        # Для каждого режима своя база: WAL сохраняется в файле и исказил бы замер без пула
+        with tempfile.TemporaryDirectory() as tmp:
+            app.config['DATABASE'] = create_api_database(
+                os.path.join(tmp, 'recipes.db'), recipes=args.recipes
+            )
+            app.config['DB_POOL_ENABLED'] = pooled
+            for name, urls in scenarios.items():
+                run(urls, args.threads * 10, args.threads)  # прогрев
+                results[name][pooled] = run(urls, args.requests, args.threads)
+            pool = app.extensions.pop('db_pool', None)
+            if pool is not None:
+                pool.close_all()
+
+    print(f'Рецептов: {args.recipes}, запросов: {args.requests}, потоков: {args.threads}')
+    print(f'{"эндпоинт":<22}{"без пула":>12}{"с пулом":>12}{"ускорение":>12}')
+    for name, result in results.items():
+        print(f'{name:<22}{result[False]:>10.0f}/s{result[True]:>10.0f}/s'
+              f'{result[True] / result[False]:>11.2f}x')
+
+
+if __name__ == '__main__':
+    main()
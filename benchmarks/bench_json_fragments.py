@@ -0,0 +1,68 @@
+"""Сравнение списков рецептов из готовых JSON-фрагментов и из строк таблицы
+
+Проходит весь каталог страницами по курсору в каждом режиме.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_json_fragments --recipes 10000 --limit 100
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.fixtures import create_api_database
+from database import app, ensure_schema
+
+
+def walk(client, url, limit):
+    """Проход всех страниц списка, возвращает (страниц, секунд, байт)"""
+    pages = size = 0
+    cursor = None
+    started = time.perf_counter()
+    while True:
+        query = f'{url}?limit={limit}' + (f'&cursor={cursor}' if cursor else '')
+        response = client.get(query)
+        assert response.status_code == 200
+        pages += 1
+        size += len(response.data)
+        cursor = response.get_json()['next_cursor']
+        if cursor is None:
+            break
+    return pages, time.perf_counter() - started, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--recipes', type=int, default=10000)
+    parser.add_argument('--limit', type=int, default=100)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = create_api_database(os.path.join(tmp, 'recipes.db'), recipes=args.recipes)
+        app.config['DATABASE'] = db_name
+        ensure_schema(db_name)
+        client = app.test_client()
+
+        results = {}
+        for fragments in (False, True):
+            app.config['JSON_FRAGMENTS'] = fragments
+            walk(client, '/api/recipes', args.limit)  # прогрев
+            runs = [walk(client, '/api/recipes', args.limit) for _ in range(args.rounds)]
+            results[fragments] = min(runs, key=lambda run: run[1])
+
+        pool = app.extensions.pop('db_pool', None)
+        if pool is not None:
+            pool.close_all()
+
+    print(f'Рецептов: {args.recipes}, размер страницы: {args.limit}')
+    print(f'{"режим":<22}{"страниц/с":>12}{"мс/страница":>14}{"КБ ответов":>12}')
+    for fragments, (pages, seconds, size) in results.items():
+        name = 'JSON-фрагменты' if fragments else 'строки таблицы'
+        print(f'{name:<22}{pages / seconds:>12.0f}{seconds / pages * 1000:>14.2f}'
+              f'{size / 1024:>12.0f}')
+    print(f'Ускорение: {results[False][1] / results[True][1]:.2f}x')
+
+
+if __name__ == '__main__':
+    main()
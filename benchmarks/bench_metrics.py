@@ -0,0 +1,110 @@
+"""Накладные расходы учета SQL (sql_metrics.py) во Flask API и Django
+
+Одни и те же запросы выполняются с учетом и без него: во Flask -
+METRICS_ENABLED, в Django - без recipes.metrics.MetricsMiddleware.
+Режимы чередуются --rounds раз, берется лучшее время каждого.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_metrics --requests 1000 --rounds 5
+"""
+import argparse
+import os
+import tempfile
+import time
+from urllib.parse import quote
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.core.cache import cache  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import modify_settings, setup_test_environment  # noqa: E402
+
+from benchmarks.bench_recipe_list_serializer import fill  # noqa: E402
+from benchmarks.fixtures import create_api_database  # noqa: E402
+from database import app  # noqa: E402
+
+
+def per_request(get, urls, total):
+    """Среднее время запроса по кругу из urls, мкс"""
+    for url in urls:
+        get(url)  # прогрев
+    started = time.perf_counter()
+    for i in range(total):
+        get(urls[i % len(urls)])
+    return (time.perf_counter() - started) / total * 1e6
+
+
+def best_of(rounds, measure):
+    """Лучшее время без учета и с учетом: {False: мкс, True: мкс}"""
+    times = {False: float('inf'), True: float('inf')}
+    for _ in range(rounds):
+        for enabled in times:
+            times[enabled] = min(times[enabled], measure(enabled))
+    return times
+
+
+def flask_rows(args):
+    scenarios = {
+        '/api/recipes?limit=20': ['/api/recipes?limit=20'],
+        '/api/recipes/<id>': [f'/api/recipes/{i}' for i in range(1, 201)],
+        '/api/recipes/search': ['/api/recipes/search?q=' + quote(word)
+                                for word in ('борщ', 'плов', 'блины', 'уха')],
+    }
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        app.config.update(DATABASE=create_api_database(os.path.join(tmp, 'recipes.db'), recipes=500))
+        client = app.test_client()
+        for name, urls in scenarios.items():
+            def measure(enabled):
+                app.config['METRICS_ENABLED'] = enabled
+                # Соединения пула создаются с классом, выбранным по настройке
+                pool = app.extensions.pop('db_pool', None)
+                if pool is not None:
+                    pool.close_all()
+                return per_request(client.get, urls, args.requests)
+            times = best_of(args.rounds, measure)
+            rows.append((f'Flask {name}', times[False], times[True]))
+        app.extensions.pop('db_pool').close_all()
+        app.extensions.pop('view_counter').stop()
+    return rows
+
+
+def django_rows(args):
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        fill(1000)
+        client = Client()
+
+        def get(url):
+            cache.clear()  # замеряется выполнение view, а не кэш страниц
+            client.get(url)
+
+        def measure(enabled):
+            change = {} if enabled else {'remove': 'recipes.metrics.MetricsMiddleware'}
+            with modify_settings(MIDDLEWARE=change):
+                return per_request(get, ['/api/recipes/'], args.requests // 4)
+        times = best_of(args.rounds, measure)
+        return [('Django /api/recipes/', times[False], times[True])]
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=1000, help='запросов за раунд')
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    rows = flask_rows(args) + django_rows(args)
+    print(f'{"запрос":<32}{"без учета, мкс":>16}{"с учетом, мкс":>16}{"разница":>10}')
+    for name, plain, tracked in rows:
+        print(f'{name:<32}{plain:>16.0f}{tracked:>16.0f}{(tracked / plain - 1) * 100:>9.1f}%')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+"""Сравнение RecipeListSerializer и RecipeListFastSerializer
+
+Рецепты создаются во временной базе в памяти (основная db.sqlite3 не
+затрагивается); замеряется выборка и сериализация всего списка.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_recipe_list_serializer --rows 1000 10000 100000
+"""
+import argparse
+import os
+import random
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from benchmarks.fixtures import DISHES, VARIANTS  # noqa: E402
+from recipes.models import Recipe  # noqa: E402
+from recipes.serializers import RecipeListFastSerializer, RecipeListSerializer  # noqa: E402
+
+
+def fill(count, seed=42):
+    """Дополнение таблицы рецептов до count строк"""
+    rnd = random.Random(seed)
+    categories = [value for value, label in Recipe.CATEGORY_CHOICES]
+    missing = count - Recipe.objects.count()
+    Recipe.objects.bulk_create([
+        Recipe(
+            title=f'{rnd.choice(DISHES)} {rnd.choice(VARIANTS)}',
+            description='Проверенный рецепт для всей семьи.',
+            category=rnd.choice(categories),
+            cooking_time=rnd.randint(5, 180),
+            difficulty=rnd.randint(1, 5),
+            servings=rnd.randint(1, 8),
+            image='recipes/photo.jpg' if rnd.random() < 0.5 else '',
+        )
+        for _ in range(missing)
+    ], batch_size=5000)
+
+
+def measure(serialize, rounds):
+    best = None
+    for _ in range(rounds):
+        started = time.perf_counter()
+        serialize()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=[1000, 10000, 100000])
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        request = APIRequestFactory().get('/api/recipes/')
+        context = {'request': request}
+        queryset = Recipe.objects.order_by('-created_at', '-id')
+
+        print(f'{"строк":>8}{"RecipeListSerializer":>24}{"быстрый":>14}{"ускорение":>12}')
+        for rows in sorted(args.rows):
+            fill(rows)
+            regular = measure(
+                lambda: RecipeListSerializer(queryset.all(), many=True, context=context).data,
+                args.rounds)
+            fast = measure(
+                lambda: RecipeListFastSerializer(
+                    queryset.values_list(*RecipeListFastSerializer.columns), context=context
+                ).data,
+                args.rounds)
+            print(f'{rows:>8}{rows / regular:>20.0f}/с{rows / fast:>12.0f}/с'
+                  f'{regular / fast:>11.1f}x')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
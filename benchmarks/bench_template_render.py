@@ -0,0 +1,79 @@
+"""Время рендера списка рецептов с кэшем фрагментов и без него
+
+Рецепты создаются во временной базе в памяти; рендерится шаблон
+recipes/recipe_list.html для --cards карточек. Отдельно сравнивается
+загрузка шаблонов с кэширующим загрузчиком и без него.
+
+Запуск из корня проекта:
+    python -m benchmarks.bench_template_render --cards 500
+"""
+import argparse
+import os
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+django.setup()
+
+from django.core.cache import caches  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.template import engines  # noqa: E402
+from django.template.engine import Engine  # noqa: E402
+from django.template.loader import render_to_string  # noqa: E402
+from django.test.utils import setup_test_environment  # noqa: E402
+
+from benchmarks.bench_recipe_list_serializer import fill, measure  # noqa: E402
+from recipes.models import Recipe  # noqa: E402
+
+TEMPLATES = ['recipes/home.html', 'recipes/recipe_list.html', 'recipes/recipe_detail.html']
+
+
+def render_list(recipes, clear):
+    if clear:
+        caches['fragments'].clear()
+    return render_to_string('recipes/recipe_list.html', {'recipes': recipes})
+
+
+def load_templates(engine):
+    for name in TEMPLATES:
+        engine.get_template(name)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cards', type=int, default=500)
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        fill(args.cards)
+        recipes = list(Recipe.objects.order_by('-created_at', '-id'))
+
+        cold = measure(lambda: render_list(recipes, clear=True), args.rounds)
+        render_list(recipes, clear=False)  # прогрев фрагментов
+        warm = measure(lambda: render_list(recipes, clear=False), args.rounds)
+        print(f'Список из {len(recipes)} карточек:')
+        print(f'  {"без кэша фрагментов":<28}{cold * 1000:>9.1f} мс')
+        print(f'  {"из кэша фрагментов":<28}{warm * 1000:>9.1f} мс')
+        print(f'  {"ускорение":<28}{cold / warm:>9.1f}x')
+
+        # Тот же набор шаблонов проекта, но без кэширующего загрузчика
+        configured = engines['django'].engine
+        plain = Engine(dirs=configured.dirs, libraries=configured.libraries, loaders=[
+            'django.template.loaders.filesystem.Loader',
+            'django.template.loaders.app_directories.Loader',
+        ])
+        load_templates(configured)  # прогрев
+        uncached = measure(lambda: load_templates(plain), args.rounds)
+        cached = measure(lambda: load_templates(configured), args.rounds)
+        print(f'Загрузка {len(TEMPLATES)} шаблонов:')
+        print(f'  {"без кэша загрузчика":<28}{uncached * 1000:>9.2f} мс')
+        print(f'  {"кэширующий загрузчик":<28}{cached * 1000:>9.2f} мс')
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+if __name__ == '__main__':
+    main()
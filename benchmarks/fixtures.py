@@ -0,0 +1,123 @@
+import json
+import random
+import sqlite3
+
+# Схема базы recipes.db, с которой работает Flask API (database.py)
+API_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    email TEXT UNIQUE NOT NULL,
+    name TEXT NOT NULL,
+    password TEXT NOT NULL,
+    avatar TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT UNIQUE NOT NULL,
+    icon TEXT,
+    description TEXT
+);
+
+CREATE TABLE IF NOT EXISTS recipes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    description TEXT,
+    category TEXT NOT NULL,
+    prep_time INTEGER DEFAULT 0,
+    cook_time INTEGER DEFAULT 0,
+    total_time INTEGER DEFAULT 0,
+    difficulty TEXT NOT NULL,
+    servings INTEGER NOT NULL,
+    author_id INTEGER,
+    author_name TEXT,
+    image_url TEXT,
+    ingredients TEXT DEFAULT '[]',
+    steps TEXT DEFAULT '[]',
+    tags TEXT DEFAULT '[]',
+    views INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS favorites (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    recipe_id INTEGER NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE(user_id, recipe_id)
+);
+'''
+
+CATEGORIES = [
+    ('Супы', '🥣'), ('Основные блюда', '🍛'), ('Салаты', '🥗'), ('Десерты', '🍰'),
+    ('Выпечка', '🥐'), ('Закуски', '🍤'), ('Напитки', '🥤'), ('Завтраки', '🍳'),
+]
+
+DISHES = ['Борщ', 'Щи', 'Солянка', 'Плов', 'Пельмени', 'Котлеты', 'Оливье',
+          'Винегрет', 'Блины', 'Сырники', 'Пирог', 'Омлет', 'Уха', 'Рагу']
+VARIANTS = ['классический', 'по-домашнему', 'с грибами', 'с курицей', 'постный',
+            'праздничный', 'быстрый', 'с сыром', 'летний', 'острый']
+INGREDIENTS = ['Картофель', 'Лук', 'Морковь', 'Курица', 'Говядина', 'Свекла',
+               'Капуста', 'Помидор', 'Огурец', 'Мука', 'Сахар', 'Яйца', 'Молоко',
+               'Сметана', 'Сыр', 'Грибы', 'Рис', 'Чеснок', 'Укроп', 'Масло']
+TAGS = ['Русская кухня', 'Быстрое', 'Праздничное', 'Вегетарианское', 'С мясом',
+        'Для детей', 'Полезное', 'Бюджетное']
+
+
+def create_api_database(path, recipes=200, users=20, seed=42):
+    """Создание и заполнение тестовой базы для Flask API"""
+    rnd = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executescript(API_SCHEMA)
+
+    conn.executemany(
+        'INSERT OR IGNORE INTO categories (name, icon) VALUES (?, ?)', CATEGORIES
+    )
+    conn.executemany(
+        'INSERT OR IGNORE INTO users (email, name, password, avatar) VALUES (?, ?, ?, ?)',
+        [(f'user{i}@mail.ru', f'Повар {i}', f'pass{i}', 'П') for i in range(1, users + 1)]
+    )
+
+    rows = []
+    for i in range(recipes):
+        author_id = rnd.randint(1, users)
+        prep_time, cook_time = rnd.randint(5, 60), rnd.randint(5, 120)
+        ingredients = [f'{name} - {rnd.randint(1, 500)} г'
+                       for name in rnd.sample(INGREDIENTS, rnd.randint(3, 10))]
+        steps = [f'Шаг {n}: приготовьте ингредиенты и перемешайте.'
+                 for n in range(1, rnd.randint(3, 8))]
+        rows.append((
+            f'{rnd.choice(DISHES)} {rnd.choice(VARIANTS)} №{i + 1}',
+            'Проверенный рецепт для всей семьи. ' * rnd.randint(1, 4),
+            rnd.choice(CATEGORIES)[0],
+            prep_time, cook_time, prep_time + cook_time,
+            rnd.choice(['Легкая', 'Средняя', 'Сложная']),
+            rnd.randint(1, 8),
+            author_id, f'Повар {author_id}',
+            'https://example.com/image.jpg',
+            json.dumps(ingredients, ensure_ascii=False),
+            json.dumps(steps, ensure_ascii=False),
+            json.dumps(rnd.sample(TAGS, 2), ensure_ascii=False),
+            rnd.randint(0, 1000),
+            f'2025-{rnd.randint(1, 12):02d}-{rnd.randint(1, 28):02d} '
+            f'{rnd.randint(0, 23):02d}:{rnd.randint(0, 59):02d}:00',
+        ))
+    conn.executemany('''
+        INSERT INTO recipes (
+            title, description, category, prep_time, cook_time, total_time,
+            difficulty, servings, author_id, author_name, image_url,
+            ingredients, steps, tags, views, created_at
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', rows)
+
+    favorites = {(rnd.randint(1, users), rnd.randint(1, recipes))
+                 for _ in range(recipes)}
+    conn.executemany(
+        'INSERT OR IGNORE INTO favorites (user_id, recipe_id) VALUES (?, ?)',
+        sorted(favorites)
+    )
+
+    conn.commit()
+    conn.close()
+    return path
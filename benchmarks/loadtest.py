@@ -0,0 +1,455 @@
+"""Нагрузочный тест Flask API и сайта Django с базовой линией в JSON
+
+Сервер запускается в этом же процессе на заполненной временной базе
+(основные recipes.db и db.sqlite3 не затрагиваются), клиенты - потоки
+с keep-alive соединениями. Смесь запросов задается весами операций:
+  list     - страница списка рецептов;
+  detail   - случайный рецепт;
+  search   - поиск (Flask - по тексту, Django - по ингредиентам);
+  favorite - добавление/удаление из избранного (только Flask);
+  login    - вход по email и паролю (только Flask).
+
+Режимы нагрузки:
+  --concurrency N       N клиентов шлют запросы один за другим;
+  --rate R              R запросов в секунду по расписанию, задержка
+                        считается от запланированного момента, поэтому
+                        очередь на стороне клиента тоже видна в p99.
+
+Первый прогон сохраняет отчет как базовую линию (--baseline), следующие
+сравниваются с ней: падение запросов в секунду или рост p95/p99 больше
+--tolerance печатаются как регрессии, и команда завершается с кодом 1.
+
+Запуск из корня проекта:
+    python -m benchmarks.loadtest --stack flask --duration 10 --concurrency 8
+    python -m benchmarks.loadtest --stack django --rate 200 --duration 10
+"""
+import argparse
+import contextlib
+import http.client
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from benchmarks.fixtures import DISHES, INGREDIENTS, create_api_database
+
+STACKS = ['flask', 'flask-async', 'django']
+DEFAULT_MIX = {
+    'flask': 'list=35,detail=30,search=20,favorite=10,login=5',
+    'django': 'list=40,detail=35,search=25',
+}
+USERS = 20
+MIN_DELTA_MS = 1.0  # меньшие изменения задержки - шум, а не регрессия
+BASELINE_DIR = os.path.join(os.path.dirname(__file__), 'baselines')
+
+
+class QuietHandler(WSGIRequestHandler):
+    """Обработчик werkzeug без строки в журнале на каждый запрос"""
+
+    def log(self, type, message, *args):
+        pass
+
+
+# ========== ОПЕРАЦИИ ==========
+
+def flask_operations(recipes):
+    """Операция -> функция (rnd, клиент) -> (метод, путь, тело)"""
+    def login(rnd, client):
+        user = rnd.randint(1, USERS)
+        return 'POST', '/api/auth/login', {'email': f'user{user}@mail.ru', 'password': f'pass{user}'}
+
+    return {
+        'list': lambda rnd, client: ('GET', '/api/recipes?limit=20', None),
+        'detail': lambda rnd, client: ('GET', f'/api/recipes/{rnd.randint(1, recipes)}', None),
+        'search': lambda rnd, client: (
+            'GET', '/api/recipes/search?q=' + quote(rnd.choice(DISHES)), None),
+        'favorite': lambda rnd, client: ('POST', f'/api/favorites/{rnd.randint(1, recipes)}', {}),
+        'login': login,
+    }
+
+
+def django_operations(recipes):
+    def search(rnd, client):
+        pantry = ','.join(name.lower() for name in rnd.sample(INGREDIENTS, 3))
+        return 'GET', '/api/recipes/search-by-ingredients/?ingredients=' + quote(pantry), None
+
+    return {
+        'list': lambda rnd, client: ('GET', '/api/recipes/', None),
+        'detail': lambda rnd, client: ('GET', f'/api/recipes/{rnd.randint(1, recipes)}/', None),
+        'search': search,
+    }
+
+
+def parse_mix(text, operations):
+    """'list=3,detail=1' -> {'list': 3.0, 'detail': 1.0} с проверкой операций"""
+    mix = {}
+    for item in text.split(','):
+        name, _, weight = item.partition('=')
+        name = name.strip()
+        if name not in operations:
+            raise ValueError(f'операция {name!r} недоступна, есть: {", ".join(operations)}')
+        mix[name] = float(weight or 1)
+    if sum(mix.values()) <= 0:
+        raise ValueError('сумма весов должна быть больше нуля')
+    return mix
+
+
+# ========== СЕРВЕРЫ ==========
+
+def serve_in_thread(app):
+    """Запуск WSGI-приложения на свободном порту; (адрес, остановка)"""
+    server = make_server('127.0.0.1', 0, app, threaded=True, request_handler=QuietHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def stop():
+        server.shutdown()
+        server.server_close()
+    return ('127.0.0.1', server.port), stop
+
+
+def serve_async_in_thread(app, workers):
+    """То же через async_server.AsyncWSGIServer в своем цикле событий"""
+    import asyncio
+    from async_server import AsyncWSGIServer
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    server = AsyncWSGIServer(app, workers)
+    address = asyncio.run_coroutine_threadsafe(server.start('127.0.0.1', 0), loop).result(10)
+
+    def stop():
+        asyncio.run_coroutine_threadsafe(server.close(), loop).result(10)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(5)
+        loop.close()
+    return address, stop
+
+
+@contextlib.contextmanager
+def flask_server(args):
+    from database import app, ensure_schema
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_name = create_api_database(os.path.join(tmp, 'recipes.db'), recipes=args.recipes,
+                                      users=USERS, seed=args.seed)
+        old_config = dict(app.config)
+        app.config.update(DATABASE=db_name)
+        ensure_schema(db_name)
+        if args.stack == 'flask-async':
+            address, stop = serve_async_in_thread(app, app.config['DB_POOL_SIZE'])
+        else:
+            address, stop = serve_in_thread(app)
+        try:
+            yield address, flask_operations(args.recipes)
+        finally:
+            stop()
+            pool = app.extensions.pop('db_pool', None)
+            if pool is not None:
+                pool.close_all()
+            counter = app.extensions.pop('view_counter', None)
+            if counter is not None:
+                counter.stop()
+            app.config.update(old_config)
+
+
+@contextlib.contextmanager
+def django_server(args):
+    import django
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    django.setup()
+
+    from django.core.wsgi import get_wsgi_application
+    from django.db import connection
+    from django.test.utils import override_settings
+
+    from benchmarks.bench_recipe_list_serializer import fill
+
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        fill(args.recipes, seed=args.seed)
+        # Как в продакшене: без DEBUG запросы к базе не копятся в connection.queries
+        with override_settings(DEBUG=False, ALLOWED_HOSTS=['127.0.0.1']):
+            address, stop = serve_in_thread(get_wsgi_application())
+            try:
+                yield address, django_operations(args.recipes)
+            finally:
+                stop()
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+SERVERS = {'flask': flask_server, 'flask-async': flask_server, 'django': django_server}
+
+
+# ========== КЛИЕНТЫ ==========
+
+class Client:
+    """Соединение одного виртуального пользователя и его cookie сессии"""
+
+    def __init__(self, address, timeout):
+        self.address = address
+        self.timeout = timeout
+        self.conn = None
+        self.cookie = None
+
+    def request(self, method, path, body=None):
+        """Статус и тело ответа; при обрыве соединение открывается заново"""
+        headers = {'Cookie': self.cookie} if self.cookie else {}
+        if body is not None:
+            body = json.dumps(body)
+            headers['Content-Type'] = 'application/json'
+        if self.conn is None:
+            self.conn = http.client.HTTPConnection(*self.address, timeout=self.timeout)
+        try:
+            self.conn.request(method, path, body=body, headers=headers)
+            response = self.conn.getresponse()
+            data = response.read()
+        except (http.client.HTTPException, OSError):
+            self.close()
+            raise
+        cookie = response.getheader('Set-Cookie')
+        if cookie:
+            self.cookie = cookie.split(';', 1)[0]
+        return response.status, data
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def succeeded(status, data):
+    """Успех по статусу; Flask сообщает об ошибках входа и избранного в JSON"""
+    if status >= 400:
+        return False
+    if data.startswith(b'{"success"'):
+        return json.loads(data).get('success', False)
+    return True
+
+
+class Recorder:
+    """Задержки и ошибки по операциям, общие для всех потоков"""
+
+    def __init__(self, operations):
+        self.lock = threading.Lock()
+        self.latencies = {name: [] for name in operations}
+        self.errors = {name: 0 for name in operations}
+
+    def add(self, name, seconds, ok):
+        with self.lock:
+            if ok:
+                self.latencies[name].append(seconds)
+            else:
+                self.errors[name] += 1
+
+
+def perform(client, operations, name, rnd):
+    method, path, body = operations[name](rnd, client)
+    if name == 'favorite' and client.cookie is None:
+        client.request(*operations['login'](rnd, client))  # вход не входит в замер
+    try:
+        return succeeded(*client.request(method, path, body))
+    except (http.client.HTTPException, OSError):
+        return False
+
+
+def run_closed(address, operations, mix, args):
+    """--concurrency клиентов, каждый шлет следующий запрос после ответа"""
+    recorder = Recorder(mix)
+    names, weights = list(mix), list(mix.values())
+    deadline = time.perf_counter() + args.duration
+
+    def worker(number):
+        rnd = random.Random(args.seed + number)
+        client = Client(address, args.timeout)
+        try:
+            while time.perf_counter() < deadline:
+                name = rnd.choices(names, weights)[0]
+                started = time.perf_counter()
+                ok = perform(client, operations, name, rnd)
+                recorder.add(name, time.perf_counter() - started, ok)
+        finally:
+            client.close()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as executor:
+        list(executor.map(worker, range(args.concurrency)))
+    return recorder, time.perf_counter() - started
+
+
+def run_open(address, operations, mix, args):
+    """--rate запросов в секунду по расписанию; клиентов не больше --concurrency"""
+    recorder = Recorder(mix)
+    names, weights = list(mix), list(mix.values())
+    local = threading.local()
+    clients = []
+    rnd = random.Random(args.seed)
+
+    def send(name, scheduled, seed):
+        client = getattr(local, 'client', None)
+        if client is None:
+            client = local.client = Client(address, args.timeout)
+            clients.append(client)
+        ok = perform(client, operations, name, random.Random(seed))
+        recorder.add(name, time.perf_counter() - scheduled, ok)
+
+    started = time.perf_counter()
+    total = int(args.rate * args.duration)
+    with ThreadPoolExecutor(args.concurrency) as executor:
+        for number in range(total):
+            scheduled = started + number / args.rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            executor.submit(send, rnd.choices(names, weights)[0], scheduled, args.seed + number)
+    for client in clients:
+        client.close()
+    return recorder, time.perf_counter() - started
+
+
+# ========== ОТЧЕТ ==========
+
+def percentile(values, fraction):
+    """Перцентиль по ближайшему рангу для отсортированного списка"""
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, int(len(values) * fraction + 0.5) - 1))]
+
+
+def summarize(latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    row = {'requests': len(latencies) + errors, 'errors': errors,
+           'rps': round(len(latencies) / elapsed, 1)}
+    for key, fraction in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99)):
+        value = percentile(latencies, fraction)
+        row[f'{key}_ms'] = None if value is None else round(value * 1000, 2)
+    return row
+
+
+def make_report(recorder, elapsed, mix, args):
+    operations = {name: summarize(recorder.latencies[name], recorder.errors[name], elapsed)
+                  for name in mix}
+    every = [value for values in recorder.latencies.values() for value in values]
+    return {
+        'config': {
+            'stack': args.stack,
+            'mode': 'rate' if args.rate else 'concurrency',
+            'concurrency': args.concurrency,
+            'rate': args.rate,
+            'duration': args.duration,
+            'recipes': args.recipes,
+            'seed': args.seed,
+            'mix': mix,
+        },
+        'environment': {'python': platform.python_version(), 'machine': platform.machine()},
+        'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'total': summarize(every, sum(recorder.errors.values()), elapsed),
+        'operations': operations,
+    }
+
+
+def compare(baseline, report, tolerance=0.15):
+    """Регрессии отчета относительно базовой линии (список строк)"""
+    if baseline['config'] != report['config']:
+        raise ValueError('параметры прогона отличаются от базовой линии')
+
+    regressions = []
+    rows = [('всего', baseline['total'], report['total'])]
+    rows += [(name, baseline['operations'].get(name), row)
+             for name, row in report['operations'].items()]
+    for name, old, new in rows:
+        if not old:
+            continue
+        if old['rps'] and new['rps'] < old['rps'] * (1 - tolerance):
+            regressions.append(f'{name}: запросов в секунду {old["rps"]} -> {new["rps"]}')
+        for key in ('p95_ms', 'p99_ms'):
+            if old[key] is None or new[key] is None:
+                continue
+            if new[key] > old[key] * (1 + tolerance) and new[key] - old[key] > MIN_DELTA_MS:
+                regressions.append(f'{name}: {key[:3]} {old[key]} -> {new[key]} мс')
+        old_rate = old['errors'] / old['requests'] if old['requests'] else 0
+        new_rate = new['errors'] / new['requests'] if new['requests'] else 0
+        if new_rate > old_rate + 0.01:
+            regressions.append(f'{name}: ошибок {old_rate:.1%} -> {new_rate:.1%}')
+    return regressions
+
+
+def print_report(report):
+    config = report['config']
+    load = f'{config["rate"]} запр/с' if config['rate'] else f'{config["concurrency"]} клиентов'
+    print(f'{config["stack"]}: {load}, {config["duration"]} с, рецептов: {config["recipes"]}')
+    print(f'{"операция":<10}{"запросов":>10}{"ошибок":>8}{"запр/с":>9}'
+          f'{"p50 мс":>9}{"p95 мс":>9}{"p99 мс":>9}')
+    for name, row in [*report['operations'].items(), ('всего', report['total'])]:
+        cells = ''.join(f'{"-" if row[key] is None else row[key]:>9}'
+                        for key in ('p50_ms', 'p95_ms', 'p99_ms'))
+        print(f'{name:<10}{row["requests"]:>10}{row["errors"]:>8}{row["rps"]:>9}{cells}')
+
+
+def run(args):
+    """Прогон нагрузки по аргументам командной строки; возвращает отчет"""
+    with SERVERS[args.stack](args) as (address, operations):
+        mix = parse_mix(args.mix or DEFAULT_MIX[args.stack.split('-')[0]], operations)
+        runner = run_open if args.rate else run_closed
+        recorder, elapsed = runner(address, operations, mix, args)
+    return make_report(recorder, elapsed, mix, args)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--stack', choices=STACKS, default='flask')
+    parser.add_argument('--mix', help='веса операций, например list=40,detail=30,search=30')
+    parser.add_argument('--concurrency', type=int, default=8, help='клиентов (потоков)')
+    parser.add_argument('--rate', type=float, help='запросов в секунду вместо замкнутого цикла')
+    parser.add_argument('--duration', type=float, default=10.0, help='секунд нагрузки')
+    parser.add_argument('--recipes', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--timeout', type=float, default=10.0, help='секунд на запрос')
+    parser.add_argument('--baseline', help='файл базовой линии (по умолчанию '
+                                           'benchmarks/baselines/<stack>.json)')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='допустимое ухудшение, доля (0.15 = 15%%)')
+    parser.add_argument('--update-baseline', action='store_true',
+                        help='перезаписать базовую линию результатом прогона')
+    return parser
+
+
+def main():
+    args = build_parser().parse_args()
+    report = run(args)
+    print_report(report)
+
+    path = args.baseline or os.path.join(BASELINE_DIR, f'{args.stack}.json')
+    if os.path.exists(path) and not args.update_baseline:
+        with open(path, encoding='utf-8') as file:
+            baseline = json.load(file)
+        try:
+            regressions = compare(baseline, report, args.tolerance)
+        except ValueError as e:
+            sys.exit(f'{path}: {e}; запустите с --update-baseline')
+        if regressions:
+            print(f'Регрессии относительно {path} ({baseline["created"]}):')
+            for line in regressions:
+                print(f'  {line}')
+            sys.exit(1)
+        print(f'Без регрессий относительно {path} ({baseline["created"]})')
+        return
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+    print(f'Базовая линия сохранена: {path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -16,10 +16,13 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'rest_framework',
     'recipes',
 ]
 
 MIDDLEWARE = [
+    'recipes.metrics.MetricsMiddleware',  # SQL и время по маршрутам для /metrics/
+    'django.middleware.gzip.GZipMiddleware',  # сжатие ответов, в том числе JSON API
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -35,8 +38,15 @@ TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [os.path.join(BASE_DIR, 'templates')],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Скомпилированные шаблоны хранятся в памяти процесса; при DEBUG
+            # автоперезагрузка сбрасывает их, когда файл шаблона меняется
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -78,5 +88,35 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    # Имена с хэшем содержимого и готовые .gz/.br после collectstatic
+    'staticfiles': {'BACKEND': 'recipes.assets.CompressedManifestStaticFilesStorage'},
+}
+
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Кэш в памяти процесса, внешние сервисы не нужны. Версии групп страниц
+# хранятся в базе (DataVersion), поэтому сброс виден всем процессам
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'recipes',
+        'OPTIONS': {'MAX_ENTRIES': 1000},
+    },
+    # Фрагменты шаблонов (карточки рецептов); ключ включает updated_at,
+    # поэтому устаревшие фрагменты не сбрасываются, а вытесняются
+    'fragments': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'recipe-fragments',
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    },
+}
+RECIPE_PAGE_CACHE_TIMEOUT = 300  # секунд хранится готовая HTML-страница
 
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'PAGE_SIZE': 20,
+}
\ No newline at end of file
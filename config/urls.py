@@ -1,7 +1,14 @@
+from django.conf import settings
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
+
+from recipes import assets
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('recipes.urls')),
-]
\ No newline at end of file
+]
+
+if not settings.DEBUG:
+    # При DEBUG статику отдает runserver; иначе - собранную collectstatic
+    urlpatterns.append(re_path(rf'^{settings.STATIC_URL.strip("/")}/(?P<path>.+)$', assets.serve))
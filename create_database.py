@@ -3,11 +3,13 @@ import json
 from datetime import datetime
 import hashlib
 
-def create_database():
+from schema_migrations import migrate
+
+def create_database(db_name='cookbook.db'):
     """Создание базы данных SQLite для кулинарной книги"""
     
     # Подключение к базе данных (файл будет создан автоматически)
-    conn = sqlite3.connect('cookbook.db')
+    conn = sqlite3.connect(db_name)
     cursor = conn.cursor()
     
     print("Создание базы данных...")
@@ -50,6 +52,7 @@ def create_database():
         views INTEGER DEFAULT 0,
         average_rating REAL DEFAULT 0,
         rating_count INTEGER DEFAULT 0,
+        rating_sum INTEGER DEFAULT 0,  -- сумма оценок, average_rating = rating_sum / rating_count
         tags TEXT DEFAULT '[]',  -- JSON массив
         ingredients TEXT DEFAULT '[]',  -- JSON массив
         steps TEXT DEFAULT '[]',  -- JSON массив
@@ -106,11 +109,14 @@ def create_database():
     # Добавление начальных данных
     add_initial_data(cursor)
     
-    # Сохранение изменений и закрытие соединения
+    # Сохранение изменений
     conn.commit()
+    
+    # Индексы, агрегаты оценок, поиск и счетчики
+    migrate(conn)
     conn.close()
     
-    print("\n✅ База данных 'cookbook.db' успешно создана!")
+    print(f"\n✅ База данных '{db_name}' успешно создана!")
     print("📍 Расположение: в той же папке, где находится этот скрипт")
 
 def add_initial_data(cursor):
@@ -298,9 +304,9 @@ def add_initial_data(cursor):
     
     print("\n🎉 Начальные данные успешно добавлены!")
 
-def check_database():
+def check_database(db_name='cookbook.db'):
     """Проверка содержимого базы данных"""
-    conn = sqlite3.connect('cookbook.db')
+    conn = sqlite3.connect(db_name)
     cursor = conn.cursor()
     
     print("\n📊 Проверка содержимого базы данных:")
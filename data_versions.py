@@ -0,0 +1,107 @@
+"""Версии данных для условных запросов (ETag / Last-Modified)
+
+Таблица data_versions хранит номер версии и время последнего изменения
+для каждой коллекции ('recipes', 'categories', 'users'), каждого рецепта
+('recipe:<id>') и избранного каждого пользователя ('favorites:<user_id>').
+Версии увеличиваются триггерами, поэтому учитываются любые записи в базу,
+включая скрипты и миграции, а проверка «не изменилось ли» - это чтение
+нескольких строк по первичному ключу.
+"""
+import hashlib
+from datetime import datetime, timezone
+
+VERSIONS_TABLE = 'data_versions'
+
+# Текущее время в секундах Unix с долями (unixepoch('subsec') есть не во всех сборках)
+_NOW = "((julianday('now') - 2440587.5) * 86400.0)"
+
+
+def _bump(name):
+    return f'''
+        INSERT INTO {VERSIONS_TABLE} (name, version, updated_at) VALUES ({name}, 1, {_NOW})
+        ON CONFLICT (name) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at;
+    '''
+
+
+def ensure_versions(conn):
+    """Создание data_versions и триггеров для таблиц, которые есть в базе"""
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    with conn:
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {VERSIONS_TABLE} (
+                name TEXT PRIMARY KEY,
+                version INTEGER NOT NULL,
+                updated_at REAL NOT NULL
+            ) WITHOUT ROWID
+        ''')
+
+        for table in ('categories', 'users'):
+            if table not in tables:
+                continue
+            conn.execute(f'INSERT OR IGNORE INTO {VERSIONS_TABLE} VALUES (?, 1, {_NOW})', (table,))
+            for event, suffix in (('INSERT', 'ai'), ('UPDATE', 'au'), ('DELETE', 'ad')):
+                conn.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS {table}_version_{suffix}
+                    AFTER {event} ON {table} BEGIN {_bump(repr(table))} END
+                ''')
+
+        if 'recipes' in tables:
+            conn.execute(f"INSERT OR IGNORE INTO {VERSIONS_TABLE} VALUES ('recipes', 1, {_NOW})")
+            conn.execute(f'''
+                INSERT OR IGNORE INTO {VERSIONS_TABLE} (name, version, updated_at)
+                SELECT 'recipe:' || id, 1, {_NOW} FROM recipes
+            ''')
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS recipes_version_ai AFTER INSERT ON recipes BEGIN
+                    {_bump("'recipes'")}
+                    {_bump("'recipe:' || new.id")}
+                END
+            ''')
+            # Счетчик просмотров пишется пачками и часто; сам по себе он версию
+            # не меняет, иначе каждый сброс счетчика обнулял бы кэш клиентов
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS recipes_version_au AFTER UPDATE ON recipes
+                WHEN new.views IS old.views BEGIN
+                    {_bump("'recipes'")}
+                    {_bump("'recipe:' || new.id")}
+                END
+            ''')
+            # Версия удаленного рецепта не удаляется, а растет: рецепт, вставленный
+            # потом с тем же id, не должен совпасть по ETag с прежним
+            conn.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS recipes_version_ad AFTER DELETE ON recipes BEGIN
+                    {_bump("'recipes'")}
+                    {_bump("'recipe:' || old.id")}
+                END
+            ''')
+
+        if 'favorites' in tables:
+            for event, suffix, ref in (('INSERT', 'ai', 'new'), ('DELETE', 'ad', 'old')):
+                conn.execute(f'''
+                    CREATE TRIGGER IF NOT EXISTS favorites_version_{suffix}
+                    AFTER {event} ON favorites BEGIN {_bump(f"'favorites:' || {ref}.user_id")} END
+                ''')
+
+
+def read_versions(conn, names):
+    """{имя: (версия, время изменения)} для имеющихся в таблице имен"""
+    names = list(names)
+    placeholders = ', '.join('?' * len(names))
+    rows = conn.execute(
+        f'SELECT name, version, updated_at FROM {VERSIONS_TABLE} WHERE name IN ({placeholders})',
+        names,
+    )
+    return {name: (version, updated_at) for name, version, updated_at in rows}
+
+
+def validators(versions, names, variant=''):
+    """ETag и Last-Modified ответа, который зависит от данных names
+
+    variant - то, от чего ответ зависит помимо данных (например, пользователь).
+    Для отсутствующих имен (рецепт не найден) версия считается нулевой.
+    """
+    parts = [variant] + [f'{name}={versions.get(name, (0, 0))[0]}' for name in names]
+    etag = hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest()[:20]
+    timestamps = [versions[name][1] for name in names if name in versions]
+    last_modified = datetime.fromtimestamp(max(timestamps), tz=timezone.utc) if timestamps else None
+    return etag, last_modified
@@ -1,23 +1,402 @@
-from flask import Flask, jsonify, request, session
+from flask import Flask, abort, jsonify, request, send_file, session, g, stream_with_context
 from flask_cors import CORS
+from werkzeug.security import safe_join
+import gzip
+import mimetypes
+import os
 import sqlite3
 import json
+import threading
+from functools import wraps
+from time import perf_counter
+
+from asset_pipeline import IMMUTABLE_CACHE_CONTROL, is_fingerprinted, negotiate
+from data_versions import read_versions, validators
+from db_pool import ConnectionPool
+from json_fragments import fragment_column, render_page
+from pagination import InvalidCursorError, decode_cursor, page_size, split_page
+from schema_migrations import LATEST_VERSION, migrate, schema_version
+from search_index import FTS_TABLE, build_match_query, ensure_search_index
+import sql_metrics
+from sql_metrics import InstrumentedConnection
+from stats_cache import StatsSnapshot, read_counters
+from user_cache import FavoritesCache, UserCache
+from view_counter import ViewCounter
 
 app = Flask(__name__)
 app.secret_key = 'super-secret-key'
+app.config.update(
+    DATABASE='recipes.db',
+    DB_POOL_ENABLED=True,
+    DB_POOL_SIZE=8,
+    SEARCH_USE_FTS=True,  # False - поиск через LIKE, как раньше
+    VIEW_FLUSH_INTERVAL=5.0,   # секунд между записями счетчика просмотров
+    VIEW_FLUSH_THRESHOLD=500,  # или раньше, если накопилось столько просмотров
+    STATS_TTL=30.0,            # секунд, которые /api/stats отдает закэшированный снимок
+    JSON_FRAGMENTS=True,       # списки рецептов склеиваются из готового JSON (recipe_json)
+    STREAM_BATCH_SIZE=200,     # строк за один fetchmany при потоковой выдаче (?stream=1)
+    GZIP_MIN_SIZE=1024,        # JSON-ответы от этого размера сжимаются gzip
+    GZIP_LEVEL=6,
+    SITE_DIR='dist',           # собранные страницы (python asset_pipeline.py)
+    METRICS_ENABLED=True,      # SQL и время по маршрутам для /metrics (sql_metrics.py)
+    USER_CACHE_SIZE=10000,     # пользователей в памяти для /api/auth/me и записи рецептов
+    USER_CACHE_TTL=300.0,      # секунд до перечитывания пользователя из базы
+    FAVORITES_CACHE_SIZE=10000,  # пользователей, чье избранное держится в памяти
+    FAVORITES_CACHE_TTL=300.0,
+    FAVORITES_CHECK_MAX_IDS=500,  # рецептов в одном /api/favorites/check
+)
 CORS(app, supports_credentials=True)
 
+_init_lock = threading.Lock()
+
+def get_pool():
+    """Пул соединений приложения (создается при первом обращении, свой для каждой базы)"""
+    pool = app.extensions.get('db_pool')
+    if pool is None or pool.db_name != app.config['DATABASE']:
+        with _init_lock:
+            pool = app.extensions.get('db_pool')
+            if pool is None or pool.db_name != app.config['DATABASE']:
+                if pool is not None:
+                    pool.close_all()
+                pool = ConnectionPool(app.config['DATABASE'],
+                                      size=app.config['DB_POOL_SIZE'],
+                                      factory=connection_factory())
+                app.extensions['db_pool'] = pool
+    return pool
+
+def get_view_counter():
+    """Буфер просмотров рецептов (поток записи запускается при первом обращении)"""
+    counter = app.extensions.get('view_counter')
+    if counter is None or counter.db_name != app.config['DATABASE']:
+        with _init_lock:
+            counter = app.extensions.get('view_counter')
+            if counter is None or counter.db_name != app.config['DATABASE']:
+                if counter is not None:
+                    counter.stop()
+                counter = ViewCounter(app.config['DATABASE'],
+                                      flush_interval=app.config['VIEW_FLUSH_INTERVAL'],
+                                      flush_threshold=app.config['VIEW_FLUSH_THRESHOLD']).start()
+                app.extensions['view_counter'] = counter
+    return counter
+
+def get_user_cache():
+    """Кэш пользователей по id, общий для всех маршрутов (свой для каждой базы)"""
+    cache = app.extensions.get('user_cache')
+    if cache is None or cache.db_name != app.config['DATABASE']:
+        with _init_lock:
+            cache = app.extensions.get('user_cache')
+            if cache is None or cache.db_name != app.config['DATABASE']:
+                cache = UserCache(load_user, maxsize=app.config['USER_CACHE_SIZE'],
+                                  ttl=app.config['USER_CACHE_TTL'])
+                cache.db_name = app.config['DATABASE']
+                app.extensions['user_cache'] = cache
+    return cache
+
+def load_user(user_id):
+    """Пользователь из базы для UserCache"""
+    row = get_db().execute('SELECT id, email, name, avatar FROM users WHERE id = ?',
+                           (user_id,)).fetchone()
+    return dict(row) if row else None
+
+def get_favorites_cache():
+    """Кэш id избранных рецептов по пользователям (свой для каждой базы)"""
+    cache = app.extensions.get('favorites_cache')
+    if cache is None or cache.db_name != app.config['DATABASE']:
+        with _init_lock:
+            cache = app.extensions.get('favorites_cache')
+            if cache is None or cache.db_name != app.config['DATABASE']:
+                cache = FavoritesCache(load_favorite_ids, maxsize=app.config['FAVORITES_CACHE_SIZE'],
+                                       ttl=app.config['FAVORITES_CACHE_TTL'])
+                cache.db_name = app.config['DATABASE']
+                app.extensions['favorites_cache'] = cache
+    return cache
+
+def load_favorite_ids(user_id):
+    """Все id избранных рецептов пользователя для FavoritesCache"""
+    rows = get_db().execute('SELECT recipe_id FROM favorites WHERE user_id = ?', (user_id,))
+    return {row[0] for row in rows}
+
+sql_metrics.REGISTRY.register(lambda: get_user_cache().metrics())
+sql_metrics.REGISTRY.register(lambda: get_favorites_cache().metrics())
+
+def connection_factory():
+    """Класс соединений с базой: с учетом SQL для /metrics или обычный"""
+    return InstrumentedConnection if app.config['METRICS_ENABLED'] else sqlite3.Connection
+
+def ensure_schema(database):
+    """Применение миграций схемы один раз для каждой базы"""
+    migrated = app.extensions.setdefault('migrated', set())
+    if database in migrated:
+        return
+    with _init_lock:
+        if database not in migrated:
+            conn = sqlite3.connect(database)
+            try:
+                migrate(conn)
+                # Базу без таблиц проверяем снова, когда схему создадут
+                if schema_version(conn) == LATEST_VERSION:
+                    migrated.add(database)
+            finally:
+                conn.close()
+
 def get_db():
-    """Подключение к базе данных"""
-    conn = sqlite3.connect('recipes.db')
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Подключение к базе данных на время текущего запроса"""
+    if 'db' not in g:
+        ensure_schema(app.config['DATABASE'])
+        if app.config['DB_POOL_ENABLED']:
+            # Соединение вернется в тот пул, из которого взято, даже если база сменится
+            g.db_pool = get_pool()
+            g.db = g.db_pool.acquire()
+        else:
+            g.db = sqlite3.connect(app.config['DATABASE'], factory=connection_factory())
+            g.db.row_factory = sqlite3.Row
+    return g.db
+
+@app.teardown_appcontext
+def release_db(exception):
+    """Возврат соединения в пул после обработки запроса"""
+    conn, pool = g.pop('db', None), g.pop('db_pool', None)
+    if conn is not None:
+        return_db(conn, pool)
+
+def return_db(conn, pool=None):
+    """Возврат соединения в пул, из которого оно взято, или закрытие без пула"""
+    if pool is not None:
+        pool.release(conn)
+    else:
+        conn.close()
+
+def page_args(cursor_size=2):
+    """Размер страницы и позиция курсора из параметров запроса"""
+    limit = page_size(request.args.get('limit'))
+    after = decode_cursor(request.args.get('cursor'), cursor_size)
+    return limit, after
+
+@app.errorhandler(InvalidCursorError)
+def invalid_cursor(error):
+    return jsonify({'success': False, 'error': 'Некорректный курсор'})
+
+def by_created(row):
+    """Ключ сортировки списков рецептов: (created_at, id)"""
+    return row['created_at'], row['id']
+
+def recipe_columns():
+    """Колонки рецепта (таблица recipes под псевдонимом r) для списков
+    
+    В режиме JSON_FRAGMENTS выбирается готовый JSON рецепта и ключи
+    сортировки, иначе вся строка.
+    """
+    if app.config['JSON_FRAGMENTS']:
+        return f'{fragment_column("r")} AS body, r.id, r.created_at'
+    return 'r.*'
+
+def recipe_from_row(row, hidden=()):
+    """Рецепт из строки таблицы; hidden - служебные колонки, которые не отдаются клиенту"""
+    recipe = dict(row)
+    for column in hidden:
+        recipe.pop(column, None)
+    # Преобразуем JSON поля
+    for field in ['ingredients', 'steps', 'tags']:
+        if recipe[field]:
+            recipe[field] = json.loads(recipe[field])
+        else:
+            recipe[field] = []
+    return recipe
+
+def recipes_response(rows, next_cursor, hidden=()):
+    """Ответ со списком рецептов
+    
+    Готовые JSON-фрагменты склеиваются без разбора, строки таблицы
+    разбираются поле за полем.
+    """
+    if app.config['JSON_FRAGMENTS']:
+        return app.response_class(render_page(rows, next_cursor, success=True),
+                                  mimetype='application/json')
+    
+    recipes = [recipe_from_row(row, hidden) for row in rows]
+    return jsonify({'success': True, 'recipes': recipes, 'next_cursor': next_cursor})
+
+def stream_recipes(cursor, hidden=()):
+    """Потоковый ответ со всеми строками курсора
+    
+    Массив рецептов пишется по частям: строки читаются через fetchmany
+    по STREAM_BATCH_SIZE, поэтому в памяти одновременно находится только
+    одна пачка, а клиент получает начало ответа сразу.
+    """
+    batch_size = app.config['STREAM_BATCH_SIZE']
+    fragments = app.config['JSON_FRAGMENTS']
+    # Ответ читается уже после завершения запроса, поэтому соединение
+    # забирается у g и возвращается, когда выдача закончится
+    conn, pool = g.pop('db'), g.pop('db_pool', None)
+    
+    def generate():
+        try:
+            yield '{"success":true,"recipes":['
+            separator = ''
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                if fragments:
+                    chunk = ','.join(row['body'] for row in rows)
+                else:
+                    chunk = ','.join(json.dumps(recipe_from_row(row, hidden)) for row in rows)
+                yield separator + chunk
+                separator = ','
+            yield '],"next_cursor":null}'
+        finally:
+            cursor.close()
+            return_db(conn, pool)
+    
+    return app.response_class(stream_with_context(generate()), mimetype='application/json')
+
+def recipes_page(sql, params, limit, key, hidden=()):
+    """Выполнение запроса списка рецептов (без LIMIT)
+    
+    Обычно отдается страница и курсор следующей. С параметром stream=1
+    отдаются все строки начиная с курсора, потоком (для выгрузок).
+    """
+    cursor = get_db().cursor()
+    if request.args.get('stream') == '1':
+        cursor.execute(sql, params)
+        return stream_recipes(cursor, hidden)
+    
+    cursor.execute(sql + ' LIMIT ?', [*params, limit + 1])
+    rows, next_cursor = split_page(cursor.fetchall(), limit, key)
+    return recipes_response(rows, next_cursor, hidden)
+
+def conditional(*names, user=False, on_not_modified=None):
+    """Условный GET по версиям данных из data_versions
+    
+    names - от чего зависит ответ: 'recipes', 'recipe:{recipe_id}',
+    'favorites:{user_id}' (подставляются аргументы URL и пользователь сессии).
+    user=True - ответ зависит от пользователя, хотя имена от него не зависят.
+    Если If-None-Match или If-Modified-Since совпадают, 304 отдается сразу,
+    до основного запроса и сериализации; on_not_modified(**kwargs) вызывается
+    для побочных эффектов, которые нужны и в этом случае.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(**kwargs):
+            user_id = session.get('user_id')
+            resolved = [name.format(user_id=user_id, **kwargs) for name in names]
+            versions = read_versions(get_db(), resolved)
+            etag, last_modified = validators(versions, resolved,
+                                             variant=f'user={user_id}' if user else '')
+            g.data_versions = versions  # для кэшей, которые сверяются с версиями
+            
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains_weak(etag)
+            else:
+                since = request.if_modified_since
+                not_modified = (since is not None and last_modified is not None
+                                and last_modified.replace(microsecond=0) <= since)
+            
+            if not_modified:
+                if on_not_modified is not None:
+                    on_not_modified(**kwargs)
+                response = app.response_class(status=304)
+            else:
+                response = app.make_response(view(**kwargs))
+            response.set_etag(etag, weak=True)
+            if last_modified is not None:
+                response.last_modified = last_modified
+            # Кэшировать можно, но перед использованием - проверить у сервера
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
+
+@app.after_request
+def compress_response(response):
+    """gzip для JSON-ответов от GZIP_MIN_SIZE байт, если клиент его принимает
+    
+    Потоковые ответы и файлы (у них уже есть готовые сжатые копии) не трогаются.
+    """
+    if response.mimetype != 'application/json' or response.is_streamed \
+            or response.direct_passthrough:
+        return response
+    response.vary.add('Accept-Encoding')
+    if response.status_code != 200 or 'Content-Encoding' in response.headers \
+            or 'gzip' not in request.accept_encodings:
+        return response
+    
+    data = response.get_data()
+    if len(data) < app.config['GZIP_MIN_SIZE']:
+        return response
+    response.set_data(gzip.compress(data, app.config['GZIP_LEVEL']))
+    response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+def send_site_file(filename):
+    """Файл собранного сайта: готовая .br/.gz копия, если клиент ее принимает
+    
+    Файлы с хэшем в имени кэшируются клиентом навсегда, страницы -
+    с проверкой при каждом открытии.
+    """
+    path = safe_join(os.path.abspath(app.config['SITE_DIR']), filename)
+    if path is None or not os.path.isfile(path):
+        abort(404)
+    served, encoding = negotiate(path, request.headers.get('Accept-Encoding'))
+    response = send_file(served, mimetype=mimetypes.guess_type(filename)[0], conditional=True)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    if is_fingerprinted(filename):
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    else:
+        response.cache_control.no_cache = True
+    return response
+
+# ========== МЕТРИКИ ==========
+@app.before_request
+def start_metrics():
+    if app.config['METRICS_ENABLED']:
+        g.metrics_started = perf_counter()
+        sql_metrics.begin()
+
+@app.after_request
+def remember_status(response):
+    if 'metrics_started' in g:
+        g.metrics_status = response.status_code
+        g.metrics_streamed = response.is_streamed
+    return response
+
+@app.teardown_request
+def finish_metrics(exception):
+    """Итоги запроса в sql_metrics
+    
+    Для потоковых ответов stream_with_context вызывает teardown еще раз,
+    когда выдача закончится; итоги записываются тогда, вместе с чтением строк.
+    """
+    if g.pop('metrics_streamed', False) and exception is None:
+        return
+    started = g.pop('metrics_started', None)
+    if started is None:
+        return
+    stats = sql_metrics.end()
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    status = 500 if exception is not None else g.pop('metrics_status', 500)
+    sql_metrics.REGISTRY.observe(route, request.method, status, perf_counter() - started, stats)
+
+@app.route('/metrics')
+def metrics():
+    """Метрики в текстовом формате Prometheus"""
+    return app.response_class(sql_metrics.REGISTRY.render(), content_type=sql_metrics.CONTENT_TYPE)
 
 # ========== ГЛАВНАЯ СТРАНИЦА ==========
 @app.route('/')
 def index():
     return "Flask сервер работает! Используйте /api/... для доступа к API"
 
+@app.route('/<page>.html')
+def site_page(page):
+    return send_site_file(f'{page}.html')
+
+@app.route('/assets/<path:filename>')
+def site_asset(filename):
+    return send_site_file(f'assets/{filename}')
+
 # ========== АВТОРИЗАЦИЯ ==========
 @app.route('/api/auth/register', methods=['POST'])
 def register():
@@ -34,20 +413,20 @@ def register():
         user_id = cursor.lastrowid
         conn.commit()
         
+        user = {
+            'id': user_id,
+            'email': data['email'],
+            'name': data['name'],
+            'avatar': data['name'][0]
+        }
+        get_user_cache().put(user)
         session['user_id'] = user_id
         return jsonify({
             'success': True,
-            'user': {
-                'id': user_id,
-                'email': data['email'],
-                'name': data['name'],
-                'avatar': data['name'][0]
-            }
+            'user': user
         })
     except sqlite3.IntegrityError:
         return jsonify({'success': False, 'error': 'Пользователь уже существует'})
-    finally:
-        conn.close()
 
 @app.route('/api/auth/login', methods=['POST'])
 def login():
@@ -61,9 +440,9 @@ def login():
     ''', (data['email'], data['password']))
     
     user = cursor.fetchone()
-    conn.close()
     
     if user:
+        get_user_cache().put(dict(user))
         session['user_id'] = user['id']
         return jsonify({
             'success': True,
@@ -86,45 +465,35 @@ def logout():
 def get_current_user():
     user_id = session.get('user_id')
     if user_id:
-        conn = get_db()
-        cursor = conn.cursor()
-        cursor.execute('SELECT id, email, name, avatar FROM users WHERE id = ?', (user_id,))
-        user = cursor.fetchone()
-        conn.close()
+        user = get_user_cache().get(user_id)
         
         if user:
             return jsonify({
                 'success': True,
-                'user': dict(user)
+                'user': user
             })
     
     return jsonify({'success': False, 'user': None})
 
 # ========== РЕЦЕПТЫ ==========
 @app.route('/api/recipes', methods=['GET'])
+@conditional('recipes')
 def get_recipes():
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-    SELECT * FROM recipes ORDER BY created_at DESC
-    ''')
+    limit, after = page_args()
     
-    recipes = []
-    for row in cursor.fetchall():
-        recipe = dict(row)
-        # Преобразуем JSON поля
-        for field in ['ingredients', 'steps', 'tags']:
-            if recipe[field]:
-                recipe[field] = json.loads(recipe[field])
-            else:
-                recipe[field] = []
-        recipes.append(recipe)
+    # Курсорная пагинация: каждая страница - поиск по индексу, без OFFSET
+    sql = f'SELECT {recipe_columns()} FROM recipes r'
+    params = []
+    if after:
+        sql += ' WHERE (r.created_at, r.id) < (?, ?)'
+        params.extend(after)
+    sql += ' ORDER BY r.created_at DESC, r.id DESC'
     
-    conn.close()
-    return jsonify({'success': True, 'recipes': recipes})
+    return recipes_page(sql, params, limit, by_created)
 
 @app.route('/api/recipes/<int:recipe_id>', methods=['GET'])
+@conditional('recipe:{recipe_id}',
+             on_not_modified=lambda recipe_id: get_view_counter().increment(recipe_id))
 def get_recipe(recipe_id):
     conn = get_db()
     cursor = conn.cursor()
@@ -140,14 +509,13 @@ def get_recipe(recipe_id):
             else:
                 recipe[field] = []
         
-        # Увеличиваем просмотры
-        cursor.execute('UPDATE recipes SET views = views + 1 WHERE id = ?', (recipe_id,))
-        conn.commit()
+        # Просмотр записывается в базу позже, пачкой с другими
+        views = get_view_counter()
+        recipe['views'] += views.pending(recipe_id)
+        views.increment(recipe_id)
         
-        conn.close()
         return jsonify({'success': True, 'recipe': recipe})
     
-    conn.close()
     return jsonify({'success': False, 'error': 'Рецепт не найден'})
 
 @app.route('/api/recipes', methods=['POST'])
@@ -158,14 +526,13 @@ def create_recipe():
     
     data = request.json
     
+    # Имя автора - из кэша пользователей, без запроса к базе
+    user = get_user_cache().get(user_id)
+    author_name = user['name'] if user else 'Неизвестный'
+    
     conn = get_db()
     cursor = conn.cursor()
     
-    # Получаем имя пользователя
-    cursor.execute('SELECT name FROM users WHERE id = ?', (user_id,))
-    user = cursor.fetchone()
-    author_name = user['name'] if user else 'Неизвестный'
-    
     try:
         cursor.execute('''
         INSERT INTO recipes (
@@ -196,50 +563,45 @@ def create_recipe():
         return jsonify({'success': True, 'recipe_id': recipe_id})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
-    finally:
-        conn.close()
 
 # ========== КАТЕГОРИИ ==========
 @app.route('/api/categories', methods=['GET'])
+@conditional('categories')
 def get_categories():
     conn = get_db()
     cursor = conn.cursor()
     
     cursor.execute('SELECT * FROM categories ORDER BY name')
     categories = [dict(row) for row in cursor.fetchall()]
-    conn.close()
     
     return jsonify({'success': True, 'categories': categories})
 
 # ========== ИЗБРАННОЕ ==========
 @app.route('/api/favorites', methods=['GET'])
+@conditional('favorites:{user_id}', 'recipes')
 def get_favorites():
     user_id = session.get('user_id')
     if not user_id:
         return jsonify({'success': False, 'error': 'Требуется авторизация'})
     
-    conn = get_db()
-    cursor = conn.cursor()
+    limit, after = page_args()
     
-    cursor.execute('''
-    SELECT r.* FROM recipes r
+    # Порядок и курсор - по времени добавления в избранное
+    query = f'''
+    SELECT {recipe_columns()},
+           f.created_at AS favorited_at, f.id AS favorite_id FROM recipes r
     JOIN favorites f ON r.id = f.recipe_id
     WHERE f.user_id = ?
-    ORDER BY f.created_at DESC
-    ''', (user_id,))
-    
-    recipes = []
-    for row in cursor.fetchall():
-        recipe = dict(row)
-        for field in ['ingredients', 'steps', 'tags']:
-            if recipe[field]:
-                recipe[field] = json.loads(recipe[field])
-            else:
-                recipe[field] = []
-        recipes.append(recipe)
-    
-    conn.close()
-    return jsonify({'success': True, 'recipes': recipes})
+    '''
+    params = [user_id]
+    if after:
+        query += ' AND (f.created_at, f.id) < (?, ?)'
+        params.extend(after)
+    query += ' ORDER BY f.created_at DESC, f.id DESC'
+    
+    return recipes_page(query, params, limit,
+                        lambda row: (row['favorited_at'], row['favorite_id']),
+                        hidden=['favorited_at', 'favorite_id'])
 
 @app.route('/api/favorites/<int:recipe_id>', methods=['POST'])
 def toggle_favorite(recipe_id):
@@ -250,145 +612,192 @@ def toggle_favorite(recipe_id):
     conn = get_db()
     cursor = conn.cursor()
     
-    # Проверяем, есть ли уже в избранном
-    cursor.execute('SELECT id FROM favorites WHERE user_id = ? AND recipe_id = ?', 
-                  (user_id, recipe_id))
-    existing = cursor.fetchone()
-    
+    # Без предварительного SELECT: удаляем, а если удалять было нечего - добавляем.
+    # Оба запроса и чтение новой версии избранного - в одной транзакции
+    # с блокировкой записи с самого начала (BEGIN IMMEDIATE), поэтому
+    # два одновременных переключения не проходят оба мимо друг друга.
     try:
-        if existing:
-            # Удаляем
-            cursor.execute('DELETE FROM favorites WHERE id = ?', (existing['id'],))
-            added = False
-        else:
-            # Добавляем
-            cursor.execute('INSERT INTO favorites (user_id, recipe_id) VALUES (?, ?)', 
-                          (user_id, recipe_id))
-            added = True
-        
+        cursor.execute('BEGIN IMMEDIATE')
+        cursor.execute('DELETE FROM favorites WHERE user_id = ? AND recipe_id = ?',
+                       (user_id, recipe_id))
+        added = cursor.rowcount == 0
+        if added:
+            cursor.execute('INSERT OR IGNORE INTO favorites (user_id, recipe_id) VALUES (?, ?)',
+                           (user_id, recipe_id))
+        version = read_versions(conn, [f'favorites:{user_id}']).get(f'favorites:{user_id}')
         conn.commit()
-        return jsonify({'success': True, 'added': added})
     except Exception as e:
+        conn.rollback()
         return jsonify({'success': False, 'error': str(e)})
-    finally:
-        conn.close()
+    
+    get_favorites_cache().toggle(user_id, recipe_id, added, version and version[0])
+    return jsonify({'success': True, 'added': added})
 
 @app.route('/api/favorites/<int:recipe_id>/check', methods=['GET'])
+@conditional('favorites:{user_id}')
 def check_favorite(recipe_id):
     user_id = session.get('user_id')
     if not user_id:
         return jsonify({'success': True, 'is_favorite': False})
     
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT id FROM favorites WHERE user_id = ? AND recipe_id = ?', 
-                  (user_id, recipe_id))
-    result = cursor.fetchone()
-    conn.close()
+    flags = get_favorites_cache().check(user_id, [recipe_id], favorites_version(user_id))
+    return jsonify({'success': True, 'is_favorite': flags[recipe_id]})
+
+@app.route('/api/favorites/check', methods=['GET'])
+@conditional('favorites:{user_id}')
+def check_favorites():
+    """Избранное для списка рецептов: /api/favorites/check?ids=1,2,3
+    
+    Одним ответом вместо запроса /api/favorites/<id>/check на каждую
+    карточку; избранное пользователя читается из базы одним запросом.
+    """
+    try:
+        recipe_ids = [int(part) for part in request.args.get('ids', '').split(',') if part.strip()]
+    except ValueError:
+        return jsonify({'success': False, 'error': 'Некорректный список рецептов'})
+    if len(recipe_ids) > app.config['FAVORITES_CHECK_MAX_IDS']:
+        return jsonify({'success': False, 'error': 'Слишком много рецептов в запросе'})
     
-    return jsonify({'success': True, 'is_favorite': result is not None})
+    user_id = session.get('user_id')
+    if not user_id:
+        flags = dict.fromkeys(recipe_ids, False)
+    else:
+        flags = get_favorites_cache().check(user_id, recipe_ids, favorites_version(user_id))
+    return jsonify({'success': True,
+                    'is_favorite': {str(recipe_id): flag for recipe_id, flag in flags.items()}})
+
+def favorites_version(user_id):
+    """Версия избранного пользователя, прочитанная conditional() (0 - записей еще не было)"""
+    versions = g.get('data_versions')
+    if versions is None:
+        return None
+    return versions.get(f'favorites:{user_id}', (0, 0))[0]
 
 # ========== ПОИСК ==========
+def use_fts(conn):
+    """Можно ли искать через FTS5 (индекс создается при первом поиске)"""
+    if not app.config['SEARCH_USE_FTS']:
+        return False
+    ready = app.extensions.setdefault('search_fts', {})
+    database = app.config['DATABASE']
+    if database not in ready:
+        ready[database] = ensure_search_index(conn)
+    return ready[database]
+
 @app.route('/api/recipes/search', methods=['GET'])
+@conditional('recipes')
 def search_recipes():
     query = request.args.get('q', '')
     if not query:
-        return jsonify({'success': True, 'recipes': []})
-    
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    search_term = f"%{query}%"
-    cursor.execute('''
-    SELECT * FROM recipes 
-    WHERE title LIKE ? OR description LIKE ? OR category LIKE ?
-    ORDER BY created_at DESC
-    ''', (search_term, search_term, search_term))
-    
-    recipes = []
-    for row in cursor.fetchall():
-        recipe = dict(row)
-        for field in ['ingredients', 'steps', 'tags']:
-            if recipe[field]:
-                recipe[field] = json.loads(recipe[field])
-            else:
-                recipe[field] = []
-        recipes.append(recipe)
-    
-    conn.close()
-    return jsonify({'success': True, 'recipes': recipes})
+        return jsonify({'success': True, 'recipes': [], 'next_cursor': None})
+    
+    limit, after = page_args()
+    
+    if use_fts(get_db()):
+        match = build_match_query(query)
+        if not match:
+            return jsonify({'success': True, 'recipes': [], 'next_cursor': None})
+        # Сортировка по релевантности BM25 с весами колонок, курсор - (rank, id)
+        sql = f'''
+        SELECT {recipe_columns()}, {FTS_TABLE}.rank AS search_rank FROM {FTS_TABLE}
+        JOIN recipes r ON r.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH ?
+        '''
+        params = [match]
+        if after:
+            sql += f' AND ({FTS_TABLE}.rank, r.id) > (?, ?)'
+            params.extend(after)
+        sql += f' ORDER BY {FTS_TABLE}.rank, r.id'
+        key = lambda row: (row['search_rank'], row['id'])
+    else:
+        search_term = f"%{query}%"
+        sql = f'''
+        SELECT {recipe_columns()} FROM recipes r
+        WHERE (r.title LIKE ? OR r.description LIKE ? OR r.category LIKE ?)
+        '''
+        params = [search_term, search_term, search_term]
+        if after:
+            sql += ' AND (r.created_at, r.id) < (?, ?)'
+            params.extend(after)
+        sql += ' ORDER BY r.created_at DESC, r.id DESC'
+        key = by_created
+    
+    return recipes_page(sql, params, limit, key, hidden=['search_rank'])
 
 # ========== СТАТИСТИКА ==========
+def load_stats(database):
+    """Счетчики из таблицы table_counters (вызывается и из фонового потока)"""
+    ensure_schema(database)
+    conn = sqlite3.connect(database)
+    try:
+        counters = read_counters(conn)
+    finally:
+        conn.close()
+    
+    return {
+        'total_recipes': counters['recipes'],
+        'total_users': counters['users'],
+        'total_categories': counters['categories'],
+        'total_favorites': counters['favorites']
+    }
+
+def get_stats_snapshot():
+    """Закэшированный снимок статистики для текущей базы"""
+    snapshots = app.extensions.setdefault('stats', {})
+    database = app.config['DATABASE']
+    if database not in snapshots:
+        with _init_lock:
+            if database not in snapshots:
+                snapshots[database] = StatsSnapshot(lambda: load_stats(database),
+                                                    ttl=app.config['STATS_TTL'])
+    return snapshots[database]
+
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT COUNT(*) FROM recipes')
-    total_recipes = cursor.fetchone()[0]
-    
-    cursor.execute('SELECT COUNT(*) FROM users')
-    total_users = cursor.fetchone()[0]
-    
-    cursor.execute('SELECT COUNT(*) FROM categories')
-    total_categories = cursor.fetchone()[0]
-    
-    cursor.execute('SELECT COUNT(*) FROM favorites')
-    total_favorites = cursor.fetchone()[0]
-    
-    conn.close()
-    
     return jsonify({
         'success': True,
-        'stats': {
-            'total_recipes': total_recipes,
-            'total_users': total_users,
-            'total_categories': total_categories,
-            'total_favorites': total_favorites
-        }
+        'stats': get_stats_snapshot().get()
     })
 
+@app.route('/api/stats/views', methods=['GET'])
+def get_views_backlog():
+    """Отставание записи счетчика просмотров"""
+    return jsonify({'success': True, 'backlog': get_view_counter().backlog()})
+
 # ========== МОИ РЕЦЕПТЫ ==========
 @app.route('/api/recipes/my', methods=['GET'])
+@conditional('recipes', user=True)
 def get_my_recipes():
     user_id = session.get('user_id')
     if not user_id:
         return jsonify({'success': False, 'error': 'Требуется авторизация'})
     
-    conn = get_db()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT * FROM recipes WHERE author_id = ? ORDER BY created_at DESC', 
-                  (user_id,))
+    limit, after = page_args()
     
-    recipes = []
-    for row in cursor.fetchall():
-        recipe = dict(row)
-        for field in ['ingredients', 'steps', 'tags']:
-            if recipe[field]:
-                recipe[field] = json.loads(recipe[field])
-            else:
-                recipe[field] = []
-        recipes.append(recipe)
+    sql = f'SELECT {recipe_columns()} FROM recipes r WHERE r.author_id = ?'
+    params = [user_id]
+    if after:
+        sql += ' AND (r.created_at, r.id) < (?, ?)'
+        params.extend(after)
+    sql += ' ORDER BY r.created_at DESC, r.id DESC'
     
-    conn.close()
-    return jsonify({'success': True, 'recipes': recipes})
+    return recipes_page(sql, params, limit, by_created)
 
 # ========== АВТОРЫ ==========
 @app.route('/api/authors', methods=['GET'])
+@conditional('recipes', 'users')
 def get_authors():
     conn = get_db()
     cursor = conn.cursor()
     
+    # Число рецептов берется из author_stats, без группировки всей таблицы recipes
     cursor.execute('''
     SELECT u.id, u.name, u.email, u.avatar,
-           COUNT(r.id) as recipes_count
-    FROM users u
-    LEFT JOIN recipes r ON u.id = r.author_id
-    GROUP BY u.id
-    HAVING recipes_count > 0
-    ORDER BY recipes_count DESC
+           s.recipe_count as recipes_count
+    FROM author_stats s
+    JOIN users u ON u.id = s.author_id
+    WHERE s.recipe_count > 0
+    ORDER BY s.recipe_count DESC
     ''')
     
     authors = []
@@ -396,6 +805,5 @@ def get_authors():
         author = dict(row)
         authors.append(author)
     
-    conn.close()
     return jsonify({'success': True, 'authors': authors})
 
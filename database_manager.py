@@ -2,28 +2,83 @@ import sqlite3
 import json
 from datetime import datetime
 
+from json_fragments import fragment_column, render_page
+from pagination import DEFAULT_PAGE_SIZE, decode_cursor, split_page
+from schema_migrations import RECOMPUTE_RATINGS_SQL, migrate
+from search_index import FTS_TABLE, build_match_query, ensure_search_index
+import slow_queries
+from sql_metrics import InstrumentedConnection
+from stats_cache import StatsSnapshot, read_counters
+from view_counter import ViewCounter
+
+RECIPE_COLUMNS = '''
+    SELECT r.*, 
+           c.name as category_name, c.icon as category_icon,
+           u.name as author_name, u.avatar as author_avatar
+'''
+
+# Те же поля, но готовым JSON-фрагментом из recipe_json
+RECIPE_FRAGMENT_COLUMNS = f'''
+    SELECT {fragment_column('r', {
+        'category_name': 'c.name', 'category_icon': 'c.icon',
+        'author_name': 'u.name', 'author_avatar': 'u.avatar',
+    })} as body, r.id, r.created_at
+'''
+
 class DatabaseManager:
     """Менеджер для работы с базой данных кулинарной книги"""
     
-    def __init__(self, db_name='cookbook.db'):
+    def __init__(self, db_name='cookbook.db', use_fts=True, view_flush_interval=5.0,
+                 stats_ttl=30.0, slow_query_log=None):
         self.db_name = db_name
         self.conn = None
+        self.slow_query_log = slow_query_log  # slow_queries.SlowQueryLog или None
+        self.use_fts = use_fts  # False - поиск через LIKE
+        self.fts_enabled = False
+        self.view_counter = ViewCounter(db_name, flush_interval=view_flush_interval)
+        self.stats = StatsSnapshot(self._load_statistics, ttl=stats_ttl)
     
     def connect(self):
         """Подключение к базе данных"""
         try:
-            self.conn = sqlite3.connect(self.db_name)
+            self.conn = self._open()
             self.conn.row_factory = sqlite3.Row  # Для доступа к колонкам по имени
+            migrate(self.conn)  # индексы, агрегаты, поиск и счетчики для старых баз
+            self.fts_enabled = self.use_fts and ensure_search_index(self.conn)
+            self.view_counter.start()
             return True
         except Exception as e:
             print(f"Ошибка подключения к базе данных: {e}")
             return False
     
+    def _open(self):
+        """Новое соединение: с журналом медленных запросов, если он задан
+        
+        Запросы учитываются в sql_metrics внутри sql_metrics.track().
+        """
+        if self.slow_query_log is not None:
+            return slow_queries.connect(self.db_name, self.slow_query_log)
+        return sqlite3.connect(self.db_name, factory=InstrumentedConnection)
+    
     def close(self):
         """Закрытие соединения с базой данных"""
+        self.view_counter.stop()  # дописываем накопленные просмотры
         if self.conn:
             self.conn.close()
     
+    @staticmethod
+    def _recipe_page(rows, limit, key):
+        """Страница рецептов с разобранными JSON-полями и курсором следующей страницы"""
+        rows, next_cursor = split_page(rows, limit, key)
+        recipes = []
+        for row in rows:
+            recipe = dict(row)
+            recipe['tags'] = json.loads(recipe['tags'])
+            recipe['ingredients'] = json.loads(recipe['ingredients'])
+            recipe['steps'] = json.loads(recipe['steps'])
+            recipes.append(recipe)
+        return {'recipes': recipes, 'next_cursor': next_cursor}
+    
     # ===== ПОЛЬЗОВАТЕЛИ =====
     
     def create_user(self, email, password, name, avatar='', role='Кулинарный энтузиаст'):
@@ -152,6 +207,57 @@ class DatabaseManager:
         
         return recipes
     
+    def get_recipes_page(self, limit=DEFAULT_PAGE_SIZE, cursor=None,
+                         category_id=None, author_id=None):
+        """Страница рецептов с курсорной пагинацией по (created_at, id)
+        
+        В отличие от OFFSET, стоимость страницы не зависит от ее номера.
+        Курсор для следующей страницы возвращается в 'next_cursor'.
+        """
+        rows = self._select_recipes_page(RECIPE_COLUMNS, limit, cursor, category_id, author_id)
+        return self._recipe_page(rows, limit, lambda row: (row['created_at'], row['id']))
+    
+    def get_recipes_page_json(self, limit=DEFAULT_PAGE_SIZE, cursor=None,
+                              category_id=None, author_id=None):
+        """То же, что get_recipes_page, но сразу JSON-строкой
+        
+        Ответ склеивается из готовых фрагментов recipe_json, поля рецептов
+        не разбираются и не сериализуются заново.
+        """
+        rows = self._select_recipes_page(RECIPE_FRAGMENT_COLUMNS, limit, cursor,
+                                         category_id, author_id)
+        rows, next_cursor = split_page(rows, limit, lambda row: (row['created_at'], row['id']))
+        return render_page(rows, next_cursor)
+    
+    def _select_recipes_page(self, columns, limit, cursor, category_id, author_id):
+        after = decode_cursor(cursor)
+        query = columns + '''
+            FROM recipes r
+            JOIN categories c ON r.category_id = c.id
+            JOIN users u ON r.author_id = u.id
+            WHERE 1=1
+        '''
+        params = []
+        
+        if category_id:
+            query += ' AND r.category_id = ?'
+            params.append(category_id)
+        
+        if author_id:
+            query += ' AND r.author_id = ?'
+            params.append(author_id)
+        
+        if after:
+            query += ' AND (r.created_at, r.id) < (?, ?)'
+            params.extend(after)
+        
+        query += ' ORDER BY r.created_at DESC, r.id DESC LIMIT ?'
+        params.append(limit + 1)
+        
+        cursor = self.conn.cursor()
+        cursor.execute(query, params)
+        return cursor.fetchall()
+    
     def get_recipe(self, recipe_id):
         """Получение рецепта по ID"""
         cursor = self.conn.cursor()
@@ -173,31 +279,48 @@ class DatabaseManager:
             recipe['ingredients'] = json.loads(recipe['ingredients'])
             recipe['steps'] = json.loads(recipe['steps'])
             
-            # Увеличиваем счетчик просмотров
-            cursor.execute('UPDATE recipes SET views = views + 1 WHERE id = ?', (recipe_id,))
-            self.conn.commit()
+            # Счетчик просмотров пишется в базу пачками в фоне
+            recipe['views'] += self.view_counter.pending(recipe_id)
+            self.view_counter.increment(recipe_id)
             
             return recipe
         return None
     
     def search_recipes(self, search_term, limit=50):
-        """Поиск рецептов"""
+        """Поиск рецептов (полнотекстовый, если доступен FTS5)"""
         cursor = self.conn.cursor()
         
-        query = '''
-            SELECT r.*, 
-                   c.name as category_name, c.icon as category_icon,
-                   u.name as author_name, u.avatar as author_avatar
-            FROM recipes r
-            JOIN categories c ON r.category_id = c.id
-            JOIN users u ON r.author_id = u.id
-            WHERE r.title LIKE ? OR r.description LIKE ?
-            ORDER BY r.created_at DESC
-            LIMIT ?
-        '''
-        
-        search_pattern = f'%{search_term}%'
-        cursor.execute(query, (search_pattern, search_pattern, limit))
+        if self.fts_enabled:
+            match = build_match_query(search_term)
+            if not match:
+                return []
+            query = f'''
+                SELECT r.*, 
+                       c.name as category_name, c.icon as category_icon,
+                       u.name as author_name, u.avatar as author_avatar
+                FROM {FTS_TABLE}
+                JOIN recipes r ON r.id = {FTS_TABLE}.rowid
+                JOIN categories c ON r.category_id = c.id
+                JOIN users u ON r.author_id = u.id
+                WHERE {FTS_TABLE} MATCH ?
+                ORDER BY {FTS_TABLE}.rank
+                LIMIT ?
+            '''
+            cursor.execute(query, (match, limit))
+        else:
+            query = '''
+                SELECT r.*, 
+                       c.name as category_name, c.icon as category_icon,
+                       u.name as author_name, u.avatar as author_avatar
+                FROM recipes r
+                JOIN categories c ON r.category_id = c.id
+                JOIN users u ON r.author_id = u.id
+                WHERE r.title LIKE ? OR r.description LIKE ?
+                ORDER BY r.created_at DESC
+                LIMIT ?
+            '''
+            search_pattern = f'%{search_term}%'
+            cursor.execute(query, (search_pattern, search_pattern, limit))
         
         recipes = []
         for row in cursor.fetchall():
@@ -209,6 +332,51 @@ class DatabaseManager:
         
         return recipes
     
+    def search_recipes_page(self, search_term, limit=DEFAULT_PAGE_SIZE, cursor=None):
+        """Страница результатов поиска с курсорной пагинацией"""
+        after = decode_cursor(cursor)
+        params = []
+        
+        if self.fts_enabled:
+            match = build_match_query(search_term)
+            if not match:
+                return {'recipes': [], 'next_cursor': None}
+            query = RECIPE_COLUMNS + f''', {FTS_TABLE}.rank as search_rank
+                FROM {FTS_TABLE}
+                JOIN recipes r ON r.id = {FTS_TABLE}.rowid
+                JOIN categories c ON r.category_id = c.id
+                JOIN users u ON r.author_id = u.id
+                WHERE {FTS_TABLE} MATCH ?
+            '''
+            params.append(match)
+            if after:
+                query += f' AND ({FTS_TABLE}.rank, r.id) > (?, ?)'
+                params.extend(after)
+            query += f' ORDER BY {FTS_TABLE}.rank, r.id LIMIT ?'
+            key = lambda row: (row['search_rank'], row['id'])
+        else:
+            query = RECIPE_COLUMNS + '''
+                FROM recipes r
+                JOIN categories c ON r.category_id = c.id
+                JOIN users u ON r.author_id = u.id
+                WHERE (r.title LIKE ? OR r.description LIKE ?)
+            '''
+            search_pattern = f'%{search_term}%'
+            params.extend([search_pattern, search_pattern])
+            if after:
+                query += ' AND (r.created_at, r.id) < (?, ?)'
+                params.extend(after)
+            query += ' ORDER BY r.created_at DESC, r.id DESC LIMIT ?'
+            key = lambda row: (row['created_at'], row['id'])
+        
+        params.append(limit + 1)
+        cursor = self.conn.cursor()
+        cursor.execute(query, params)
+        page = self._recipe_page(cursor.fetchall(), limit, key)
+        for recipe in page['recipes']:
+            recipe.pop('search_rank', None)
+        return page
+    
     # ===== ИЗБРАННОЕ =====
     
     def add_to_favorites(self, user_id, recipe_id):
@@ -258,6 +426,35 @@ class DatabaseManager:
         
         return recipes
     
+    def get_favorites_page(self, user_id, limit=DEFAULT_PAGE_SIZE, cursor=None):
+        """Страница избранного с курсором по времени добавления"""
+        after = decode_cursor(cursor)
+        query = '''
+            SELECT r.*, 
+                   c.name as category_name, c.icon as category_icon,
+                   u.name as author_name,
+                   f.created_at as favorited_at, f.id as favorite_id
+            FROM recipes r
+            JOIN favorites f ON r.id = f.recipe_id
+            JOIN categories c ON r.category_id = c.id
+            JOIN users u ON r.author_id = u.id
+            WHERE f.user_id = ?
+        '''
+        params = [user_id]
+        if after:
+            query += ' AND (f.created_at, f.id) < (?, ?)'
+            params.extend(after)
+        query += ' ORDER BY f.created_at DESC, f.id DESC LIMIT ?'
+        params.append(limit + 1)
+        
+        cursor = self.conn.cursor()
+        cursor.execute(query, params)
+        page = self._recipe_page(cursor.fetchall(), limit,
+                                 lambda row: (row['favorited_at'], row['favorite_id']))
+        for recipe in page['recipes']:
+            del recipe['favorite_id']
+        return page
+    
     def is_favorite(self, user_id, recipe_id):
         """Проверка, находится ли рецепт в избранном"""
         cursor = self.conn.cursor()
@@ -268,34 +465,80 @@ class DatabaseManager:
     # ===== ОЦЕНКИ =====
     
     def add_rating(self, user_id, recipe_id, value, comment=''):
-        """Добавление оценки рецепту"""
+        """Добавление оценки рецепту
+        
+        Сумма и количество оценок рецепта обновляются на разницу между новой
+        и прежней оценкой пользователя, без пересчета по всей таблице ratings.
+        Прежняя оценка читается уже под блокировкой записи (BEGIN IMMEDIATE),
+        иначе параллельная переоценка могла бы применить устаревшую разницу.
+        """
         try:
-            cursor = self.conn.cursor()
-            
-            # Обновляем или добавляем оценку
-            cursor.execute('''
-                INSERT OR REPLACE INTO ratings (user_id, recipe_id, value, comment)
-                VALUES (?, ?, ?, ?)
-            ''', (user_id, recipe_id, value, comment))
-            
-            # Обновляем средний рейтинг рецепта
-            cursor.execute('''
-                UPDATE recipes 
-                SET average_rating = (
-                    SELECT AVG(value) FROM ratings WHERE recipe_id = ?
-                ),
-                rating_count = (
-                    SELECT COUNT(*) FROM ratings WHERE recipe_id = ?
-                )
-                WHERE id = ?
-            ''', (recipe_id, recipe_id, recipe_id))
-            
-            self.conn.commit()
+            with self.conn:
+                cursor = self.conn.cursor()
+                cursor.execute('BEGIN IMMEDIATE')
+                
+                cursor.execute('SELECT value FROM ratings WHERE user_id = ? AND recipe_id = ?',
+                              (user_id, recipe_id))
+                previous = cursor.fetchone()
+                
+                # Обновляем или добавляем оценку
+                cursor.execute('''
+                    INSERT INTO ratings (user_id, recipe_id, value, comment)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (user_id, recipe_id) DO UPDATE SET
+                        value = excluded.value,
+                        comment = excluded.comment,
+                        created_at = CURRENT_TIMESTAMP
+                ''', (user_id, recipe_id, value, comment))
+                
+                sum_delta = value - (previous['value'] if previous else 0)
+                count_delta = 0 if previous else 1
+                cursor.execute('''
+                    UPDATE recipes 
+                    SET rating_sum = rating_sum + ?,
+                        rating_count = rating_count + ?,
+                        average_rating = CAST(rating_sum + ? AS REAL) / (rating_count + ?)
+                    WHERE id = ?
+                ''', (sum_delta, count_delta, sum_delta, count_delta, recipe_id))
             return True
         except Exception as e:
             print(f"Ошибка при добавлении оценки: {e}")
             return False
     
+    def add_ratings_bulk(self, ratings):
+        """Загрузка множества оценок одной транзакцией
+        
+        ratings - последовательность кортежей (user_id, recipe_id, value[, comment]).
+        Агрегаты каждого затронутого рецепта пересчитываются один раз в конце.
+        Возвращает число загруженных оценок или 0 при ошибке (ничего не сохраняется).
+        """
+        rows = []
+        recipe_ids = set()
+        for rating in ratings:
+            user_id, recipe_id, value = rating[:3]
+            comment = rating[3] if len(rating) > 3 else ''
+            rows.append((user_id, recipe_id, value, comment))
+            recipe_ids.add(recipe_id)
+        
+        if not rows:
+            return 0
+        
+        try:
+            with self.conn:
+                self.conn.executemany('''
+                    INSERT INTO ratings (user_id, recipe_id, value, comment)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (user_id, recipe_id) DO UPDATE SET
+                        value = excluded.value,
+                        comment = excluded.comment,
+                        created_at = CURRENT_TIMESTAMP
+                ''', rows)
+                self.conn.execute(RECOMPUTE_RATINGS_SQL, (json.dumps(sorted(recipe_ids)),))
+            return len(rows)
+        except Exception as e:
+            print(f"Ошибка при загрузке оценок: {e}")
+            return 0
+    
     def get_recipe_ratings(self, recipe_id):
         """Получение всех оценок рецепта"""
         cursor = self.conn.cursor()
@@ -312,22 +555,32 @@ class DatabaseManager:
     # ===== СТАТИСТИКА =====
     
     def get_statistics(self):
-        """Получение статистики по базе данных"""
-        cursor = self.conn.cursor()
-        
-        stats = {}
+        """Получение статистики по базе данных
         
-        # Количество пользователей
-        cursor.execute('SELECT COUNT(*) FROM users')
-        stats['users_count'] = cursor.fetchone()[0]
+        Снимок кэшируется на stats_ttl секунд и обновляется в фоне.
+        """
+        return self.stats.get()
+    
+    def _load_statistics(self):
+        """Построение снимка статистики по счетчикам
         
-        # Количество рецептов
-        cursor.execute('SELECT COUNT(*) FROM recipes')
-        stats['recipes_count'] = cursor.fetchone()[0]
+        Открывает отдельное соединение, так как может вызываться из фонового потока.
+        """
+        conn = self._open()
+        try:
+            return self._read_statistics(conn)
+        finally:
+            conn.close()
+    
+    def _read_statistics(self, conn):
+        cursor = conn.cursor()
+        counters = read_counters(conn)
         
-        # Количество категорий
-        cursor.execute('SELECT COUNT(*) FROM categories')
-        stats['categories_count'] = cursor.fetchone()[0]
+        stats = {
+            'users_count': counters['users'],
+            'recipes_count': counters['recipes'],
+            'categories_count': counters['categories'],
+        }
         
         # Самый популярный рецепт
         cursor.execute('SELECT title, views FROM recipes ORDER BY views DESC LIMIT 1')
@@ -335,13 +588,12 @@ class DatabaseManager:
         if row:
             stats['most_viewed_recipe'] = {'title': row[0], 'views': row[1]}
         
-        # Самый активный автор
+        # Самый активный автор - по счетчикам author_stats
         cursor.execute('''
-            SELECT u.name, COUNT(r.id) as recipe_count
-            FROM users u
-            LEFT JOIN recipes r ON u.id = r.author_id
-            GROUP BY u.id
-            ORDER BY recipe_count DESC
+            SELECT u.name, a.recipe_count
+            FROM author_stats a
+            JOIN users u ON u.id = a.author_id
+            ORDER BY a.recipe_count DESC
             LIMIT 1
         ''')
         row = cursor.fetchone()
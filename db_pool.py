@@ -0,0 +1,116 @@
+import queue
+import sqlite3
+import threading
+
+# Настройки, которые применяются к каждому новому соединению пула
+DEFAULT_PRAGMAS = (
+    ('journal_mode', 'WAL'),          # читатели не блокируют писателя
+    ('synchronous', 'NORMAL'),        # в режиме WAL это безопасно и намного быстрее FULL
+    ('cache_size', -16000),           # ~16 МБ кэша страниц на соединение
+    ('mmap_size', 128 * 1024 * 1024), # чтение файла базы через mmap
+    ('temp_store', 'MEMORY'),
+)
+
+
+class PoolTimeoutError(Exception):
+    """Не удалось получить соединение из пула за отведенное время"""
+
+
+class ConnectionPool:
+    """Пул долгоживущих соединений SQLite с заранее выполненной настройкой
+
+    Соединения создаются лениво, но не больше size штук. Выданное соединение
+    принадлежит одному потоку до возврата в пул через release().
+    """
+
+    def __init__(self, db_name, size=8, timeout=5.0, pragmas=DEFAULT_PRAGMAS,
+                 factory=sqlite3.Connection):
+        self.db_name = db_name
+        self.size = size
+        self.timeout = timeout
+        self.pragmas = pragmas
+        self.factory = factory  # класс соединения, например sql_metrics.InstrumentedConnection
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._closed = False
+
+    def _connect(self):
+        """Открытие и настройка нового соединения"""
+        conn = sqlite3.connect(self.db_name, timeout=self.timeout,
+                               check_same_thread=False, factory=self.factory)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas:
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+
+    def acquire(self):
+        """Получение соединения из пула"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+
+        if can_create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise PoolTimeoutError(
+                f'Все {self.size} соединений с {self.db_name} заняты'
+            ) from None
+
+    def release(self, conn):
+        """Возврат соединения в пул (в закрытый пул - закрытие соединения)"""
+        if self._closed:
+            self._discard(conn)
+            return
+        try:
+            # Незавершенная транзакция не должна достаться следующему запросу
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self._discard(conn)
+            return
+        self._idle.put(conn)
+
+    def _discard(self, conn):
+        """Закрытие испорченного соединения"""
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._created -= 1
+
+    def close_all(self):
+        """Закрытие всех свободных соединений
+
+        Соединения, выданные до вызова, закрываются при возврате.
+        """
+        self._closed = True
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(conn)
+
+    def stats(self):
+        """Текущее состояние пула"""
+        return {
+            'size': self.size,
+            'created': self._created,
+            'idle': self._idle.qsize(),
+        }
@@ -0,0 +1,85 @@
+"""Готовые JSON-представления рецептов (таблица recipe_json)
+
+Для каждого рецепта хранится его JSON в том виде, в каком его отдает API:
+все колонки recipes, а ingredients, steps и tags - вложенными массивами.
+Фрагменты перестраиваются триггерами при каждой записи в recipes, поэтому
+списки рецептов собираются склейкой строк, без json.loads и повторной
+сериализации каждого рецепта.
+"""
+import json
+
+FRAGMENTS_TABLE = 'recipe_json'
+JSON_FIELDS = ('ingredients', 'steps', 'tags')
+
+
+def _fragment_expression(columns, ref):
+    """json_object(...) из колонок строки ref (new или псевдоним таблицы)"""
+    parts = []
+    for column in columns:
+        value = f'{ref}.{column}'
+        if column in JSON_FIELDS:
+            # Пустое или некорректное значение отдается пустым списком
+            value = f"json(CASE WHEN json_valid({value}) THEN {value} ELSE '[]' END)"
+        parts.append(f"'{column}', {value}")
+    return f'json_object({", ".join(parts)})'
+
+
+def rebuild_json_fragments(conn):
+    """Создание recipe_json, триггеров и заполнение фрагментов всех рецептов
+
+    Состав фрагмента берется из текущих колонок recipes, поэтому после
+    добавления колонки в recipes функцию нужно вызвать повторно (отдельной
+    миграцией).
+    """
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(recipes)')]
+    if not columns:
+        return
+    with conn:
+        conn.execute(f'''
+            CREATE TABLE IF NOT EXISTS {FRAGMENTS_TABLE} (
+                recipe_id INTEGER PRIMARY KEY,
+                body TEXT NOT NULL
+            )
+        ''')
+        for trigger in ('recipe_json_ai', 'recipe_json_au', 'recipe_json_ad'):
+            conn.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+
+        upsert = f'''
+            INSERT OR REPLACE INTO {FRAGMENTS_TABLE} (recipe_id, body)
+            VALUES (new.id, {_fragment_expression(columns, 'new')});
+        '''
+        conn.execute(f'CREATE TRIGGER recipe_json_ai AFTER INSERT ON recipes BEGIN {upsert} END')
+        conn.execute(f'CREATE TRIGGER recipe_json_au AFTER UPDATE ON recipes BEGIN {upsert} END')
+        conn.execute(f'''
+            CREATE TRIGGER recipe_json_ad AFTER DELETE ON recipes BEGIN
+                DELETE FROM {FRAGMENTS_TABLE} WHERE recipe_id = old.id;
+            END
+        ''')
+
+        conn.execute(f'DELETE FROM {FRAGMENTS_TABLE}')
+        conn.execute(f'''
+            INSERT INTO {FRAGMENTS_TABLE} (recipe_id, body)
+            SELECT r.id, {_fragment_expression(columns, 'r')} FROM recipes r
+        ''')
+
+
+def fragment_column(alias='r', extra=None):
+    """SQL-выражение с JSON рецепта {alias}.id
+
+    extra - поля, которые добавляются поверх фрагмента: {'ключ': 'SQL-выражение'}.
+    """
+    body = f'(SELECT body FROM {FRAGMENTS_TABLE} WHERE recipe_id = {alias}.id)'
+    if extra:
+        fields = ', '.join(f"'$.{key}', {value}" for key, value in extra.items())
+        body = f'json_set({body}, {fields})'
+    return body
+
+
+def render_page(rows, next_cursor, **fields):
+    """JSON страницы {**fields, "recipes": [...], "next_cursor": ...}
+
+    Рецепты берутся из колонки body строк и вставляются в ответ как есть.
+    """
+    head = ''.join(f'{json.dumps(key)}:{json.dumps(value)},' for key, value in fields.items())
+    return ('{' + head + '"recipes":[' + ','.join(row['body'] for row in rows)
+            + '],"next_cursor":' + json.dumps(next_cursor) + '}')
@@ -0,0 +1,52 @@
+import base64
+import binascii
+import json
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+class InvalidCursorError(ValueError):
+    """Курсор поврежден или сформирован не сервером"""
+
+
+def encode_cursor(values):
+    """Непрозрачный токен из значений ключа сортировки последней строки страницы"""
+    raw = json.dumps(list(values), ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).rstrip(b'=').decode('ascii')
+
+
+def decode_cursor(token, size=2):
+    """Значения ключа сортировки из токена; None, если токен не передан"""
+    if not token:
+        return None
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, UnicodeError, binascii.Error):
+        raise InvalidCursorError(token) from None
+    if (not isinstance(values, list) or len(values) != size
+            or not all(isinstance(v, (str, int, float)) for v in values)):
+        raise InvalidCursorError(token)
+    return tuple(values)
+
+
+def page_size(value, default=DEFAULT_PAGE_SIZE):
+    """Размер страницы из параметра запроса, ограниченный MAX_PAGE_SIZE"""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, MAX_PAGE_SIZE))
+
+
+def split_page(rows, limit, key):
+    """Отделение лишней строки, запрошенной через LIMIT limit + 1
+
+    Возвращает строки страницы и курсор следующей страницы (или None,
+    если страница последняя).
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(key(rows[-1]))
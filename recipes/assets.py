@@ -0,0 +1,61 @@
+"""Статические файлы с хэшем в имени, заранее сжатые gzip/brotli
+
+collectstatic с CompressedManifestStaticFilesStorage копирует файлы в
+STATIC_ROOT под именами вида home.3f2a9c01b7.css и рядом пишет .gz
+(и .br, если установлен brotli). Шаблоны получают эти имена через {% static %}.
+Пока collectstatic не запускался (разработка, тесты), отдаются исходные имена.
+"""
+import mimetypes
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.http import FileResponse, Http404
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+
+from asset_pipeline import IMMUTABLE_CACHE_CONTROL, negotiate, precompress
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+
+    def post_process(self, paths, dry_run=False, **options):
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            if not dry_run and isinstance(hashed_name, str):
+                precompress(self.path(hashed_name))
+            yield name, hashed_name, processed
+
+    def stored_name(self, name):
+        try:
+            return super().stored_name(name)
+        except ValueError:
+            # Нет манифеста или записи в нем - collectstatic еще не запускался
+            return name
+
+
+def serve(request, path):
+    """Файл из STATIC_ROOT для запуска без отдельного веб-сервера
+
+    Файлы с хэшем в имени (значения манифеста) кэшируются клиентом навсегда.
+    """
+    try:
+        full_path = safe_join(settings.STATIC_ROOT, path)
+    except ValueError:
+        raise Http404(path)
+    if not os.path.isfile(full_path):
+        raise Http404(path)
+
+    served, encoding = negotiate(full_path, request.headers.get('Accept-Encoding'))
+    content_type = mimetypes.guess_type(full_path)[0] or 'application/octet-stream'
+    response = FileResponse(open(served, 'rb'), content_type=content_type,
+                            filename=os.path.basename(full_path))
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    patch_vary_headers(response, ['Accept-Encoding'])
+
+    hashed = getattr(staticfiles_storage, 'hashed_files', {})
+    if path in hashed.values():
+        response.headers['Cache-Control'] = IMMUTABLE_CACHE_CONTROL
+    else:
+        patch_cache_control(response, no_cache=True)
+    return response
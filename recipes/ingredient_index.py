@@ -0,0 +1,218 @@
+"""Инвертированный индекс ингредиентов для поиска «что приготовить из того, что есть»
+
+Для каждого нормализованного ингредиента хранится отсортированный массив id
+рецептов, в которых он встречается. Поиск проходит только по спискам
+ингредиентов из запроса, а не по всему каталогу.
+
+Индекс живет в памяти процесса, поэтому перед поиском сверяется с общей
+версией каталога (DataVersion с именем INDEX_VERSION): ее поднимает любая
+запись состава, в том числе импорт в отдельном процессе.
+"""
+import heapq
+import re
+import threading
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+
+# Окончания, которые отбрасываются при нормализации: «помидоры» и «помидор»
+# должны давать один и тот же ключ
+ENDINGS = sorted([
+    'ами', 'ями', 'ого', 'его', 'ой', 'ей', 'ый', 'ий', 'ая', 'яя', 'ое', 'ее',
+    'ые', 'ие', 'ов', 'ев', 'ы', 'и', 'а', 'я', 'у', 'ю', 'ь',
+], key=len, reverse=True)
+MIN_STEM_LENGTH = 3
+INDEX_VERSION = 'ingredient-index'
+
+
+def _stem(word):
+    for ending in ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM_LENGTH:
+            return word[:-len(ending)]
+    return word
+
+
+def normalize(name):
+    """Ключ ингредиента: «Лук репчатый (крупный)» -> «лук репчат»"""
+    name = re.sub(r'\(.*?\)', ' ', name.lower().replace('ё', 'е'))
+    return ' '.join(_stem(word) for word in re.findall(r'[^\W\d_]+', name))
+
+
+class IngredientIndex:
+    """Индекс «ингредиент -> рецепты» с инкрементальным обновлением
+
+    Заполняется лениво при первом поиске через loader, который возвращает
+    пары (id рецепта, название ингредиента). Дальше поддерживается
+    вызовами update_recipe() и remove_recipe().
+
+    version - функция, возвращающая текущую общую версию данных; если она
+    задана, поиск перезагружает индекс, когда версия отличается от той,
+    с которой он был загружен.
+    """
+
+    def __init__(self, loader=None, version=None):
+        self.loader = loader
+        self.version = version
+        self._lock = threading.RLock()
+        self.clear()
+
+    def clear(self):
+        """Сброс индекса; следующий поиск загрузит его заново"""
+        with self._lock:
+            self._postings = {}      # ключ -> array('q') отсортированных id рецептов
+            self._recipe_keys = {}   # id рецепта -> кортеж ключей его ингредиентов
+            self._names = {}         # ключ -> название для ответа
+            self._words = {}         # слово -> множество ключей, где оно встречается
+            self._loaded = False
+            self._version = None     # общая версия, с которой загружен индекс
+
+    def _ensure_loaded(self):
+        if self.loader is None:
+            return
+        if self.version is not None:
+            # Версия читается до данных: изменение между ними даст лишнюю
+            # перезагрузку, но не устаревший индекс
+            current = self.version()
+            if self._loaded and current == self._version:
+                return
+            self.clear()
+            self._version = current
+        elif self._loaded:
+            return
+        recipes = {}
+        for recipe_id, name in self.loader():
+            recipes.setdefault(recipe_id, []).append(name)
+        for recipe_id, names in recipes.items():
+            self._add(recipe_id, names)
+        self._loaded = True
+
+    def _add(self, recipe_id, names):
+        keys = []
+        for name in names:
+            key = normalize(name)
+            if not key or key in keys:
+                continue
+            keys.append(key)
+            self._names.setdefault(key, name)
+            postings = self._postings.setdefault(key, array('q'))
+            position = bisect_left(postings, recipe_id)
+            if position == len(postings) or postings[position] != recipe_id:
+                insort(postings, recipe_id)
+            for word in key.split():
+                self._words.setdefault(word, set()).add(key)
+        if keys:
+            self._recipe_keys[recipe_id] = tuple(keys)
+
+    def _remove(self, recipe_id):
+        for key in self._recipe_keys.pop(recipe_id, ()):
+            postings = self._postings[key]
+            position = bisect_left(postings, recipe_id)
+            if position < len(postings) and postings[position] == recipe_id:
+                del postings[position]
+            if not postings:
+                del self._postings[key]
+                del self._names[key]
+                for word in key.split():
+                    self._words[word].discard(key)
+                    if not self._words[word]:
+                        del self._words[word]
+
+    def _advance(self, version):
+        """Принять версию, выставленную своей же записью
+
+        Индекс остается актуальным, только если между загрузкой и этой
+        записью версию не поднимал никто другой; иначе поиск его перезагрузит.
+        """
+        if version is not None and self._version in (version - 1, version):
+            self._version = version
+
+    def update_recipe(self, recipe_id, names, version=None):
+        """Замена ингредиентов рецепта в индексе
+
+        version - общая версия, которую выставила эта запись.
+        """
+        with self._lock:
+            if not self._loaded:
+                return  # будет учтено при полной загрузке
+            self._remove(recipe_id)
+            self._add(recipe_id, names)
+            self._advance(version)
+
+    def remove_recipe(self, recipe_id, version=None):
+        """Удаление рецепта из индекса"""
+        with self._lock:
+            if self._loaded:
+                self._remove(recipe_id)
+                self._advance(version)
+
+    def _matching_keys(self, pantry):
+        """Ключи рецептурных ингредиентов, закрываемых продуктами пользователя
+
+        Продукт «лук» закрывает и «лук», и «лук репчатый»: подходят все ключи,
+        содержащие каждое слово продукта.
+        """
+        matched = set()
+        for item in pantry:
+            words = normalize(item).split()
+            if not words:
+                continue
+            keys = None
+            for word in words:
+                candidates = self._words.get(word, set())
+                keys = set(candidates) if keys is None else keys & candidates
+                if not keys:
+                    break
+            matched |= keys or set()
+        return matched
+
+    def search(self, pantry, limit=10):
+        """Лучшие рецепты по доле ингредиентов, которые уже есть у пользователя
+
+        Возвращает список словарей recipe_id, match_percentage, matched,
+        missing, упорядоченный по убыванию покрытия.
+        """
+        with self._lock:
+            self._ensure_loaded()
+            matched_keys = self._matching_keys(pantry)
+
+            hits = Counter()
+            for key in matched_keys:
+                hits.update(self._postings[key])
+
+            def score(item):
+                recipe_id, count = item
+                return count / len(self._recipe_keys[recipe_id]), count, -recipe_id
+
+            results = []
+            for recipe_id, count in heapq.nlargest(limit, hits.items(), key=score):
+                keys = self._recipe_keys[recipe_id]
+                results.append({
+                    'recipe_id': recipe_id,
+                    'match_percentage': round(count / len(keys) * 100),
+                    'matched': [self._names[key] for key in keys if key in matched_keys],
+                    'missing': [self._names[key] for key in keys if key not in matched_keys],
+                })
+            return results
+
+    def stats(self):
+        """Размер индекса"""
+        with self._lock:
+            return {
+                'loaded': self._loaded,
+                'version': self._version,
+                'recipes': len(self._recipe_keys),
+                'ingredients': len(self._postings),
+            }
+
+
+def _load_from_db():
+    from .models import RecipeIngredient
+    return RecipeIngredient.objects.values_list('recipe_id', 'ingredient__name').iterator()
+
+
+def _version_from_db():
+    from .models import DataVersion
+    return DataVersion.objects.current(INDEX_VERSION).version
+
+
+ingredient_index = IngredientIndex(loader=_load_from_db, version=_version_from_db)
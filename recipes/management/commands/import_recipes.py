@@ -0,0 +1,238 @@
+import csv
+import json
+import os
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from recipes import page_cache
+from recipes.ingredient_index import INDEX_VERSION
+from recipes.models import DataVersion, Ingredient, Recipe, RecipeIngredient
+
+CATEGORIES = {value for value, label in Recipe.CATEGORY_CHOICES}
+DIFFICULTIES = {value for value, label in Recipe.DIFFICULTY_CHOICES}
+
+
+def read_jsonl(file):
+    for number, line in enumerate(file, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield number, json.loads(line)
+        except ValueError as e:
+            yield number, ValueError(f'некорректный JSON: {e}')
+
+
+def read_csv(file):
+    # Номер строки данных, заголовок не считается
+    for number, row in enumerate(csv.DictReader(file), 1):
+        yield number, row
+
+
+def parse_ingredients(value):
+    """Состав рецепта: список [{name, quantity, unit, note}]
+
+    Принимает список словарей или пар [название, количество], JSON-строку
+    с таким списком или строку CSV вида «Картофель:300; Лук:100».
+    """
+    if not value:
+        return []
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            value = [item.split(':', 1) for item in value.split(';') if item.strip()]
+
+    ingredients = []
+    for item in value:
+        if isinstance(item, dict):
+            name, quantity = item.get('name'), item.get('quantity')
+            unit, note = item.get('unit') or 'г', item.get('note') or ''
+        else:
+            name, quantity = (list(item) + [None])[:2]
+            unit, note = 'г', ''
+        name = (name or '').strip()
+        if not name:
+            raise ValueError('ингредиент без названия')
+        ingredients.append({'name': name, 'quantity': float(quantity or 0),
+                            'unit': unit, 'note': note})
+    return ingredients
+
+
+def parse_recipe(data):
+    """Проверка и приведение строки входного файла; ValueError - строка пропускается"""
+    if isinstance(data, Exception):
+        raise data
+    if not isinstance(data, dict):
+        raise ValueError('ожидался объект рецепта')
+    title = (data.get('title') or '').strip()
+    if not title:
+        raise ValueError('нет названия')
+    if len(title) > Recipe._meta.get_field('title').max_length:
+        raise ValueError('слишком длинное название')
+
+    category = data.get('category') or 'Основные блюда'
+    if category not in CATEGORIES:
+        raise ValueError(f'неизвестная категория «{category}»')
+    cooking_time = int(data.get('cooking_time') or 0)
+    difficulty = int(data.get('difficulty') or 2)
+    servings = int(data.get('servings') or 4)
+    if cooking_time < 0 or servings < 1 or difficulty not in DIFFICULTIES:
+        raise ValueError('некорректное время, сложность или число порций')
+
+    return {
+        'recipe': Recipe(
+            title=title,
+            description=data.get('description') or '',
+            category=category,
+            cooking_time=cooking_time,
+            difficulty=difficulty,
+            servings=servings,
+            instructions=data.get('instructions') or '',
+        ),
+        'ingredients': parse_ingredients(data.get('ingredients')),
+    }
+
+
+def publish_batch():
+    """Сброс индекса ингредиентов и списков рецептов во всех процессах сервера"""
+    DataVersion.objects.bump(INDEX_VERSION)
+    page_cache.invalidate(page_cache.LIST_GROUP)
+
+
+class Command(BaseCommand):
+    help = 'Импорт каталога рецептов из JSONL или CSV пакетами с возобновлением после сбоя'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='файл .jsonl или .csv')
+        parser.add_argument('--format', choices=['jsonl', 'csv'],
+                            help='формат файла (по умолчанию - по расширению)')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='рецептов в одной транзакции')
+        parser.add_argument('--checkpoint',
+                            help='файл контрольной точки (по умолчанию <path>.checkpoint)')
+        parser.add_argument('--restart', action='store_true',
+                            help='начать сначала, игнорируя контрольную точку')
+
+    def handle(self, *args, **options):
+        path = options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'Файл не найден: {path}')
+        file_format = options['format'] or ('csv' if path.lower().endswith('.csv') else 'jsonl')
+        batch_size = max(1, options['batch_size'])
+        self.checkpoint_path = options['checkpoint'] or f'{path}.checkpoint'
+
+        checkpoint = {} if options['restart'] else self.read_checkpoint()
+        start_after = checkpoint.pop('line', 0)
+        if start_after:
+            self.stdout.write(f'Продолжение после строки {start_after}')
+
+        self.ingredients = {}  # название -> id, пополняется по мере импорта
+        self.totals = {'read': 0, 'imported': 0, 'duplicates': 0, 'errors': 0}
+        self.totals.update((key, checkpoint[key]) for key in self.totals if key in checkpoint)
+        read_before = self.totals['read']
+        started = time.perf_counter()
+
+        with open(path, encoding='utf-8', newline='') as file:
+            reader = read_csv(file) if file_format == 'csv' else read_jsonl(file)
+            rows = ((number, data) for number, data in reader if number > start_after)
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+                self.import_batch(batch)
+                self.write_checkpoint(batch[-1][0])
+
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'Строк: {self.totals["read"]}, импортировано: {self.totals["imported"]}, '
+                    f'дубли: {self.totals["duplicates"]}, ошибки: {self.totals["errors"]}, '
+                    f'{(self.totals["read"] - read_before) / elapsed:.0f} строк/с'
+                )
+
+        if os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Импорт завершен: {self.totals["imported"]} рецептов за '
+            f'{time.perf_counter() - started:.1f} с'
+        ))
+
+    def import_batch(self, batch):
+        """Проверка, отсев дублей и запись одного пакета в одной транзакции"""
+        parsed = []
+        for number, data in batch:
+            self.totals['read'] += 1
+            try:
+                parsed.append(parse_recipe(data))
+            except (TypeError, ValueError) as e:
+                self.totals['errors'] += 1
+                self.stderr.write(f'Строка {number}: {e}')
+
+        # Дубли по названию - одним запросом на пакет и внутри самого пакета
+        titles = {item['recipe'].title for item in parsed}
+        seen = set(Recipe.objects.filter(title__in=titles).values_list('title', flat=True))
+        unique = []
+        for item in parsed:
+            if item['recipe'].title in seen:
+                self.totals['duplicates'] += 1
+                continue
+            seen.add(item['recipe'].title)
+            unique.append(item)
+        if not unique:
+            return
+
+        with transaction.atomic():
+            # bulk_create не отправляет сигналы, а команда работает в своем процессе:
+            # версии в базе поднимаются после коммита каждого пакета, и сервер
+            # перечитает индекс ингредиентов и списки рецептов, даже если
+            # импорт потом прервется
+            transaction.on_commit(publish_batch)
+            self.resolve_ingredients(unique)
+            recipes = Recipe.objects.bulk_create([item['recipe'] for item in unique])
+            RecipeIngredient.objects.bulk_create([
+                RecipeIngredient(recipe_id=recipe.id, ingredient_id=self.ingredients[row['name']],
+                                 quantity=row['quantity'], note=row['note'])
+                for recipe, item in zip(recipes, unique)
+                for row in item['ingredients']
+            ])
+        self.totals['imported'] += len(unique)
+
+    def resolve_ingredients(self, items):
+        """id ингредиентов пакета: известные - из кэша, остальные - одним
+        запросом, недостающие создаются одним bulk_create"""
+        units = {}
+        for item in items:
+            for row in item['ingredients']:
+                if row['name'] not in self.ingredients:
+                    units.setdefault(row['name'], row['unit'])
+        if not units:
+            return
+
+        self.ingredients.update(
+            Ingredient.objects.filter(name__in=units).values_list('name', 'id')
+        )
+        created = Ingredient.objects.bulk_create([
+            Ingredient(name=name, unit=unit)
+            for name, unit in units.items() if name not in self.ingredients
+        ])
+        self.ingredients.update((ingredient.name, ingredient.id) for ingredient in created)
+
+    def read_checkpoint(self):
+        """Номер последней записанной строки и счетчики; {} - начать сначала"""
+        try:
+            with open(self.checkpoint_path, encoding='utf-8') as file:
+                checkpoint = json.load(file)
+        except (OSError, ValueError):
+            return {}
+        return checkpoint if isinstance(checkpoint, dict) else {}
+
+    def write_checkpoint(self, line):
+        # Сначала во временный файл: при сбое во время записи старая точка сохранится
+        tmp_path = f'{self.checkpoint_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({'line': line, **self.totals}, file)
+        os.replace(tmp_path, self.checkpoint_path)
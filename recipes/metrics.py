@@ -0,0 +1,69 @@
+"""Учет SQL и времени обработки запросов Django в sql_metrics
+
+MetricsMiddleware открывает учет запроса и подключает к соединению
+connection.execute_wrapper: каждый запрос ORM добавляет к счетчикам
+время выполнения, а прочитанные курсором строки - к числу строк.
+Маршрут в метриках - имя URL (recipe-list, recipe_detail, ...).
+"""
+from functools import partial
+from time import perf_counter
+
+from django.db import connection
+
+import sql_metrics
+
+
+class MetricsMiddleware:
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = sql_metrics.begin()
+        started = perf_counter()
+        status = 500
+        try:
+            with connection.execute_wrapper(record_query):
+                response = self.get_response(request)
+            status = response.status_code
+            return response
+        finally:
+            sql_metrics.end()
+            match = request.resolver_match
+            route = match.view_name if match else 'unmatched'
+            sql_metrics.REGISTRY.observe(route, request.method, status,
+                                         perf_counter() - started, stats)
+
+
+def record_query(execute, sql, params, many, context):
+    stats = sql_metrics.current()
+    if stats is None:
+        return execute(sql, params, many, context)
+    cursor = context['cursor']
+    if 'fetchmany' not in vars(cursor):
+        count_rows(cursor, stats)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.sql_seconds += perf_counter() - started
+
+
+def count_rows(cursor, stats):
+    """Подмена fetch* у CursorWrapper: ORM читает результаты только через них
+
+    SQLite выполняет запрос по мере чтения, поэтому чтение - тоже время SQL.
+    """
+    def fetch(method, *args):
+        started = perf_counter()
+        rows = getattr(cursor.cursor, method)(*args)
+        stats.sql_seconds += perf_counter() - started
+        if method == 'fetchone':
+            stats.rows += rows is not None
+        else:
+            stats.rows += len(rows)
+        return rows
+
+    for method in ('fetchone', 'fetchmany', 'fetchall'):
+        setattr(cursor, method, cursor.db.wrap_database_errors(partial(fetch, method)))
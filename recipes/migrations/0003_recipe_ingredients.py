@@ -0,0 +1,65 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0002_recipe_category'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Ingredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Название')),
+                ('unit', models.CharField(default='г', max_length=20, verbose_name='Единица измерения')),
+                ('category', models.CharField(choices=[('vegetables', 'Овощи'), ('fruits', 'Фрукты'), ('meat', 'Мясо'), ('dairy', 'Молочные продукты'), ('groceries', 'Бакалея'), ('spices', 'Специи'), ('other', 'Другое')], default='other', max_length=20, verbose_name='Категория')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Создан'),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='difficulty',
+            field=models.PositiveSmallIntegerField(choices=[(1, 'Очень легко'), (2, 'Легко'), (3, 'Средне'), (4, 'Сложно'), (5, 'Очень сложно')], default=2, verbose_name='Сложность'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to='recipes/', verbose_name='Изображение'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='instructions',
+            field=models.TextField(blank=True, default='', verbose_name='Инструкции'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='servings',
+            field=models.PositiveIntegerField(default=4, verbose_name='Порций'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, verbose_name='Обновлен'),
+        ),
+        migrations.CreateModel(
+            name='RecipeIngredient',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('quantity', models.FloatField(verbose_name='Количество')),
+                ('note', models.CharField(blank=True, default='', max_length=200, verbose_name='Примечание')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipes', to='recipes.ingredient', verbose_name='Ингредиент')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='ingredients', to='recipes.recipe', verbose_name='Рецепт')),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-18 19:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0003_recipe_ingredients'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='title',
+            field=models.CharField(db_index=True, max_length=200, verbose_name='Название'),
+        ),
+    ]
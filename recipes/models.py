@@ -1,4 +1,17 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
+
+class RecipeQuerySet(models.QuerySet):
+    def with_ingredients(self):
+        """Рецепты вместе с ингредиентами
+        
+        Строки состава и сами ингредиенты загружаются одним дополнительным
+        запросом на всю выборку, а не по запросу на каждый рецепт и строку.
+        """
+        return self.prefetch_related(models.Prefetch(
+            'ingredients',
+            queryset=RecipeIngredient.objects.select_related('ingredient').order_by('id'),
+        ))
 
 class Recipe(models.Model):
     CATEGORY_CHOICES = [
@@ -10,11 +23,90 @@ class Recipe(models.Model):
         ('Напитки', 'Напитки'),
         ('Выпечка', 'Выпечка'),
     ]
+    DIFFICULTY_CHOICES = [
+        (1, 'Очень легко'),
+        (2, 'Легко'),
+        (3, 'Средне'),
+        (4, 'Сложно'),
+        (5, 'Очень сложно'),
+    ]
     
-    title = models.CharField(max_length=200, verbose_name="Название")
+    title = models.CharField(max_length=200, db_index=True, verbose_name="Название")
     description = models.TextField(verbose_name="Описание")
     cooking_time = models.IntegerField(verbose_name="Время приготовления (мин)")
     category = models.CharField(max_length=50, choices=CATEGORY_CHOICES, default='Основные блюда', verbose_name="Категория")
+    difficulty = models.PositiveSmallIntegerField(choices=DIFFICULTY_CHOICES, default=2, verbose_name="Сложность")
+    servings = models.PositiveIntegerField(default=4, verbose_name="Порций")
+    instructions = models.TextField(blank=True, default='', verbose_name="Инструкции")
+    image = models.ImageField(upload_to='recipes/', blank=True, null=True, verbose_name="Изображение")
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True, verbose_name="Создан")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Обновлен")
+    
+    objects = RecipeQuerySet.as_manager()
+    
+    def __str__(self):
+        return self.title
+
+class Ingredient(models.Model):
+    CATEGORY_CHOICES = [
+        ('vegetables', 'Овощи'),
+        ('fruits', 'Фрукты'),
+        ('meat', 'Мясо'),
+        ('dairy', 'Молочные продукты'),
+        ('groceries', 'Бакалея'),
+        ('spices', 'Специи'),
+        ('other', 'Другое'),
+    ]
+    
+    name = models.CharField(max_length=100, verbose_name="Название")
+    unit = models.CharField(max_length=20, default='г', verbose_name="Единица измерения")
+    category = models.CharField(max_length=20, choices=CATEGORY_CHOICES, default='other', verbose_name="Категория")
+    
+    def __str__(self):
+        return self.name
+
+class RecipeIngredient(models.Model):
+    recipe = models.ForeignKey(Recipe, on_delete=models.CASCADE, related_name='ingredients', verbose_name="Рецепт")
+    ingredient = models.ForeignKey(Ingredient, on_delete=models.CASCADE, related_name='recipes', verbose_name="Ингредиент")
+    quantity = models.FloatField(verbose_name="Количество")
+    note = models.CharField(max_length=200, blank=True, default='', verbose_name="Примечание")
+    
+    def __str__(self):
+        return f'{self.ingredient} - {self.quantity} {self.ingredient.unit}'
+
+class DataVersionQuerySet(models.QuerySet):
+    def current(self, name):
+        """Текущая версия по имени
+        
+        Для имени, которое еще не менялось, - несохраненная нулевая версия
+        без времени изменения.
+        """
+        version = self.filter(name=name).first()
+        return version if version is not None else DataVersion(name=name, updated_at=None)
+    
+    def bump(self, *names):
+        """Новые версии для всех имен одним обновлением; возвращает {имя: версия}
+        
+        Внутри транзакции: прочитанные номера - именно те, что записал этот вызов.
+        """
+        with transaction.atomic():
+            self.bulk_create([DataVersion(name=name) for name in names], ignore_conflicts=True)
+            self.filter(name__in=names).update(version=models.F('version') + 1,
+                                               updated_at=timezone.now())
+            return dict(self.filter(name__in=names).values_list('name', 'version'))
+
+class DataVersion(models.Model):
+    """Версия группы данных, общая для всех процессов сервера
+    
+    Кэши в памяти процессов сверяются с ней: запись в любом процессе
+    (или в management-команде) увеличивает версию, и устаревшие данные
+    перестают использоваться везде.
+    """
+    name = models.CharField(max_length=100, primary_key=True, verbose_name="Имя")
+    version = models.PositiveBigIntegerField(default=0, verbose_name="Версия")
+    updated_at = models.DateTimeField(null=True, verbose_name="Изменена")
+    
+    objects = DataVersionQuerySet.as_manager()
     
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return f'{self.name}: {self.version}'
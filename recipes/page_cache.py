@@ -0,0 +1,137 @@
+"""Кэш готовых HTML-страниц рецептов
+
+Страница кэшируется по полному URL отдельно для анонимных и вошедших
+пользователей. Каждая страница принадлежит группе: списки (главная и
+«Все рецепты») - группе LIST_GROUP, страница рецепта - группе своего рецепта.
+Версия группы хранится в таблице DataVersion, общей для всех процессов
+сервера, и входит в ключ: сброс группы в любом процессе - это одна запись
+новой версии, а старые страницы просто перестают находиться и вытесняются
+сами. Сами страницы можно держать в памяти процесса.
+
+ETag и Last-Modified для условных запросов (conditional) строятся по
+номеру и времени той же версии: один запрос по первичному ключу вместо
+рендеринга.
+"""
+import hashlib
+import threading
+from collections import Counter
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+from .models import DataVersion
+
+LIST_GROUP = 'list'
+
+_counters = Counter()
+_counters_lock = threading.Lock()
+
+
+def recipe_group(pk):
+    return f'recipe:{pk}'
+
+
+def _data_version(request, group):
+    """Версия группы из базы, не больше одного запроса на группу за запрос"""
+    versions = request.__dict__.setdefault('_page_versions', {})
+    if group not in versions:
+        versions[group] = DataVersion.objects.current(group)
+    return versions[group]
+
+
+def invalidate(*groups):
+    """Сброс всех закэшированных страниц групп"""
+    if not groups:
+        return
+    DataVersion.objects.bump(*groups)
+    with _counters_lock:
+        _counters['invalidations'] += len(groups)
+
+
+def _count(name):
+    with _counters_lock:
+        _counters[name] += 1
+
+
+def stats():
+    """Счетчики попаданий и промахов с момента запуска процесса"""
+    with _counters_lock:
+        hits, misses = _counters['hits'], _counters['misses']
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 3) if hits + misses else 0.0,
+            'invalidations': _counters['invalidations'],
+        }
+
+
+def reset_stats():
+    with _counters_lock:
+        _counters.clear()
+
+
+def _variant(request):
+    return 'auth' if request.user.is_authenticated else 'anon'
+
+
+def cached_page(group):
+    """Кэширование ответа view; group(**kwargs) - группа страницы по аргументам URL"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view(request, *args, **kwargs)
+
+            page_group = group(**kwargs)
+            version = _data_version(request, page_group).version
+            url_hash = hashlib.md5(request.get_full_path().encode('utf-8')).hexdigest()
+            key = f'recipes:page:{page_group}:{version}:{_variant(request)}:{url_hash}'
+
+            response = cache.get(key)
+            if response is not None:
+                _count('hits')
+                response['X-Cache'] = 'HIT'
+                return response
+
+            _count('misses')
+            response = view(request, *args, **kwargs)
+            patch_vary_headers(response, ['Cookie'])
+            # Ответы с cookie (например, сессия) и ошибки не кэшируются
+            if response.status_code == 200 and not response.cookies and not response.streaming:
+                cache.set(key, response, settings.RECIPE_PAGE_CACHE_TIMEOUT)
+            response['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+def conditional(group):
+    """Условный GET: ETag и Last-Modified по версии группы страницы
+
+    304 отдается до вызова view (и до кэша страниц), если версия группы
+    не менялась; group(**kwargs) - как в cached_page.
+    """
+    def etag(request, *args, **kwargs):
+        page_group = group(**kwargs)
+        version = _data_version(request, page_group).version
+        digest = hashlib.md5(f'{page_group}:{version}:{_variant(request)}'.encode('utf-8'))
+        return f'W/"{digest.hexdigest()[:20]}"'
+
+    def last_modified(request, *args, **kwargs):
+        return _data_version(request, group(**kwargs)).updated_at
+
+    def decorator(view):
+        conditional_view = condition(etag_func=etag, last_modified_func=last_modified)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD'):
+                # Клиент может хранить ответ, но перед использованием обязан его проверить
+                patch_cache_control(response, no_cache=True)
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,13 @@
+from rest_framework.pagination import CursorPagination
+
+
+class RecipeFeedPagination(CursorPagination):
+    """Лента рецептов для бесконечной прокрутки главной страницы
+
+    Курсор вместо номера страницы: следующая страница читается по индексу
+    с позиции предыдущей и не съезжает, когда добавляются новые рецепты.
+    """
+    page_size = 12  # один экран главной страницы
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
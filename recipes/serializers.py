@@ -1,5 +1,7 @@
+from django.db import transaction
 from rest_framework import serializers
 from .models import Recipe, Ingredient, RecipeIngredient
+from .signals import reindex_recipes
 
 class IngredientSerializer(serializers.ModelSerializer):
     class Meta:
@@ -27,25 +29,100 @@ class RecipeSerializer(serializers.ModelSerializer):
             'created_at', 'updated_at'
         ]
     
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+        if 'ingredients' in self.initial_data:
+            attrs['ingredient_rows'] = self._resolve_ingredients(
+                self.initial_data.get('ingredients') or []
+            )
+        return attrs
+    
+    def _resolve_ingredients(self, items):
+        """Состав рецепта из запроса: {id ингредиента: (ингредиент, количество, примечание)}
+        
+        Все ингредиенты находятся одним запросом. Неизвестные и повторяющиеся
+        id и некорректные количества возвращаются одной ошибкой.
+        """
+        rows = {}
+        duplicates, errors = [], []
+        for item in items:
+            if not isinstance(item, dict):
+                errors.append(f'Некорректная строка состава: {item}')
+                continue
+            ingredient_id = item.get('ingredient_id')
+            quantity = item.get('quantity')
+            if not (ingredient_id and quantity):
+                continue
+            try:
+                ingredient_id, quantity = int(ingredient_id), float(quantity)
+            except (TypeError, ValueError):
+                errors.append(f'Некорректная строка состава: {item}')
+                continue
+            if ingredient_id in rows:
+                duplicates.append(ingredient_id)
+                continue
+            rows[ingredient_id] = (quantity, item.get('note', ''))
+        
+        found = Ingredient.objects.in_bulk(list(rows))
+        unknown = [ingredient_id for ingredient_id in rows if ingredient_id not in found]
+        if unknown:
+            errors.append(f'Неизвестные ингредиенты: {", ".join(map(str, unknown))}')
+        if duplicates:
+            errors.append(f'Ингредиенты указаны повторно: {", ".join(map(str, duplicates))}')
+        if errors:
+            raise serializers.ValidationError({'ingredients': errors})
+        
+        return {ingredient_id: (found[ingredient_id], quantity, note)
+                for ingredient_id, (quantity, note) in rows.items()}
+    
     def create(self, validated_data):
-        ingredients_data = self.context['request'].data.get('ingredients', [])
-        recipe = Recipe.objects.create(**validated_data)
-        
-        for ingredient_data in ingredients_data:
-            ingredient_id = ingredient_data.get('ingredient_id')
-            quantity = ingredient_data.get('quantity')
-            note = ingredient_data.get('note', '')
-            
-            if ingredient_id and quantity:
-                ingredient = Ingredient.objects.get(id=ingredient_id)
-                RecipeIngredient.objects.create(
-                    recipe=recipe,
-                    ingredient=ingredient,
-                    quantity=quantity,
-                    note=note
-                )
-        
-        return recipe
+        rows = validated_data.pop('ingredient_rows', {})
+        
+        with transaction.atomic():
+            recipe = Recipe.objects.create(**validated_data)
+            RecipeIngredient.objects.bulk_create([
+                RecipeIngredient(recipe=recipe, ingredient=ingredient, quantity=quantity, note=note)
+                for ingredient, quantity, note in rows.values()
+            ])
+            # bulk_create не отправляет post_save, индекс ингредиентов обновляем сами
+            reindex_recipes([recipe.id])
+        
+        # Для ответа: состав вместе с ингредиентами одним запросом
+        return Recipe.objects.with_ingredients().get(pk=recipe.pk)
+    
+    def update(self, instance, validated_data):
+        rows = validated_data.pop('ingredient_rows', None)
+        
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            if rows is not None:
+                self._sync_ingredients(instance, rows)
+        
+        return Recipe.objects.with_ingredients().get(pk=instance.pk)
+    
+    def _sync_ingredients(self, recipe, rows):
+        """Приведение состава рецепта к rows: удаляются, меняются и
+        добавляются только отличающиеся строки"""
+        existing = {item.ingredient_id: item for item in recipe.ingredients.all()}
+        removed = [item.id for ingredient_id, item in existing.items() if ingredient_id not in rows]
+        added, changed = [], []
+        for ingredient_id, (ingredient, quantity, note) in rows.items():
+            item = existing.get(ingredient_id)
+            if item is None:
+                added.append(RecipeIngredient(recipe=recipe, ingredient=ingredient,
+                                              quantity=quantity, note=note))
+            elif (item.quantity, item.note) != (quantity, note):
+                item.quantity, item.note = quantity, note
+                changed.append(item)
+        
+        if removed:
+            RecipeIngredient.objects.filter(id__in=removed).delete()
+        if changed:
+            RecipeIngredient.objects.bulk_update(changed, ['quantity', 'note'])
+        if added:
+            RecipeIngredient.objects.bulk_create(added)
+        if removed or changed or added:
+            reindex_recipes([recipe.id])
 
 class RecipeListSerializer(serializers.ModelSerializer):
     difficulty_display = serializers.CharField(source='get_difficulty_display', read_only=True)
@@ -57,4 +134,51 @@ class RecipeListSerializer(serializers.ModelSerializer):
             'id', 'title', 'description', 'category', 'category_display',
             'cooking_time', 'difficulty', 'difficulty_display', 'servings',
             'image', 'created_at'
-        ]
\ No newline at end of file
+        ]
+
+class RecipeListFastSerializer:
+    """Быстрая сериализация списка рецептов в формате RecipeListSerializer
+    
+    Работает с кортежами из .values_list(*columns) вместо экземпляров
+    модели и полей DRF; подписи категорий и сложности берутся из
+    заранее построенных словарей. Только для чтения.
+    """
+    columns = ('id', 'title', 'description', 'category', 'cooking_time',
+               'difficulty', 'servings', 'image', 'created_at')
+    category_labels = dict(Recipe.CATEGORY_CHOICES)
+    difficulty_labels = dict(Recipe.DIFFICULTY_CHOICES)
+    
+    def __init__(self, rows, context=None):
+        self.rows = rows
+        self.request = (context or {}).get('request')
+        self.storage = Recipe._meta.get_field('image').storage
+        self.datetime_field = serializers.DateTimeField()
+    
+    @property
+    def data(self):
+        category_labels, difficulty_labels = self.category_labels, self.difficulty_labels
+        datetime_to_representation = self.datetime_field.to_representation
+        image_url = self.image_url
+        return [
+            {
+                'id': id,
+                'title': title,
+                'description': description,
+                'category': category,
+                'category_display': str(category_labels.get(category, category)),
+                'cooking_time': cooking_time,
+                'difficulty': difficulty,
+                'difficulty_display': str(difficulty_labels.get(difficulty, difficulty)),
+                'servings': servings,
+                'image': image_url(image),
+                'created_at': datetime_to_representation(created_at) if created_at else None,
+            }
+            for id, title, description, category, cooking_time, difficulty, servings,
+                image, created_at in self.rows
+        ]
+    
+    def image_url(self, name):
+        if not name:
+            return None
+        url = self.storage.url(name)
+        return self.request.build_absolute_uri(url) if self.request else url
@@ -0,0 +1,63 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import page_cache
+from .ingredient_index import INDEX_VERSION, ingredient_index
+from .models import DataVersion, Ingredient, Recipe, RecipeIngredient
+
+
+def reindex_recipes(recipe_ids):
+    """Перечитать ингредиенты рецептов и обновить индекс после коммита
+
+    Общая версия индекса поднимается, чтобы остальные процессы перечитали свои.
+    """
+    recipe_ids = set(recipe_ids)
+
+    def apply():
+        version = DataVersion.objects.bump(INDEX_VERSION)[INDEX_VERSION]
+        names = {recipe_id: [] for recipe_id in recipe_ids}
+        rows = RecipeIngredient.objects.filter(recipe_id__in=recipe_ids) \
+            .values_list('recipe_id', 'ingredient__name')
+        for recipe_id, name in rows:
+            names[recipe_id].append(name)
+        for recipe_id, recipe_names in names.items():
+            ingredient_index.update_recipe(recipe_id, recipe_names, version=version)
+
+    transaction.on_commit(apply)
+
+
+def invalidate_pages(*groups):
+    """Сброс закэшированных страниц после коммита"""
+    transaction.on_commit(lambda: page_cache.invalidate(*groups))
+
+
+@receiver([post_save, post_delete], sender=RecipeIngredient)
+def recipe_ingredient_changed(sender, instance, **kwargs):
+    reindex_recipes([instance.recipe_id])
+    invalidate_pages(page_cache.recipe_group(instance.recipe_id))
+
+
+@receiver([post_save, post_delete], sender=Recipe)
+def recipe_changed(sender, instance, **kwargs):
+    invalidate_pages(page_cache.recipe_group(instance.pk), page_cache.LIST_GROUP)
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_renamed(sender, instance, created, **kwargs):
+    if not created:
+        recipe_ids = set(instance.recipes.values_list('recipe_id', flat=True))
+        reindex_recipes(recipe_ids)
+        # Название ингредиента показывается на странице рецепта и в API
+        invalidate_pages(*map(page_cache.recipe_group, recipe_ids))
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    recipe_id = instance.pk
+
+    def apply():
+        version = DataVersion.objects.bump(INDEX_VERSION)[INDEX_VERSION]
+        ingredient_index.remove_recipe(recipe_id, version=version)
+
+    transaction.on_commit(apply)
@@ -1,11 +1,34 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils.http import http_date
 from rest_framework import status
 from rest_framework.test import APITestCase
-from .models import Recipe, Ingredient, RecipeIngredient
+import sql_metrics
+from .management.commands.import_recipes import Command as ImportRecipesCommand
+from . import assets, page_cache
+from .ingredient_index import IngredientIndex, ingredient_index, normalize
+from .models import DataVersion, Recipe, Ingredient, RecipeIngredient
+from .pagination import RecipeFeedPagination
+from .serializers import RecipeListFastSerializer, RecipeListSerializer, RecipeSerializer
+from .views import RecipeViewSet
 
 class RecipeTests(APITestCase):
     def setUp(self):
+        ingredient_index.clear()
+        
         # Создаем тестовые ингредиенты
         self.ingredient1 = Ingredient.objects.create(
             name='Картофель',
@@ -68,4 +91,639 @@ class RecipeTests(APITestCase):
     def test_quick_recipes(self):
         url = reverse('recipe-quick-recipes')
         response = self.client.get(url)
-        self.assertEqual(response.status_code, status.HTTP_200_OK)
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+    
+    def test_search_by_ingredients_ranks_by_coverage(self):
+        soup = Recipe.objects.create(
+            title='Суп', description='Суп', cooking_time=40, difficulty=2, servings=4
+        )
+        for ingredient in (self.ingredient1, self.ingredient2,
+                           Ingredient.objects.create(name='Морковь', unit='г')):
+            RecipeIngredient.objects.create(recipe=soup, ingredient=ingredient, quantity=100)
+        
+        url = reverse('recipe-search-by-ingredients') + '?ingredients=картофель, лук'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([item['recipe']['id'] for item in response.data],
+                         [self.recipe.id, soup.id])
+        self.assertEqual(response.data[0]['match_percentage'], 100)
+        self.assertEqual(response.data[1]['match_percentage'], 67)
+        self.assertEqual(response.data[1]['missing'], ['Морковь'])
+    
+    def test_ingredient_index_updates_on_commit(self):
+        self.client.get(reverse('recipe-search-by-ingredients') + '?ingredients=лук')
+        garlic = Ingredient.objects.create(name='Чеснок', unit='г')
+        with self.captureOnCommitCallbacks(execute=True):
+            RecipeIngredient.objects.create(recipe=self.recipe, ingredient=garlic, quantity=10)
+        
+        url = reverse('recipe-search-by-ingredients') + '?ingredients=чеснок'
+        response = self.client.get(url)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['match_percentage'], 33)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.delete()
+        response = self.client.get(url)
+        self.assertEqual(response.data, [])
+
+class RecipeWriteTests(APITestCase):
+    def setUp(self):
+        self.ingredients = [
+            Ingredient.objects.create(name=name, unit='г')
+            for name in ('Картофель', 'Лук', 'Морковь', 'Свекла')
+        ]
+        self.payload = {
+            'title': 'Борщ', 'description': 'Красный', 'category': 'Супы',
+            'cooking_time': 90, 'difficulty': 3, 'servings': 6,
+        }
+        self.client.force_authenticate(User.objects.create_user('cook', password='secret'))
+    
+    def post_recipe(self, ingredients):
+        return self.client.post(reverse('recipe-list'),
+                                {**self.payload, 'ingredients': ingredients}, format='json')
+    
+    def test_anonymous_cannot_write(self):
+        self.client.force_authenticate(None)
+        few = [{'ingredient_id': self.ingredients[0].id, 'quantity': 100}]
+        self.assertEqual(self.post_recipe(few).status_code, status.HTTP_403_FORBIDDEN)
+        recipe = Recipe.objects.create(title='Щи', description='', category='Супы', cooking_time=40)
+        for method in (self.client.put, self.client.patch, self.client.delete):
+            response = method(reverse('recipe-detail', args=[recipe.pk]), {'servings': 2},
+                              format='json')
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.client.get(reverse('recipe-detail', args=[recipe.pk])).status_code,
+                         status.HTTP_200_OK)
+        self.assertEqual(Recipe.objects.count(), 1)
+    
+    def test_create_with_ingredients_uses_bulk_insert(self):
+        few = [{'ingredient_id': self.ingredients[0].id, 'quantity': 100}]
+        with CaptureQueriesContext(connection) as small:
+            self.assertEqual(self.post_recipe(few).status_code, status.HTTP_201_CREATED)
+        
+        many = [{'ingredient_id': ingredient.id, 'quantity': 100, 'note': 'свежий'}
+                for ingredient in self.ingredients]
+        with CaptureQueriesContext(connection) as large:
+            response = self.post_recipe(many)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(large), len(small))
+        self.assertEqual(len(response.data['ingredients']), 4)
+        self.assertEqual(response.data['ingredients'][0]['note'], 'свежий')
+    
+    def test_create_reports_all_unknown_ingredients(self):
+        response = self.post_recipe([
+            {'ingredient_id': self.ingredients[0].id, 'quantity': 100},
+            {'ingredient_id': 9998, 'quantity': 1},
+            {'ingredient_id': 9999, 'quantity': 1},
+        ])
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('9998, 9999', response.data['ingredients'][0])
+        self.assertFalse(Recipe.objects.exists())
+        self.assertFalse(RecipeIngredient.objects.exists())
+    
+    def test_update_changes_only_different_rows(self):
+        potato, onion, carrot, beet = self.ingredients
+        recipe_id = self.post_recipe([
+            {'ingredient_id': potato.id, 'quantity': 100},
+            {'ingredient_id': onion.id, 'quantity': 50},
+            {'ingredient_id': carrot.id, 'quantity': 30},
+        ]).data['id']
+        rows = dict(RecipeIngredient.objects.values_list('ingredient_id', 'id'))
+        
+        response = self.client.patch(reverse('recipe-detail', args=[recipe_id]), {'ingredients': [
+            {'ingredient_id': potato.id, 'quantity': 100},
+            {'ingredient_id': onion.id, 'quantity': 75},
+            {'ingredient_id': beet.id, 'quantity': 200},
+        ]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        updated = {item.ingredient_id: item for item in RecipeIngredient.objects.all()}
+        self.assertEqual(set(updated), {potato.id, onion.id, beet.id})
+        self.assertEqual(updated[potato.id].id, rows[potato.id])
+        self.assertEqual(updated[onion.id].id, rows[onion.id])
+        self.assertEqual(updated[onion.id].quantity, 75)
+        self.assertEqual(len(response.data['ingredients']), 3)
+        
+        # Без ключа ingredients состав не меняется
+        self.client.patch(reverse('recipe-detail', args=[recipe_id]), {'servings': 2}, format='json')
+        self.assertEqual(RecipeIngredient.objects.count(), 3)
+
+class RecipeQueryCountTests(APITestCase):
+    """Число запросов к базе не должно зависеть от числа рецептов и ингредиентов"""
+    
+    def setUp(self):
+        self.ingredients = [
+            Ingredient.objects.create(name=f'Ингредиент {i}', unit='г') for i in range(5)
+        ]
+    
+    def add_recipes(self, count):
+        for i in range(count):
+            recipe = Recipe.objects.create(title=f'Рецепт {i}', description='Описание',
+                                           cooking_time=20, difficulty=2, servings=2)
+            for ingredient in self.ingredients:
+                RecipeIngredient.objects.create(recipe=recipe, ingredient=ingredient, quantity=1)
+        return recipe
+    
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context)
+    
+    def test_list_query_count_does_not_depend_on_page_size(self):
+        self.add_recipes(1)
+        small = self.count_queries(reverse('recipe-list'))
+        self.add_recipes(15)
+        self.assertEqual(self.count_queries(reverse('recipe-list')), small)
+        self.assertEqual(small, 3)  # версия списков для ETag, COUNT для пагинации и сама страница
+    
+    def test_detail_loads_ingredients_in_one_query(self):
+        recipe = self.add_recipes(1)
+        with self.assertNumQueries(3):  # версия рецепта для ETag, рецепт и его ингредиенты
+            response = self.client.get(reverse('recipe-detail', args=[recipe.id]))
+        self.assertEqual([item['ingredient']['name'] for item in response.data['ingredients']],
+                         [ingredient.name for ingredient in self.ingredients])
+    
+    def test_nested_serializer_with_ingredients(self):
+        self.add_recipes(10)
+        with self.assertNumQueries(2):
+            data = RecipeSerializer(Recipe.objects.with_ingredients(), many=True).data
+        self.assertEqual(len(data), 10)
+        self.assertTrue(all(len(recipe['ingredients']) == 5 for recipe in data))
+
+class RecipeListFastSerializerTests(APITestCase):
+    def setUp(self):
+        Recipe.objects.create(title='Борщ', description='Красный', category='Супы',
+                              cooking_time=90, difficulty=3, image='recipes/borsch.jpg')
+        Recipe.objects.create(title='Чай', description='', category='Напитки',
+                              cooking_time=5, difficulty=1)
+    
+    def test_same_output_as_model_serializer(self):
+        request = self.client.get('/').wsgi_request
+        queryset = Recipe.objects.order_by('id')
+        expected = RecipeListSerializer(queryset, many=True, context={'request': request}).data
+        fast = RecipeListFastSerializer(queryset.values_list(*RecipeListFastSerializer.columns),
+                                        context={'request': request}).data
+        self.assertEqual(json.dumps(fast), json.dumps(expected))
+    
+    def test_list_endpoints_match_regular_serializer(self):
+        for url in (reverse('recipe-list'), reverse('recipe-quick-recipes')):
+            fast = self.client.get(url).data
+            with mock.patch.object(RecipeViewSet, 'fast_list', False):
+                regular = self.client.get(url).data
+            self.assertEqual(json.dumps(fast), json.dumps(regular))
+            self.assertTrue(fast['results'])
+
+class PageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches['fragments'].clear()
+        page_cache.reset_stats()
+        self.soup = Recipe.objects.create(title='Суп', description='', cooking_time=40)
+        self.tea = Recipe.objects.create(title='Чай', description='', cooking_time=5)
+    
+    def get(self, name, *args):
+        response = self.client.get(reverse(name, args=args))
+        self.assertEqual(response.status_code, 200)
+        return response['X-Cache']
+    
+    def test_second_request_is_served_from_cache(self):
+        self.assertEqual(self.get('recipe_detail', self.soup.pk), 'MISS')
+        self.assertEqual(self.get('recipe_detail', self.soup.pk), 'HIT')
+        self.assertEqual(self.get('recipe_list'), 'MISS')
+        with self.assertNumQueries(1):  # только версия группы
+            self.assertEqual(self.get('recipe_list'), 'HIT')
+        self.assertEqual(page_cache.stats()['hits'], 2)
+        self.assertEqual(page_cache.stats()['misses'], 2)
+    
+    def test_anonymous_and_authenticated_variants(self):
+        self.get('recipe_list')
+        User.objects.create_user('chef', password='chef123')
+        self.client.login(username='chef', password='chef123')
+        self.assertEqual(self.get('recipe_list'), 'MISS')
+        self.assertEqual(self.get('recipe_list'), 'HIT')
+    
+    def test_save_invalidates_detail_and_lists_only(self):
+        for name, args in [('recipe_detail', [self.soup.pk]), ('recipe_detail', [self.tea.pk]),
+                           ('recipe_list', []), ('home', [])]:
+            self.get(name, *args)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.soup.title = 'Борщ'
+            self.soup.save()
+        
+        self.assertEqual(self.get('recipe_detail', self.tea.pk), 'HIT')
+        self.assertEqual(self.get('recipe_detail', self.soup.pk), 'MISS')
+        self.assertEqual(self.get('recipe_list'), 'MISS')
+        self.assertEqual(self.get('home'), 'MISS')
+        self.assertContains(self.client.get(reverse('recipe_list')), 'Борщ')
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tea.delete()
+        self.assertNotContains(self.client.get(reverse('recipe_list')), 'Чай')
+    
+    def test_invalidation_from_another_process(self):
+        self.assertEqual(self.get('recipe_list'), 'MISS')
+        self.assertEqual(self.get('recipe_list'), 'HIT')
+        # Другой процесс меняет только строку версии в общей базе
+        DataVersion.objects.bump(page_cache.LIST_GROUP)
+        self.assertEqual(self.get('recipe_list'), 'MISS')
+    
+    def test_ingredient_rename_invalidates_its_recipes(self):
+        onion = Ingredient.objects.create(name='Лук', unit='г')
+        with self.captureOnCommitCallbacks(execute=True):
+            RecipeIngredient.objects.create(recipe=self.soup, ingredient=onion, quantity=50)
+        soup_api = reverse('recipe-detail', args=[self.soup.pk])
+        soup_etag = self.client.get(soup_api)['ETag']
+        for name, args in [('recipe_detail', [self.soup.pk]), ('recipe_detail', [self.tea.pk])]:
+            self.get(name, *args)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            onion.name = 'Лук-порей'
+            onion.save()
+        
+        self.assertEqual(self.get('recipe_detail', self.tea.pk), 'HIT')
+        self.assertContains(self.client.get(reverse('recipe_detail', args=[self.soup.pk])), 'Лук-порей')
+        response = self.client.get(soup_api, HTTP_IF_NONE_MATCH=soup_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['ingredients'][0]['ingredient']['name'], 'Лук-порей')
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.soup = Recipe.objects.create(title='Суп', description='', cooking_time=40)
+            self.tea = Recipe.objects.create(title='Чай', description='', cooking_time=5)
+    
+    def revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+    
+    def test_read_endpoints_answer_304_with_version_query_only(self):
+        urls = [reverse('home'), reverse('recipe_list'),
+                reverse('recipe_detail', args=[self.soup.pk]),
+                reverse('recipe-list'), reverse('recipe-detail', args=[self.soup.pk]),
+                reverse('recipe-feed'), reverse('recipe-quick-recipes'),
+                reverse('recipe-categories')]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('no-cache', response['Cache-Control'])
+                with self.assertNumQueries(1):  # только версия группы
+                    self.assertEqual(self.revalidate(url, response).status_code, 304)
+                by_date = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+                self.assertEqual(by_date.status_code, 304)
+    
+    def test_changes_invalidate_validators(self):
+        soup_url = reverse('recipe_detail', args=[self.soup.pk])
+        tea_url = reverse('recipe_detail', args=[self.tea.pk])
+        soup, tea = self.client.get(soup_url), self.client.get(tea_url)
+        
+        onion = Ingredient.objects.create(name='Лук', unit='г')
+        with self.captureOnCommitCallbacks(execute=True):
+            RecipeIngredient.objects.create(recipe=self.soup, ingredient=onion, quantity=50)
+        self.assertEqual(self.revalidate(soup_url, soup).status_code, 200)
+        self.assertEqual(self.revalidate(tea_url, tea).status_code, 304)
+        
+        recipes = self.client.get(reverse('recipe-list'))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tea.save()
+        self.assertEqual(self.revalidate(reverse('recipe-list'), recipes).status_code, 200)
+        self.assertEqual(self.revalidate(tea_url, tea).status_code, 200)
+    
+    def test_validators_follow_version_in_database(self):
+        url = reverse('recipe-detail', args=[self.soup.pk])
+        response = self.client.get(url)
+        version = DataVersion.objects.get(name=page_cache.recipe_group(self.soup.pk))
+        self.assertEqual(response['Last-Modified'], http_date(version.updated_at.timestamp()))
+        
+        # Версию поднял другой процесс: локальный кэш этого процесса не трогается
+        DataVersion.objects.filter(pk=version.pk).update(version=F('version') + 1)
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+    
+    def test_unchanged_group_has_etag_only(self):
+        Recipe.objects.create(title='Квас', description='', cooking_time=5)  # без сигналов после коммита
+        url = reverse('recipe_detail', args=[Recipe.objects.get(title='Квас').pk])
+        response = self.client.get(url)
+        self.assertNotIn('Last-Modified', response)
+        self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+class StaticAssetsTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+    
+    def test_collectstatic_writes_hashed_compressed_files(self):
+        with override_settings(STATIC_ROOT=self.tmpdir.name):
+            call_command('collectstatic', interactive=False, verbosity=0)
+            hashed = assets.staticfiles_storage.stored_name('recipes/home.css')
+            self.assertRegex(hashed, r'^recipes/home\.[0-9a-f]{12}\.css$')
+            self.assertTrue(os.path.exists(os.path.join(self.tmpdir.name, hashed + '.gz')))
+            
+            factory = RequestFactory()
+            response = assets.serve(factory.get('/', HTTP_ACCEPT_ENCODING='gzip, br;q=0'), hashed)
+            self.assertEqual(response['Content-Encoding'], 'gzip')
+            self.assertEqual(response['Content-Type'], 'text/css')
+            self.assertIn('immutable', response['Cache-Control'])
+            response.close()
+            
+            response = assets.serve(factory.get('/'), 'recipes/home.css')
+            self.assertNotIn('Content-Encoding', response)
+            self.assertIn('no-cache', response['Cache-Control'])
+            response.close()
+    
+    def test_home_links_static_assets(self):
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, 'recipes/home.css')
+        self.assertContains(response, 'recipes/home.js')
+        self.assertNotContains(response, '<style>')
+    
+    def test_home_exposes_ingredient_search(self):
+        response = self.client.get(reverse('home'))
+        self.assertContains(response, f'data-search-url="{reverse("recipe-search-by-ingredients")}"')
+    
+    def test_json_is_gzipped(self):
+        for number in range(10):
+            Recipe.objects.create(title=f'Рецепт {number}', description='Описание', cooking_time=10)
+        response = self.client.get(reverse('recipe-list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Encoding', self.client.get(reverse('recipe-list')))
+
+class FragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches['fragments'].clear()
+        self.soup = Recipe.objects.create(title='Уха по-фински', description='Густая', cooking_time=40,
+                                          instructions='Варить час')
+    
+    def render(self, name, *args):
+        cache.clear()  # только фрагменты, без кэша целых страниц
+        return self.client.get(reverse(name, args=args))
+    
+    def test_card_is_reused_until_recipe_is_saved(self):
+        self.assertContains(self.render('recipe_list'), 'Уха по-фински')
+        # update() не меняет updated_at - карточка берется из кэша
+        Recipe.objects.filter(pk=self.soup.pk).update(title='Кулебяка')
+        self.assertContains(self.render('recipe_list'), 'Уха по-фински')
+        self.assertContains(self.render('home'), 'Уха по-фински')
+        
+        self.soup.refresh_from_db()
+        self.soup.save()
+        self.assertContains(self.render('recipe_list'), 'Кулебяка')
+        self.assertNotContains(self.render('home'), 'Уха по-фински')
+    
+    def test_detail_ingredients_are_not_cached(self):
+        self.render('recipe_detail', self.soup.pk)
+        onion = Ingredient.objects.create(name='Лук', unit='г')
+        RecipeIngredient.objects.create(recipe=self.soup, ingredient=onion, quantity=50)
+        response = self.render('recipe_detail', self.soup.pk)
+        self.assertContains(response, 'Лук')
+        self.assertContains(response, 'Варить час')
+
+class HomeFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        caches['fragments'].clear()
+    
+    def create(self, count, start=0):
+        Recipe.objects.bulk_create([
+            Recipe(title=f'Рецепт {number}', description='Описание', cooking_time=10)
+            for number in range(start, start + count)
+        ])
+    
+    def test_home_size_does_not_depend_on_catalog(self):
+        self.create(30)
+        small = self.client.get(reverse('home'))
+        self.assertEqual(len(small.context['recipes']), RecipeFeedPagination.page_size)
+        self.assertContains(small, 'data-next-url=')
+        
+        cache.clear()
+        self.create(300, start=30)
+        large = self.client.get(reverse('home'))
+        self.assertEqual(len(large.context['recipes']), RecipeFeedPagination.page_size)
+        self.assertLess(abs(len(large.content) - len(small.content)), 200)
+    
+    def test_feed_pages_cover_catalog(self):
+        self.create(30)
+        response = self.client.get(reverse('home'))
+        first_page = [recipe.pk for recipe in response.context['recipes']]
+        
+        ids, url = list(first_page), response.context['next_url']
+        while url:
+            page = self.client.get(url).json()
+            ids.extend(recipe['id'] for recipe in page['results'])
+            url = page['next']
+        
+        expected = list(Recipe.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.assertEqual(ids, expected)
+    
+    def test_feed_matches_regular_serializer(self):
+        self.create(5)
+        url = reverse('recipe-feed') + '?limit=3'
+        fast = self.client.get(url).json()
+        with mock.patch.object(RecipeViewSet, 'fast_list', False):
+            regular = self.client.get(url).json()
+        self.assertEqual(fast, regular)
+        self.assertEqual(len(fast['results']), 3)
+        self.assertIsNotNone(fast['next'])
+
+class IngredientIndexTests(TestCase):
+    def test_normalize(self):
+        self.assertEqual(normalize('Лук репчатый (крупный)'), normalize('лук репчатые'))
+        self.assertEqual(normalize('Помидоры'), normalize('помидор'))
+    
+    def test_partial_name_matches_longer_ingredient(self):
+        index = IngredientIndex(loader=lambda: [(1, 'Лук репчатый'), (1, 'Соль'), (2, 'Сахар')])
+        results = index.search(['лук'])
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['recipe_id'], 1)
+        self.assertEqual(results[0]['matched'], ['Лук репчатый'])
+        self.assertEqual(results[0]['missing'], ['Соль'])
+    
+    def test_update_and_remove_recipe(self):
+        index = IngredientIndex(loader=lambda: [(1, 'Мука'), (2, 'Мука')])
+        index.update_recipe(3, ['Мука'])  # до загрузки источник данных - loader
+        self.assertEqual([r['recipe_id'] for r in index.search(['мука'])], [1, 2])
+        index.update_recipe(2, ['Сахар'])
+        index.remove_recipe(1)
+        self.assertEqual(index.search(['мука']), [])
+        self.assertEqual([r['recipe_id'] for r in index.search(['сахар'])], [2])
+    
+    def test_reload_when_shared_version_changes(self):
+        rows = [(1, 'Мука')]
+        shared = {'version': 4}
+        loads = []
+        
+        def loader():
+            loads.append(shared['version'])
+            return list(rows)
+        
+        index = IngredientIndex(loader=loader, version=lambda: shared['version'])
+        self.assertEqual(len(index.search(['мука'])), 1)
+        
+        # Своя запись: версия поднята на 1 - индекс обновлен на месте
+        shared['version'] = 5
+        index.update_recipe(2, ['Мука'], version=5)
+        self.assertEqual(len(index.search(['мука'])), 2)
+        self.assertEqual(loads, [4])
+        
+        # Запись другого процесса: версия изменилась - полная перезагрузка
+        rows.append((3, 'Мука'))
+        shared['version'] = 6
+        self.assertEqual([r['recipe_id'] for r in index.search(['мука'])], [1, 3])
+        self.assertEqual(loads, [4, 6])
+        
+        # Своя запись после чужой, которую индекс не видел, - тоже перезагрузка
+        shared['version'] = 8
+        index.update_recipe(1, ['Сахар'], version=8)
+        self.assertEqual(index.stats()['version'], 6)
+        index.search(['мука'])
+        self.assertEqual(loads, [4, 6, 8])
+
+class ImportRecipesCommandTests(TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        Ingredient.objects.create(name='Лук', unit='г')
+        Recipe.objects.create(title='Существующий', description='', cooking_time=10)
+    
+    def write(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+    
+    def write_jsonl(self, rows):
+        return self.write('recipes.jsonl', '\n'.join(json.dumps(row, ensure_ascii=False)
+                                                      for row in rows))
+    
+    def import_file(self, path, **options):
+        call_command('import_recipes', path, stdout=StringIO(), stderr=StringIO(), **options)
+    
+    def import_in_another_process(self, path, **options):
+        """Импорт так, как его выполняет отдельный процесс: кэш страниц у него свой,
+        а индекс ингредиентов в памяти сервера он изменить не может"""
+        with mock.patch.object(page_cache, 'cache', LocMemCache('import-process', {})), \
+                mock.patch.object(ingredient_index, 'clear'), \
+                mock.patch.object(ingredient_index, 'update_recipe'), \
+                mock.patch.object(ingredient_index, 'remove_recipe'), \
+                self.captureOnCommitCallbacks(execute=True):
+            self.import_file(path, **options)
+    
+    def test_server_sees_batches_committed_before_crash(self):
+        ingredient_index.clear()
+        search_url = reverse('recipe-search-by-ingredients') + '?ingredients=капуста'
+        self.assertEqual(self.client.get(search_url).data, [])  # индекс загружен
+        path = self.write_jsonl([
+            {'title': title, 'ingredients': [{'name': 'Капуста', 'quantity': 300}]}
+            for title in ('Щи', 'Борщ')
+        ])
+        original = ImportRecipesCommand.import_batch
+        calls = []
+        
+        def crash_on_second_batch(command, batch):
+            calls.append(batch)
+            if len(calls) == 2:
+                raise RuntimeError('сбой')
+            return original(command, batch)
+        
+        with mock.patch.object(ImportRecipesCommand, 'import_batch', crash_on_second_batch), \
+                self.assertRaises(RuntimeError):
+            self.import_in_another_process(path, batch_size=1)
+        
+        response = self.client.get(search_url)
+        self.assertEqual([item['recipe']['title'] for item in response.data], ['Щи'])
+    
+    def test_server_sees_import_from_another_process(self):
+        cache.clear()
+        ingredient_index.clear()
+        search_url = reverse('recipe-search-by-ingredients') + '?ingredients=капуста'
+        self.assertEqual(self.client.get(search_url).data, [])  # индекс загружен
+        list_url = reverse('recipe_list')
+        self.client.get(list_url)
+        self.assertEqual(self.client.get(list_url)['X-Cache'], 'HIT')
+        api_etag = self.client.get(reverse('recipe-list'))['ETag']
+        
+        self.import_in_another_process(self.write_jsonl([
+            {'title': 'Щи', 'ingredients': [{'name': 'Капуста', 'quantity': 300}]},
+        ]))
+        
+        response = self.client.get(search_url)
+        self.assertEqual([item['recipe']['title'] for item in response.data], ['Щи'])
+        response = self.client.get(list_url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertContains(response, 'Щи')
+        response = self.client.get(reverse('recipe-list'), HTTP_IF_NONE_MATCH=api_etag)
+        self.assertEqual(response.status_code, 200)
+    
+    def test_import_jsonl(self):
+        path = self.write_jsonl([
+            {'title': 'Щи', 'category': 'Супы', 'cooking_time': 60,
+             'ingredients': [{'name': 'Капуста', 'quantity': 300}, {'name': 'Лук', 'quantity': 50}]},
+            {'title': 'Существующий', 'cooking_time': 5},
+            {'title': 'Щи', 'cooking_time': 5},
+            {'title': '', 'cooking_time': 5},
+            {'title': 'Сырники', 'category': 'Завтраки', 'ingredients': [['Творог', 400]]},
+        ])
+        self.import_file(path, batch_size=2)
+        
+        self.assertEqual(Recipe.objects.count(), 3)
+        soup = Recipe.objects.get(title='Щи')
+        self.assertEqual(soup.category, 'Супы')
+        self.assertEqual(sorted(soup.ingredients.values_list('ingredient__name', flat=True)),
+                         ['Капуста', 'Лук'])
+        self.assertEqual(Ingredient.objects.filter(name='Лук').count(), 1)
+        self.assertFalse(os.path.exists(path + '.checkpoint'))
+    
+    def test_import_csv(self):
+        path = self.write('recipes.csv',
+                          'title,category,cooking_time,difficulty,ingredients\n'
+                          'Оливье,Салаты,40,2,Картофель:300; Лук:50\n'
+                          'Морс,Напитки,15,1,\n')
+        self.import_file(path)
+        self.assertEqual(Recipe.objects.get(title='Оливье').ingredients.count(), 2)
+        self.assertEqual(Recipe.objects.get(title='Морс').difficulty, 1)
+    
+    def test_resume_after_crash(self):
+        path = self.write_jsonl([{'title': f'Рецепт {i}', 'cooking_time': i} for i in range(6)])
+        original = ImportRecipesCommand.import_batch
+        calls = []
+        
+        def crash_on_second_batch(command, batch):
+            calls.append(batch)
+            if len(calls) == 2:
+                raise RuntimeError('сбой')
+            return original(command, batch)
+        
+        with mock.patch.object(ImportRecipesCommand, 'import_batch', crash_on_second_batch):
+            with self.assertRaises(RuntimeError):
+                self.import_file(path, batch_size=2)
+        self.assertEqual(Recipe.objects.filter(title__startswith='Рецепт').count(), 2)
+        
+        with mock.patch.object(ImportRecipesCommand, 'import_batch', autospec=True,
+                               side_effect=original) as import_batch:
+            self.import_file(path, batch_size=2)
+        # Первый пакет не перечитывается
+        self.assertEqual(import_batch.call_count, 2)
+        self.assertEqual(Recipe.objects.filter(title__startswith='Рецепт').count(), 6)
+
+class MetricsTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        sql_metrics.REGISTRY.reset()
+        for n in range(3):
+            Recipe.objects.create(title=f'Рецепт {n}', description='', cooking_time=10)
+    
+    def series(self, text, name, route):
+        prefix = f'{name}{{route="{route}"}} '
+        return next(float(line[len(prefix):]) for line in text.splitlines() if line.startswith(prefix))
+    
+    def test_sql_per_route_is_exported(self):
+        self.client.get('/api/recipes/')
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response['Content-Type'], sql_metrics.CONTENT_TYPE)
+        text = response.content.decode()
+        self.assertIn('http_requests_total{route="recipe-list",method="GET",status="200"} 1', text)
+        # версия списков (строки еще нет), COUNT(*) пагинатора и сама страница: 1 + 3 строки
+        self.assertEqual(self.series(text, 'db_queries_per_request_sum', 'recipe-list'), 3)
+        self.assertEqual(self.series(text, 'db_rows_per_request_sum', 'recipe-list'), 4)
+        self.assertGreater(self.series(text, 'db_query_seconds_per_request_sum', 'recipe-list'), 0)
@@ -1,8 +1,15 @@
-from django.urls import path
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
 from . import views
 
+router = DefaultRouter()
+router.register('recipes', views.RecipeViewSet, basename='recipe')
+
 urlpatterns = [
     path('', views.home, name='home'),
     path('list/', views.recipe_list, name='recipe_list'),
     path('<int:pk>/', views.recipe_detail, name='recipe_detail'),
-]
\ No newline at end of file
+    path('cache-stats/', views.cache_stats, name='cache_stats'),
+    path('metrics/', views.metrics, name='metrics'),
+    path('api/', include(router.urls)),
+]
@@ -1,18 +1,144 @@
+from operator import itemgetter
+
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse
+from django.urls import reverse
+from django.utils.decorators import method_decorator
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.request import Request
+from rest_framework.response import Response
+import sql_metrics
+from . import page_cache
+from .ingredient_index import ingredient_index
 from .models import Recipe
+from .pagination import RecipeFeedPagination
+from .serializers import RecipeSerializer, RecipeListSerializer, RecipeListFastSerializer
 
+@page_cache.conditional(lambda: page_cache.LIST_GROUP)
+@page_cache.cached_page(lambda: page_cache.LIST_GROUP)
 def home(request):
-    recipes = list(Recipe.objects.all().values('id', 'title', 'description', 'cooking_time', 'category'))
+    # Только первый экран; дальше страницы подгружаются из ленты API при прокрутке,
+    # поэтому размер страницы не зависит от размера каталога
+    paginator = RecipeFeedPagination()
+    recipes = paginator.paginate_queryset(Recipe.objects.all(), Request(request))
+    paginator.base_url = reverse('recipe-feed')
     return render(request, 'recipes/home.html', {
         'recipes': recipes,
-        'recipes_json': recipes  # Для передачи в JavaScript
+        'next_url': paginator.get_next_link(),
     })
 
+@page_cache.conditional(lambda: page_cache.LIST_GROUP)
+@page_cache.cached_page(lambda: page_cache.LIST_GROUP)
 def recipe_list(request):
     recipes = Recipe.objects.all()
     return render(request, 'recipes/recipe_list.html', {'recipes': recipes})
 
+@page_cache.conditional(lambda pk: page_cache.recipe_group(pk))
+@page_cache.cached_page(lambda pk: page_cache.recipe_group(pk))
 def recipe_detail(request, pk):
-    recipe = get_object_or_404(Recipe, pk=pk)
-    return render(request, 'recipes/recipe_detail.html', {'recipe': recipe})
\ No newline at end of file
+    recipe = get_object_or_404(Recipe.objects.with_ingredients(), pk=pk)
+    return render(request, 'recipes/recipe_detail.html', {'recipe': recipe})
+
+def cache_stats(request):
+    """Попадания и промахи кэша страниц"""
+    return JsonResponse(page_cache.stats())
+
+def metrics(request):
+    """SQL и время обработки по маршрутам в текстовом формате Prometheus"""
+    return HttpResponse(sql_metrics.REGISTRY.render(), content_type=sql_metrics.CONTENT_TYPE)
+
+# ========== API ==========
+
+list_conditional = page_cache.conditional(lambda: page_cache.LIST_GROUP)
+
+@method_decorator(list_conditional, name='list')
+@method_decorator(page_cache.conditional(lambda pk: page_cache.recipe_group(pk)), name='retrieve')
+class RecipeViewSet(viewsets.ModelViewSet):
+    queryset = Recipe.objects.all().order_by('-created_at', '-id')
+    serializer_class = RecipeSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]  # чтение всем, запись - после входа
+    fast_list = True  # списки через RecipeListFastSerializer, без экземпляров моделей
+    
+    def get_serializer_class(self):
+        if self.action in ('list', 'quick_recipes', 'feed'):
+            return RecipeListSerializer
+        return RecipeSerializer
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.get_serializer_class() is RecipeSerializer:
+            # Вложенные ингредиенты одним запросом, а не N + N*M
+            queryset = queryset.with_ingredients()
+        return queryset
+    
+    def list_response(self, queryset):
+        """Страница списка рецептов в формате RecipeListSerializer"""
+        if not self.fast_list:
+            page = self.paginate_queryset(queryset)
+            serializer = self.get_serializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        
+        columns = RecipeListFastSerializer.columns
+        if isinstance(self.paginator, CursorPagination):
+            # Позицию курсора пагинатор читает из полей строки, поэтому словари
+            page = list(map(itemgetter(*columns), self.paginate_queryset(queryset.values(*columns))))
+        else:
+            page = self.paginate_queryset(queryset.values_list(*columns))
+        serializer = RecipeListFastSerializer(page, context=self.get_serializer_context())
+        return self.get_paginated_response(serializer.data)
+    
+    def list(self, request, *args, **kwargs):
+        return self.list_response(self.filter_queryset(self.get_queryset()))
+    
+    @action(detail=False, pagination_class=RecipeFeedPagination)
+    @method_decorator(list_conditional)
+    def feed(self, request):
+        """Лента новых рецептов с курсорной пагинацией: ?cursor=...&limit=12"""
+        return self.list_response(self.get_queryset())
+    
+    @action(detail=False)
+    @method_decorator(list_conditional)
+    def categories(self, request):
+        """Список категорий рецептов"""
+        return Response([
+            {'value': value, 'label': label}
+            for value, label in Recipe.CATEGORY_CHOICES
+        ])
+    
+    @action(detail=False, url_path='quick')
+    @method_decorator(list_conditional)
+    def quick_recipes(self, request):
+        """Рецепты, которые готовятся не дольше 30 минут"""
+        return self.list_response(self.get_queryset().filter(cooking_time__lte=30))
+    
+    @action(detail=False, url_path='search-by-ingredients')
+    def search_by_ingredients(self, request):
+        """Рецепты из того, что есть: ?ingredients=картофель,лук&limit=10
+        
+        Ранжирование по доле ингредиентов рецепта, которые есть у пользователя,
+        с перечнем недостающих.
+        """
+        pantry = [item.strip() for item in request.query_params.get('ingredients', '').split(',')]
+        pantry = [item for item in pantry if item]
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', 10)), 100))
+        except ValueError:
+            limit = 10
+        
+        matches = ingredient_index.search(pantry, limit=limit) if pantry else []
+        recipes = Recipe.objects.in_bulk([match['recipe_id'] for match in matches])
+        results = []
+        for match in matches:
+            recipe = recipes.get(match['recipe_id'])
+            if recipe is None:
+                continue
+            results.append({
+                'recipe': RecipeListSerializer(recipe, context={'request': request}).data,
+                'match_percentage': match['match_percentage'],
+                'matched': match['matched'],
+                'missing': match['missing'],
+            })
+        return Response(results)
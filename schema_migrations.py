@@ -0,0 +1,163 @@
+"""Версионные миграции схемы SQLite для recipes.db (Flask API) и cookbook.db
+
+Номер последней примененной миграции хранится в PRAGMA user_version.
+Каждая миграция идемпотентна и учитывает, какие таблицы и колонки есть
+в конкретной базе, поэтому одна цепочка обслуживает обе схемы.
+
+Запуск вручную:
+    python schema_migrations.py recipes.db
+"""
+import json
+import sqlite3
+import sys
+
+from data_versions import ensure_versions
+from json_fragments import rebuild_json_fragments
+from search_index import ensure_search_index
+from stats_cache import ensure_counters
+
+# Пересчет агрегатов оценок для списка рецептов (JSON-массив id) одним проходом
+RECOMPUTE_RATINGS_SQL = '''
+    UPDATE recipes
+    SET rating_sum = agg.total,
+        rating_count = agg.count,
+        average_rating = CAST(agg.total AS REAL) / agg.count
+    FROM (
+        SELECT recipe_id, SUM(value) AS total, COUNT(*) AS count
+        FROM ratings
+        WHERE recipe_id IN (SELECT value FROM json_each(?))
+        GROUP BY recipe_id
+    ) AS agg
+    WHERE recipes.id = agg.recipe_id
+'''
+
+
+def _columns(conn, table):
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+
+
+def _create_index(conn, name, table, columns):
+    """Создание индекса, если в базе есть таблица и все нужные колонки"""
+    existing = _columns(conn, table)
+    if not existing or not all(column in existing for column in columns):
+        return
+    conn.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} ({", ".join(columns)})')
+
+
+def add_indexes(conn):
+    """Индексы под сортировки и фильтры всех запросов приложения
+
+    rowid (id) в SQLite неявно входит в каждый индекс, поэтому индекс по
+    created_at обслуживает и курсорную пагинацию по (created_at, id).
+    """
+    with conn:
+        _create_index(conn, 'idx_recipes_created', 'recipes', ['created_at'])
+        _create_index(conn, 'idx_recipes_author_created', 'recipes', ['author_id', 'created_at'])
+        _create_index(conn, 'idx_recipes_category_created', 'recipes', ['category_id', 'created_at'])
+        _create_index(conn, 'idx_recipes_category_name_created', 'recipes', ['category', 'created_at'])
+        _create_index(conn, 'idx_recipes_views', 'recipes', ['views'])
+        _create_index(conn, 'idx_favorites_user_created', 'favorites', ['user_id', 'created_at'])
+        _create_index(conn, 'idx_favorites_recipe', 'favorites', ['recipe_id'])
+        _create_index(conn, 'idx_activity_logs_user_created', 'activity_logs', ['user_id', 'created_at'])
+
+
+def add_rating_aggregates(conn):
+    """Колонка rating_sum и пересчет агрегатов оценок"""
+    columns = _columns(conn, 'recipes')
+    if not columns or not _columns(conn, 'ratings'):
+        return
+    with conn:
+        if 'rating_sum' not in columns:
+            conn.execute('ALTER TABLE recipes ADD COLUMN rating_sum INTEGER DEFAULT 0')
+        rated = [row[0] for row in conn.execute('SELECT DISTINCT recipe_id FROM ratings')]
+        conn.execute(RECOMPUTE_RATINGS_SQL, (json.dumps(rated),))
+
+
+def upgrade_ratings_index(conn):
+    """Индекс оценок по (recipe_id, created_at) вместо (recipe_id)
+
+    Список оценок рецепта сортируется по дате, и старый индекс требовал
+    дополнительной сортировки во временном B-дереве.
+    """
+    with conn:
+        conn.execute('DROP INDEX IF EXISTS idx_ratings_recipe')
+        _create_index(conn, 'idx_ratings_recipe_created', 'ratings', ['recipe_id', 'created_at'])
+
+
+def add_search_index(conn):
+    """Полнотекстовый индекс FTS5 (пропускается, если SQLite собран без него)"""
+    if _columns(conn, 'recipes'):
+        ensure_search_index(conn)
+
+
+def add_counters(conn):
+    """Счетчики строк и рецептов авторов для статистики"""
+    if _columns(conn, 'recipes'):
+        ensure_counters(conn)
+
+
+def add_json_fragments(conn):
+    """Готовые JSON-представления рецептов для списков"""
+    rebuild_json_fragments(conn)
+
+
+def add_data_versions(conn):
+    """Версии коллекций и рецептов для ETag / Last-Modified"""
+    ensure_versions(conn)
+
+
+def keep_deleted_recipe_versions(conn):
+    """Триггер удаления рецепта поднимает его версию, а не удаляет ее"""
+    if _columns(conn, 'recipes'):
+        with conn:
+            conn.execute('DROP TRIGGER IF EXISTS recipes_version_ad')
+        ensure_versions(conn)
+
+
+# (версия, описание, функция); новые миграции добавляются только в конец
+MIGRATIONS = [
+    (1, 'индексы для сортировок и фильтров', add_indexes),
+    (2, 'агрегаты оценок', add_rating_aggregates),
+    (3, 'индекс оценок по рецепту и дате', upgrade_ratings_index),
+    (4, 'полнотекстовый поиск', add_search_index),
+    (5, 'счетчики статистики', add_counters),
+    (6, 'готовые JSON-фрагменты рецептов', add_json_fragments),
+    (7, 'версии данных для условных запросов', add_data_versions),
+    (8, 'версии удаленных рецептов сохраняются', keep_deleted_recipe_versions),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn, verbose=False):
+    """Применение всех еще не примененных миграций; возвращает их номера
+
+    Пока в базе нет таблицы recipes (схему еще не создали), ничего не
+    делается и версия не меняется: иначе миграции считались бы
+    примененными и пропускались после создания таблиц.
+    """
+    if not _columns(conn, 'recipes'):
+        return []
+    applied = []
+    for version, description, apply in MIGRATIONS:
+        if version <= schema_version(conn):
+            continue
+        apply(conn)
+        conn.execute(f'PRAGMA user_version = {version}')
+        applied.append(version)
+        if verbose:
+            print(f'  ✅ {version}: {description}')
+    return applied
+
+
+if __name__ == '__main__':
+    db_name = sys.argv[1] if len(sys.argv) > 1 else 'recipes.db'
+    conn = sqlite3.connect(db_name)
+    print(f'Миграции {db_name}: версия {schema_version(conn)} из {LATEST_VERSION}')
+    if not migrate(conn, verbose=True):
+        print('  Схема уже актуальна')
+    conn.close()
@@ -0,0 +1,200 @@
+import logging
+import re
+import sqlite3
+import sys
+
+logger = logging.getLogger('search_index')
+
+FTS_TABLE = 'recipes_fts'
+FTS_TRIGGERS = tuple(f'{FTS_TABLE}_{suffix}' for suffix in ('ai', 'ad', 'au'))
+
+# Веса колонок для BM25: совпадение в названии важнее совпадения в описании
+FTS_COLUMNS = (
+    ('title', 10.0),
+    ('description', 1.0),
+    ('tags', 3.0),
+    ('ingredients', 5.0),
+    ('category', 4.0),
+)
+
+# unicode61 приводит кириллицу к нижнему регистру, но диакритику снимает только
+# с латиницы, поэтому «ё» заменяется на «е» при индексации и в запросе;
+# префиксные индексы ускоряют запросы вида «гриб*»
+FTS_TOKENIZER = 'unicode61 remove_diacritics 2'
+FTS_PREFIXES = '2 3 4'
+
+# Окончания русских слов, которые отбрасываются перед префиксным поиском,
+# чтобы «грибами» находило «грибы» и «грибной»
+RUSSIAN_ENDINGS = sorted([
+    'иями', 'ями', 'ами', 'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'ых', 'их',
+    'ой', 'ей', 'ый', 'ий', 'ая', 'яя', 'ое', 'ее', 'ую', 'юю', 'ом', 'ем',
+    'ам', 'ям', 'ах', 'ях', 'ов', 'ев', 'ы', 'и', 'а', 'я', 'о', 'е', 'у', 'ю', 'ь',
+], key=len, reverse=True)
+MIN_STEM_LENGTH = 3
+
+
+def _json_text(column, name_only=False):
+    """SQL-выражение, склеивающее элементы JSON-массива в строку для индекса"""
+    value = 'value'
+    if name_only:
+        # «Говядина (лопатка) - 500 г» -> «Говядина (лопатка)»
+        value = ("CASE WHEN instr(value, ' - ') > 0 "
+                 "THEN substr(value, 1, instr(value, ' - ') - 1) ELSE value END")
+    return (f"(SELECT group_concat({value}, ' ') FROM json_each("
+            f"CASE WHEN json_valid({column}) THEN {column} ELSE '[]' END))")
+
+
+def _recipe_columns(conn):
+    return {row[1] for row in conn.execute('PRAGMA table_info(recipes)')}
+
+
+def _category_expr(columns, alias):
+    """Название категории: в recipes.db оно хранится в рецепте, в cookbook.db — в categories"""
+    if 'category' in columns:
+        return f'{alias}.category'
+    if 'category_id' in columns:
+        return f'(SELECT name FROM categories WHERE id = {alias}.category_id)'
+    return "''"
+
+
+def _without_yo(expr):
+    return f"replace(replace({expr}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def _row_values(columns, alias):
+    return ', '.join([f'{alias}.id'] + [_without_yo(expr) for expr in (
+        f'{alias}.title',
+        f"coalesce({alias}.description, '')",
+        _json_text(f'{alias}.tags'),
+        _json_text(f'{alias}.ingredients', name_only=True),
+        _category_expr(columns, alias),
+    )])
+
+
+def fts5_available(conn):
+    """Проверка, собран ли SQLite с поддержкой FTS5"""
+    try:
+        conn.execute('CREATE VIRTUAL TABLE temp._fts5_probe USING fts5(x)')
+        conn.execute('DROP TABLE temp._fts5_probe')
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def ensure_search_index(conn):
+    """Создание полнотекстового индекса и триггеров синхронизации, если их еще нет
+
+    Возвращает True, если поиск через FTS5 доступен. Индекс без триггеров
+    (остаток неудачного создания) удаляется и строится заново.
+    """
+    names = {row[0] for row in conn.execute(
+        "SELECT name FROM sqlite_master WHERE name IN (?, ?, ?, ?)", (FTS_TABLE, *FTS_TRIGGERS)
+    )}
+    if names == {FTS_TABLE, *FTS_TRIGGERS}:
+        return True
+    if not fts5_available(conn):
+        return False
+    if names:
+        _drop_search_index(conn)
+
+    columns = _recipe_columns(conn)
+    category_column = 'category' if 'category' in columns else 'category_id'
+    fts_columns = ', '.join(name for name, _ in FTS_COLUMNS)
+    weights = ', '.join(str(weight) for _, weight in FTS_COLUMNS)
+
+    try:
+        with conn:
+            conn.execute(f'''
+                CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+                    {fts_columns},
+                    tokenize = '{FTS_TOKENIZER}',
+                    prefix = '{FTS_PREFIXES}'
+                )
+            ''')
+            conn.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rank) "
+                         f"VALUES ('rank', 'bm25({weights})')")
+
+            conn.execute(f'''
+                CREATE TRIGGER {FTS_TABLE}_ai AFTER INSERT ON recipes BEGIN
+                    INSERT INTO {FTS_TABLE} (rowid, {fts_columns})
+                    VALUES ({_row_values(columns, 'new')});
+                END
+            ''')
+            conn.execute(f'''
+                CREATE TRIGGER {FTS_TABLE}_ad AFTER DELETE ON recipes BEGIN
+                    DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+                END
+            ''')
+            # Только по индексируемым колонкам, чтобы счетчик просмотров не трогал индекс
+            conn.execute(f'''
+                CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF
+                    title, description, tags, ingredients, {category_column}
+                ON recipes BEGIN
+                    DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+                    INSERT INTO {FTS_TABLE} (rowid, {fts_columns})
+                    VALUES ({_row_values(columns, 'new')});
+                END
+            ''')
+            _fill_search_index(conn, columns)
+    except sqlite3.Error:
+        logger.exception('Не удалось создать поисковый индекс')
+        # CREATE VIRTUAL TABLE фиксируется сразу и откатом не отменяется
+        _drop_search_index(conn)
+        return False
+    return True
+
+
+def _drop_search_index(conn):
+    with conn:
+        for trigger in FTS_TRIGGERS:
+            conn.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        conn.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def _fill_search_index(conn, columns):
+    fts_columns = ', '.join(name for name, _ in FTS_COLUMNS)
+    conn.execute(f'''
+        INSERT INTO {FTS_TABLE} (rowid, {fts_columns})
+        SELECT {_row_values(columns, 'r')} FROM recipes r
+    ''')
+
+
+def rebuild_search_index(conn):
+    """Полная переиндексация рецептов (например, после переименования категорий)"""
+    if not ensure_search_index(conn):
+        return False
+    with conn:
+        conn.execute(f'DELETE FROM {FTS_TABLE}')
+        _fill_search_index(conn, _recipe_columns(conn))
+    return True
+
+
+def stem(word):
+    """Грубое отсечение окончания русского слова"""
+    for ending in RUSSIAN_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= MIN_STEM_LENGTH:
+            return word[:-len(ending)]
+    return word
+
+
+def build_match_query(text):
+    """Преобразование пользовательской строки в запрос FTS5
+
+    Каждое слово превращается в префиксный запрос по его основе, слова
+    объединяются через AND. Возвращает None, если искать нечего.
+    """
+    words = re.findall(r'\w+', text.lower().replace('ё', 'е'))
+    if not words:
+        return None
+    return ' '.join(f'"{stem(word)}"*' for word in words)
+
+
+if __name__ == '__main__':
+    db_name = sys.argv[1] if len(sys.argv) > 1 else 'recipes.db'
+    conn = sqlite3.connect(db_name)
+    if rebuild_search_index(conn):
+        count = conn.execute(f'SELECT COUNT(*) FROM {FTS_TABLE}').fetchone()[0]
+        print(f'✅ Поисковый индекс {db_name} перестроен: {count} рецептов')
+    else:
+        print('❌ SQLite собран без поддержки FTS5')
+    conn.close()
@@ -0,0 +1,286 @@
+"""Журнал медленных запросов SQLite с планами выполнения
+
+Соединение из connect() замеряет каждый запрос от execute до чтения
+результата (SQLite выполняет SELECT по мере чтения строк) и передает
+его в SlowQueryLog:
+  - запросы дольше threshold секунд пишутся в журнал slow_queries
+    (logging) вместе с формой параметров - типами, без значений, - и
+    выводом EXPLAIN QUERY PLAN;
+  - по нормализованному тексту (литералы и списки IN заменены на ?)
+    копятся сводки: число вызовов, суммарное и наибольшее время, строки.
+
+Включается явно: DatabaseManager(db_name, slow_query_log=SlowQueryLog(0.05)).
+
+Отчет по типичной нагрузке DatabaseManager из корня проекта:
+    python slow_queries.py cookbook.db --threshold 20 --repeat 20 --top 15
+"""
+import argparse
+import logging
+import re
+import sqlite3
+import threading
+from collections import deque
+from time import perf_counter
+
+from sql_metrics import InstrumentedConnection, InstrumentedCursor
+
+logger = logging.getLogger('slow_queries')
+
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+def normalize(sql):
+    """Текст запроса без литералов и лишних пробелов - ключ сводки"""
+    sql = _LITERALS.sub('?', ' '.join(sql.split()))
+    return _IN_LIST.sub('(?, ...)', sql)
+
+
+def params_shape(params, many=False):
+    """Типы параметров без значений: (int, str[12], None) или {name: str}"""
+    if many:
+        params = list(params)
+        return f'{len(params)} x {params_shape(params[0])}' if params else '0 x ()'
+
+    def shape(value):
+        if value is None:
+            return 'None'
+        if isinstance(value, (str, bytes)):
+            return f'{type(value).__name__}[{len(value)}]'
+        return type(value).__name__
+
+    if isinstance(params, dict):
+        return '{' + ', '.join(f'{key}: {shape(value)}' for key, value in params.items()) + '}'
+    return '(' + ', '.join(shape(value) for value in params) + ')'
+
+
+def explain(conn, sql, params):
+    """Строки EXPLAIN QUERY PLAN с отступами по вложенности"""
+    # Встроенный Connection.execute: план не замеряется и не попадает в журнал
+    rows = sqlite3.Connection.execute(conn, f'EXPLAIN QUERY PLAN {sql}', params).fetchall()
+    depth = {0: -1}
+    lines = []
+    for node, parent, _, detail in rows:
+        depth[node] = depth.get(parent, -1) + 1
+        lines.append('  ' * depth[node] + detail)
+    return lines
+
+
+class SlowQueryLog:
+    """Медленные запросы и сводки по нормализованному тексту
+
+    threshold - порог медленного запроса в секундах; recent - сколько
+    последних медленных запросов хранить; max_statements - предел числа
+    разных запросов в сводке (вытесняются самые дешевые).
+    """
+
+    def __init__(self, threshold=0.1, explain=True, recent=50, max_statements=1000):
+        self.threshold = threshold
+        self.explain = explain
+        self.max_statements = max_statements
+        self.slow = deque(maxlen=recent)
+        self.statements = {}
+        self._lock = threading.Lock()
+
+    def record(self, conn, sql, params, seconds, rows, many=False):
+        key = normalize(sql)
+        slow = seconds >= self.threshold
+        with self._lock:
+            entry = self.statements.get(key)
+            if entry is None:
+                if len(self.statements) >= self.max_statements:
+                    cheapest = min(self.statements, key=lambda k: self.statements[k]['total'])
+                    del self.statements[cheapest]
+                entry = self.statements[key] = {'sql': key, 'count': 0, 'total': 0.0,
+                                                'max': 0.0, 'rows': 0, 'slow': 0}
+            entry['count'] += 1
+            entry['total'] += seconds
+            entry['max'] = max(entry['max'], seconds)
+            entry['rows'] += rows
+            entry['slow'] += slow
+        if slow:
+            self.log_slow(conn, sql, params, seconds, rows, many)
+
+    def log_slow(self, conn, sql, params, seconds, rows, many):
+        plan = []
+        if self.explain and not many and sql.lstrip().upper().startswith(_EXPLAINABLE):
+            try:
+                plan = explain(conn, sql, params)
+            except sqlite3.Error as e:
+                plan = [f'(план недоступен: {e})']
+        shape = params_shape(params, many)
+        self.slow.append({'sql': normalize(sql), 'seconds': seconds, 'rows': rows,
+                          'params': shape, 'plan': plan})
+        logger.warning('Медленный запрос: %.1f мс, строк: %d\n  %s\n  параметры: %s%s',
+                       seconds * 1000, rows, normalize(sql), shape,
+                       ''.join(f'\n    {line}' for line in plan))
+
+    def top(self, n=10, by='total'):
+        """Самые дорогие запросы: by - 'total', 'max' или 'count'"""
+        with self._lock:
+            entries = [dict(entry) for entry in self.statements.values()]
+        return sorted(entries, key=lambda entry: entry[by], reverse=True)[:n]
+
+    def report(self, n=10, by='total'):
+        """Текстовый отчет по top()"""
+        lines = [f'Запросы по {"суммарному времени" if by == "total" else by} '
+                 f'(медленные - от {self.threshold * 1000:g} мс):',
+                 f'{"всего мс":>10}{"вызовов":>9}{"сред. мс":>10}{"макс. мс":>10}'
+                 f'{"строк":>9}{"медл.":>7}  SQL']
+        for entry in self.top(n, by):
+            sql = entry['sql'] if len(entry['sql']) <= 100 else entry['sql'][:97] + '...'
+            lines.append(f'{entry["total"] * 1000:>10.1f}{entry["count"]:>9}'
+                         f'{entry["total"] / entry["count"] * 1000:>10.2f}'
+                         f'{entry["max"] * 1000:>10.2f}{entry["rows"]:>9}{entry["slow"]:>7}  {sql}')
+        for entry in reversed(self.slow):
+            lines.append(f'\nМедленный: {entry["seconds"] * 1000:.1f} мс, строк: {entry["rows"]}, '
+                         f'параметры: {entry["params"]}\n  {entry["sql"]}')
+            lines.extend(f'    {line}' for line in entry['plan'])
+        return '\n'.join(lines)
+
+    def reset(self):
+        with self._lock:
+            self.statements.clear()
+            self.slow.clear()
+
+
+class ProfiledCursor(InstrumentedCursor):
+    """Курсор, который замеряет запрос вместе с чтением его строк
+
+    Замер заканчивается на fetchone/fetchall, на последней пачке fetchmany
+    или итерации, на следующем execute и при закрытии курсора.
+    """
+    _statement = None  # [sql, параметры, executemany?, секунды, строки]
+
+    def execute(self, sql, parameters=()):
+        return self._run(super().execute, sql, parameters, False)
+
+    def executemany(self, sql, seq_of_parameters):
+        seq_of_parameters = list(seq_of_parameters)
+        return self._run(super().executemany, sql, seq_of_parameters, True)
+
+    def _run(self, method, sql, parameters, many):
+        self._finish()
+        started = perf_counter()
+        try:
+            result = method(sql, parameters)
+        finally:
+            self._statement = [sql, parameters, many, perf_counter() - started, 0]
+        if self.description is None:  # не SELECT: строк читать не будут
+            self._finish()
+        return result
+
+    def _read(self, method, *args):
+        started = perf_counter()
+        result = method(*args)
+        if self._statement is not None:
+            self._statement[3] += perf_counter() - started
+        return result
+
+    def fetchone(self):
+        row = self._read(super().fetchone)
+        if self._statement is not None:
+            self._statement[4] += row is not None
+            self._finish()
+        return row
+
+    def fetchall(self):
+        rows = self._read(super().fetchall)
+        if self._statement is not None:
+            self._statement[4] += len(rows)
+            self._finish()
+        return rows
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        rows = self._read(super().fetchmany, size)
+        if self._statement is not None:
+            self._statement[4] += len(rows)
+            if len(rows) < size:
+                self._finish()
+        return rows
+
+    def __next__(self):
+        try:
+            row = self._read(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+        if self._statement is not None:
+            self._statement[4] += 1
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        try:
+            self._finish()
+        except Exception:
+            pass
+
+    def _finish(self):
+        statement, self._statement = self._statement, None
+        slow_log = getattr(self.connection, 'slow_log', None)
+        if statement is not None and slow_log is not None:
+            sql, params, many, seconds, rows = statement
+            slow_log.record(self.connection, sql, params, seconds, rows, many)
+
+
+class ProfiledConnection(InstrumentedConnection):
+    slow_log = None
+
+    def cursor(self, factory=ProfiledCursor):
+        return super().cursor(factory)
+
+
+def connect(db_name, slow_log, **kwargs):
+    """sqlite3.connect, запросы которого попадают в slow_log"""
+    conn = sqlite3.connect(db_name, factory=ProfiledConnection, **kwargs)
+    conn.slow_log = slow_log
+    return conn
+
+
+def run_workload(db, repeat):
+    """Типичные запросы DatabaseManager: списки, поиск, рецепты, избранное, статистика"""
+    recipe_ids = [row['id'] for row in db.get_recipes(limit=50)]
+    for _ in range(repeat):
+        db.get_categories()
+        db.get_recipes(limit=100)
+        page = db.get_recipes_page(limit=20)
+        db.get_recipes_page(limit=20, cursor=page['next_cursor'])
+        for term in ('борщ', 'суп', 'курица', 'пирог'):
+            db.search_recipes(term)
+            db.search_recipes_page(term)
+        for recipe_id in recipe_ids[:10]:
+            db.get_recipe(recipe_id)
+            db.get_recipe_ratings(recipe_id)
+        db.get_favorites(1)
+        db.stats.loader()  # статистика без кэша снимка
+
+
+if __name__ == '__main__':
+    from database_manager import DatabaseManager
+
+    parser = argparse.ArgumentParser(description='Отчет о медленных запросах DatabaseManager')
+    parser.add_argument('db_name', nargs='?', default='cookbook.db')
+    parser.add_argument('--threshold', type=float, default=20.0, help='порог, мс')
+    parser.add_argument('--repeat', type=int, default=20, help='повторов нагрузки')
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--by', choices=['total', 'max', 'count'], default='total')
+    parser.add_argument('--log', action='store_true', help='печатать медленные запросы сразу')
+    args = parser.parse_args()
+    # Медленные запросы и так попадают в отчет
+    logger.setLevel(logging.WARNING if args.log else logging.ERROR)
+
+    slow_log = SlowQueryLog(threshold=args.threshold / 1000)
+    db = DatabaseManager(args.db_name, slow_query_log=slow_log)
+    if not db.connect():
+        raise SystemExit(1)
+    try:
+        run_workload(db, args.repeat)
+    finally:
+        db.close()
+    print(slow_log.report(args.top, args.by))
@@ -0,0 +1,274 @@
+"""Метрики запросов к базе по маршрутам и экспорт в формате Prometheus
+
+Для каждого HTTP-запроса считаются число SQL-запросов, время в SQL,
+возвращенные строки и общее время обработки. Итоги складываются в
+гистограммы по маршруту, /metrics отдает их текстом для Prometheus.
+
+Счетчики текущего запроса лежат в contextvars (track()), поэтому
+работают и в потоках werkzeug, и в async_server.py. Источники SQL:
+  - sqlite3: соединения с factory=InstrumentedConnection (Flask API,
+    пул db_pool, DatabaseManager);
+  - Django ORM: recipes/metrics.py через connection.execute_wrapper.
+Вне track() SQL не замеряется, и накладные расходы - одна проверка
+contextvar на запрос к базе.
+"""
+import contextlib
+import contextvars
+import sqlite3
+import threading
+from bisect import bisect_left
+from time import perf_counter
+
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+ROW_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+_current = contextvars.ContextVar('sql_metrics_request', default=None)
+
+
+class RequestStats:
+    """Счетчики одного запроса"""
+    __slots__ = ('queries', 'sql_seconds', 'rows')
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.rows = 0
+
+
+def current():
+    """Счетчики текущего запроса или None вне track()"""
+    return _current.get()
+
+
+def begin():
+    """Начало учета запроса в текущем контексте"""
+    stats = RequestStats()
+    _current.set(stats)
+    return stats
+
+
+def end():
+    """Конец учета; возвращает счетчики запроса"""
+    stats = _current.get()
+    _current.set(None)
+    return stats
+
+
+# ========== ГИСТОГРАММЫ ==========
+
+class Histogram:
+    """Гистограмма с фиксированными границами корзин по наборам меток"""
+
+    def __init__(self, name, documentation, labels, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.buckets = buckets
+        self.series = {}  # метки -> [по корзинам..., больше последней, сумма, количество]
+
+    def observe(self, label_values, value):
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series[label_values] = [0] * (len(self.buckets) + 3)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} histogram']
+        for label_values, series in sorted(self.series.items()):
+            labels = format_labels(self.labels, label_values)
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{labels},le="{format_number(bound)}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {series[-1]}')
+            lines.append(f'{self.name}_sum{{{labels}}} {format_number(series[-2])}')
+            lines.append(f'{self.name}_count{{{labels}}} {series[-1]}')
+        return lines
+
+
+class Counter:
+    def __init__(self, name, documentation, labels):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.series = {}
+
+    def inc(self, label_values, amount=1):
+        self.series[label_values] = self.series.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} counter']
+        for label_values, value in sorted(self.series.items()):
+            lines.append(f'{self.name}{{{format_labels(self.labels, label_values)}}} '
+                         f'{format_number(value)}')
+        return lines
+
+
+def format_labels(names, values):
+    escaped = (str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+               for value in values)
+    return ','.join(f'{name}="{value}"' for name, value in zip(names, escaped))
+
+
+def format_number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Registry:
+    """Метрики HTTP-запросов приложения"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = Counter('http_requests_total', 'Обработанные HTTP-запросы',
+                                ('route', 'method', 'status'))
+        self.duration = Histogram('http_request_duration_seconds', 'Время обработки запроса',
+                                  ('route', 'method'), DURATION_BUCKETS)
+        self.queries = Histogram('db_queries_per_request', 'SQL-запросов на HTTP-запрос',
+                                 ('route',), QUERY_BUCKETS)
+        self.sql_time = Histogram('db_query_seconds_per_request', 'Время в SQL на HTTP-запрос',
+                                  ('route',), DURATION_BUCKETS)
+        self.rows = Histogram('db_rows_per_request', 'Строк из базы на HTTP-запрос',
+                              ('route',), ROW_BUCKETS)
+        self.collectors = []  # функции, которые возвращают готовые строки метрик
+
+    def observe(self, route, method, status, seconds, stats):
+        with self._lock:
+            self.requests.inc((route, method, str(status)))
+            self.duration.observe((route, method), seconds)
+            self.queries.observe((route,), stats.queries)
+            self.sql_time.observe((route,), stats.sql_seconds)
+            self.rows.observe((route,), stats.rows)
+
+    def render(self):
+        """Все метрики в текстовом формате Prometheus"""
+        with self._lock:
+            lines = [line for metric in self.metrics() for line in metric.render()]
+        for collect in self.collectors:
+            lines += collect()
+        return '\n'.join(lines) + '\n'
+
+    def register(self, collect):
+        """Дополнительные метрики: collect() -> строки в формате Prometheus"""
+        self.collectors.append(collect)
+        return collect
+
+    def metrics(self):
+        return self.requests, self.duration, self.queries, self.sql_time, self.rows
+
+    def reset(self):
+        with self._lock:
+            for metric in self.metrics():
+                metric.series.clear()
+
+
+REGISTRY = Registry()
+
+
+@contextlib.contextmanager
+def track(route, method='', registry=REGISTRY):
+    """Учет блока кода как одного запроса: with track('/api/recipes', 'GET'): ...
+
+    Подходит и для вызовов DatabaseManager вне веб-приложения.
+    """
+    stats = begin()
+    started = perf_counter()
+    status = 200
+    try:
+        yield stats
+    except BaseException:
+        status = 500
+        raise
+    finally:
+        end()
+        registry.observe(route, method, status, perf_counter() - started, stats)
+
+
+# ========== SQLITE ==========
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Курсор, который добавляет время и строки в счетчики текущего запроса
+
+    SQLite выполняет запрос по мере чтения строк, поэтому время чтения
+    тоже считается временем SQL.
+    """
+
+    def execute(self, sql, parameters=()):
+        stats = _current.get()
+        if stats is None:
+            return super().execute(sql, parameters)
+        started = perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            stats.queries += 1
+            stats.sql_seconds += perf_counter() - started
+
+    def executemany(self, sql, seq_of_parameters):
+        stats = _current.get()
+        if stats is None:
+            return super().executemany(sql, seq_of_parameters)
+        started = perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            stats.queries += 1
+            stats.sql_seconds += perf_counter() - started
+
+    def fetchone(self):
+        stats = _current.get()
+        if stats is None:
+            return super().fetchone()
+        started = perf_counter()
+        row = super().fetchone()
+        stats.sql_seconds += perf_counter() - started
+        stats.rows += row is not None
+        return row
+
+    def fetchmany(self, size=None):
+        stats = _current.get()
+        if stats is None:
+            return super().fetchmany(self.arraysize if size is None else size)
+        started = perf_counter()
+        rows = super().fetchmany(self.arraysize if size is None else size)
+        stats.sql_seconds += perf_counter() - started
+        stats.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        stats = _current.get()
+        if stats is None:
+            return super().fetchall()
+        started = perf_counter()
+        rows = super().fetchall()
+        stats.sql_seconds += perf_counter() - started
+        stats.rows += len(rows)
+        return rows
+
+    def __next__(self):
+        stats = _current.get()
+        if stats is None:
+            return super().__next__()
+        started = perf_counter()
+        row = super().__next__()  # StopIteration в конце - не строка
+        stats.sql_seconds += perf_counter() - started
+        stats.rows += 1
+        return row
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """sqlite3.connect(..., factory=InstrumentedConnection)"""
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    # Встроенные execute* создают курсор в обход cursor()
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
@@ -0,0 +1,1192 @@
+// БАЗА ДАННЫХ РЕЦЕПТОВ - 350+ рецептов
+const RECIPES_DATABASE = (() => {
+    // Словарь ингредиентов для поиска
+    const INGREDIENTS_DICTIONARY = [
+        'курица', 'говядина', 'свинина', 'рыба', 'фарш', 'грудка', 'мясо',
+        'картофель', 'морковь', 'лук', 'чеснок', 'помидоры', 'огурцы',
+        'капуста', 'свекла', 'редис', 'зелень', 'укроп', 'петрушка', 'базилик',
+        'яйца', 'молоко', 'сливки', 'сметана', 'майонез', 'кефир', 'йогурт',
+        'сыр', 'творог', 'масло сливочное', 'масло растительное', 'оливковое масло',
+        'мука', 'сахар', 'соль', 'перец', 'лавровый лист', 'специи',
+        'рис', 'гречка', 'макароны', 'вермишель', 'овсянка', 'пшено',
+        'грибы', 'шампиньоны', 'зеленый горошек', 'фасоль', 'чечевица',
+        'томатная паста', 'уксус', 'соевый соус', 'горчица', 'кетчуп',
+        'лимон', 'яблоки', 'бананы', 'клубника', 'малина', 'вишня', 'изюм',
+        'орехи', 'миндаль', 'семечки', 'мед', 'варенье', 'шоколад', 'какао',
+        'кофе', 'чай', 'сливки', 'ванилин', 'корица', 'имбирь', 'мускатный орех'
+    ];
+
+    // Настоящие URL картинок для каждой категории
+    const images = {
+        'Супы': [
+            'https://images.unsplash.com/photo-1547592166-23ac45744acd?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80',
+            'https://images.unsplash.com/photo-1546833999-b9f581a1996d?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80',
+            'https://images.unsplash.com/photo-1505252585461-04db1eb84625?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80',
+            'https://images.unsplash.com/photo-1547592188-7823410d66a3?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80'
+        ],
+        'Основные блюда': [
+            'https://images.unsplash.com/photo-1565958011703-44f9829ba187?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80',
+            'https://images.unsplash.com/photo-1600891964092-4316c288032e?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80',
+            'https://images.unsplash.com/photo-1563379926898-05f4575a45d8?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80',
+            'https://images.unsplash.com/photo-1546069901-ba9599a7e63c?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80'
+        ],
+        'Салаты': [
+            'https://images.unsplash.com/photo-1540420773420-3366772f4999?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80',
+            'https://images.unsplash.com/photo-1512621776951-a57141f2eefd?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80',
+            'https://images.unsplash.com/photo-1505253719092-2f187c0a71eb?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80',
+            'https://images.unsplash.com/photo-1540189549336-e6e99c3679fe?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80'
+        ],
+        'Выпечка': [
+            'https://images.unsplash.com/photo-1567620905732-2d1ec7ab7445?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80',
+            'https://images.unsplash.com/photo-1555507036-ab794f27d2e9?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80',
+            'https://images.unsplash.com/photo-1533089860892-a7c6f0a88666?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80',
+            'https://images.unsplash.com/photo-1574085733277-851d9d856a3a?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80'
+        ],
+        'Десерты': [
+            'https://images.unsplash.com/photo-1578985545062-69928b1d9587?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80',
+            'https://images.unsplash.com/photo-1563729784474-d77dbb933a9e?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80',
+            'https://images.unsplash.com/photo-1519676867240-f03562e64548?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80',
+            'https://images.unsplash.com/photo-1499636136210-6f4ee915583e?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80'
+        ],
+        'Закуски': [
+            'https://images.unsplash.com/photo-1586190848861-99aa4a171e90?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80',
+            'https://images.unsplash.com/photo-1551183053-bf91a1d81141?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80',
+            'https://images.unsplash.com/photo-1556909114-f6e7ad7d3136?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80',
+            'https://images.unsplash.com/photo-1482049016688-2d3e1b311543?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80'
+        ],
+        'Напитки': [
+            'https://images.unsplash.com/photo-1490818387583-1baba5e638af?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80',
+            'https://images.unsplash.com/photo-1467003909585-2f8a72700288?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80',
+            'https://images.unsplash.com/photo-1513558161293-cdaf765ed2fd?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80',
+            'https://images.unsplash.com/photo-1509785307050-d4066910ec1e?ixlib=rb-1.2.1&auto=format&fit=crop&w=800&q=80'
+        ]
+    };
+
+    const generateRecipes = () => {
+        const categories = {
+            'Супы': [
+                { baseId: 1, base: 'Борщ', variants: ['украинский', 'классический', 'по-домашнему', 'вегетарианский', 'с грибами', 'с черносливом', 'холодный', 'зеленый', 'по-сибирски', 'летний'] },
+                { baseId: 2, base: 'Щи', variants: ['из свежей капусты', 'из квашеной капусты', 'зеленые', 'по-уральски', 'с грибами', 'с мясом', 'с курицей', 'вегетарианские', 'с картофелем', 'праздничные'] },
+                { baseId: 3, base: 'Солянка', variants: ['мясная', 'рыбная', 'грибная', 'сборная', 'по-московски', 'с колбасой', 'с копченостями', 'острая', 'с лимоном', 'царская'] },
+                { baseId: 4, base: 'Рассольник', variants: ['с перловкой', 'с рисом', 'с почками', 'вегетарианский', 'по-ленинградски', 'с курицей', 'с говядиной', 'с грибами', 'летний', 'с зеленью'] },
+                { baseId: 5, base: 'Грибной суп', variants: ['с картофелем', 'с вермишелью', 'сливочный', 'с гречкой', 'деревенский', 'с курицей', 'с сыром', 'с гренками', 'из белых грибов', 'из шампиньонов'] },
+                { baseId: 6, base: 'Куриный суп', variants: ['с лапшой', 'с вермишелью', 'с овощами', 'с рисом', 'с фрикадельками', 'с клецками', 'с зеленью', 'с яйцом', 'с галушками', 'с чесноком'] },
+                { baseId: 7, base: 'Гороховый суп', variants: ['с копченостями', 'вегетарианский', 'с гренками', 'с мятой', 'сырный', 'с сухариками', 'с беконом', 'с морковью', 'с луком', 'пряный'] },
+                { baseId: 8, base: 'Овощной суп', variants: ['минестроне', 'крем-суп', 'суп-пюре', 'с фасолью', 'летний', 'из брокколи', 'из тыквы', 'из цветной капусты', 'с сельдереем', 'с цукини'] },
+                { baseId: 9, base: 'Уха', variants: ['из речной рыбы', 'из красной рыбы', 'царская', 'двойная', 'с шафраном', 'с водкой', 'с овощами', 'с зеленью', 'с перловкой', 'с картофелем'] },
+                { baseId: 10, base: 'Харчо', variants: ['по-грузински', 'с говядиной', 'острое', 'с грецкими орехами', 'с зеленью', 'с рисом', 'с томатами', 'с чесноком', 'с кинзой', 'с аджикой'] }
+            ],
+            'Основные блюда': [
+                { baseId: 11, base: 'Пельмени', variants: ['домашние', 'сибирские', 'с мясом', 'с грибами', 'с картошкой', 'с капустой', 'с сыром', 'с зеленью', 'с курицей', 'с рыбой'] },
+                { baseId: 12, base: 'Котлеты', variants: ['куриные', 'свиные', 'говяжьи', 'рыбные', 'картофельные', 'морковные', 'капустные', 'грибные', 'сырные', 'овощные'] },
+                { baseId: 13, base: 'Голубцы', variants: ['с мясом и рисом', 'с грибами', 'ленивые', 'с соусом', 'диетические', 'с курицей', 'с овощами', 'с гречкой', 'с сыром', 'с томатами'] },
+                { baseId: 14, base: 'Жаркое', variants: ['с говядиной', 'с курицей', 'с картошкой', 'в горшочках', 'с грибами', 'с овощами', 'с бараниной', 'с свининой', 'с капустой', 'с морковью'] },
+                { baseId: 15, base: 'Плов', variants: ['узбекский', 'с курицей', 'с бараниной', 'с овощами', 'сушёный', 'с изюмом', 'с нутом', 'вегетарианский', 'с рыбой', 'с морепродуктами'] },
+                { baseId: 16, base: 'Бефстроганов', variants: ['классический', 'с грибами', 'с луком', 'в сметанном соусе', 'быстрый', 'с горчицей', 'с томатами', 'с зеленью', 'с картофелем', 'диетический'] },
+                { baseId: 17, base: 'Тефтели', variants: ['в томатном соусе', 'в сметанном соусе', 'с рисом', 'с подливкой', 'диетические', 'с грибами', 'с сыром', 'с овощами', 'с капустой', 'с морковью'] },
+                { baseId: 18, base: 'Рыба', variants: ['запеченная', 'жареная', 'на пару', 'в кляре', 'под маринадом', 'в сметане', 'с овощами', 'с лимоном', 'с зеленью', 'с сыром'] },
+                { baseId: 19, base: 'Курица', variants: ['жареная', 'запеченная', 'тушеная', 'гриль', 'в соусе', 'с овощами', 'с картофелем', 'с грибами', 'с сыром', 'с чесноком'] },
+                { baseId: 20, base: 'Стейк', variants: ['говяжий', 'свиной', 'из лосося', 'из тунца', 'с овощами', 'с соусом', 'с грибами', 'с картофелем', 'с зеленью', 'с перцем'] }
+            ],
+            'Салаты': [
+                { baseId: 21, base: 'Оливье', variants: ['классический', 'диетический', 'с колбасой', 'с курицей', 'вегетарианский', 'с крабовыми палочками', 'с яблоком', 'с грибами', 'с горошком', 'с огурцом'] },
+                { baseId: 22, base: 'Винегрет', variants: ['классический', 'с грибами', 'с фасолью', 'с яблоком', 'диетический', 'с сельдью', 'с капустой', 'с редькой', 'с зеленым горошком', 'с маслом'] },
+                { baseId: 23, base: 'Сельдь под шубой', variants: ['классическая', 'с яблоком', 'с грибами', 'с морковью', 'праздничная', 'с яйцом', 'с картофелем', 'с луком', 'с майонезом', 'с зеленью'] },
+                { baseId: 24, base: 'Цезарь', variants: ['с курицей', 'с креветками', 'с лососем', 'вегетарианский', 'с сухариками', 'с сыром', 'с беконом', 'с яйцом', 'с помидорами', 'с соусом'] },
+                { baseId: 25, base: 'Греческий', variants: ['классический', 'с фетой', 'с оливками', 'с огурцом', 'летний', 'с перцем', 'с луком', 'с зеленью', 'с маслом', 'с лимоном'] },
+                { baseId: 26, base: 'Крабовый', variants: ['с кукурузой', 'с рисом', 'с крабовыми палочками', 'с яйцом', 'легкий', 'с огурцом', 'с майонезом', 'с зеленью', 'с яблоком', 'с сыром'] },
+                { baseId: 27, base: 'Мимоза', variants: ['с консервой', 'с лососем', 'с горбушей', 'с яблоком', 'слоеный', 'с сыром', 'с маслом', 'с картофелем', 'с морковью', 'с луком'] },
+                { baseId: 28, base: 'Капрезе', variants: ['с моцареллой', 'с помидорами', 'с базиликом', 'с бальзамиком', 'итальянский', 'с оливковым маслом', 'с перцем', 'с рукколой', 'с пармезаном', 'с чесноком'] },
+                { baseId: 29, base: 'Овощной', variants: ['летний', 'зимний', 'с заправкой', 'с сыром', 'с зеленью', 'с маслом', 'с уксусом', 'с горчицей', 'с йогуртом', 'с чесноком'] },
+                { baseId: 30, base: 'Фруктовый', variants: ['с йогуртом', 'с медом', 'с орехами', 'экзотический', 'летний', 'с мороженым', 'с сиропом', 'с мятой', 'с лимоном', 'с корицей'] }
+            ],
+            'Выпечка': [
+                { baseId: 31, base: 'Блины', variants: ['русские', 'на молоке', 'на кефире', 'тонкие', 'пышные', 'дрожжевые', 'с дырочками', 'с припеком', 'с яблоком', 'с творогом'] },
+                { baseId: 32, base: 'Пироги', variants: ['с яблоками', 'с капустой', 'с мясом', 'с грибами', 'с картошкой', 'с рыбой', 'с творогом', 'с ягодами', 'с вареньем', 'с повидлом'] },
+                { baseId: 33, base: 'Пирожки', variants: ['жареные', 'печеные', 'с повидлом', 'с мясом', 'с капустой', 'с картошкой', 'с грибами', 'с творогом', 'с яблоком', 'с рыбой'] },
+                { baseId: 34, base: 'Хлеб', variants: ['домашний', 'бородинский', 'ржаной', 'с отрубями', 'бездрожжевой', 'с семечками', 'с орехами', 'с изюмом', 'с чесноком', 'с травами'] },
+                { baseId: 35, base: 'Булочки', variants: ['с корицей', 'с маком', 'с изюмом', 'сахарные', 'творожные', 'с повидлом', 'с джемом', 'с орехами', 'с шоколадом', 'с ванилью'] },
+                { baseId: 36, base: 'Пицца', variants: ['маргарита', 'пепперони', 'с ветчиной', 'с грибами', 'четыре сыра', 'с морепродуктами', 'вегетарианская', 'с курицей', 'с ананасами', 'с овощами'] },
+                { baseId: 37, base: 'Кексы', variants: ['шоколадные', 'ванильные', 'с изюмом', 'с орехами', 'лимонные', 'морковные', 'банановые', 'с ягодами', 'с корицей', 'с какао'] },
+                { baseId: 38, base: 'Пончики', variants: ['с сахарной пудрой', 'с шоколадом', 'с вареньем', 'дрожжевые', 'с глазурью', 'с повидлом', 'с кремом', 'с джемом', 'с орехами', 'с корицей'] },
+                { baseId: 39, base: 'Пряники', variants: ['тульские', 'медовые', 'имбирные', 'шоколадные', 'с орехами', 'с изюмом', 'с цукатами', 'с глазурью', 'с корицей', 'с гвоздикой'] },
+                { baseId: 40, base: 'Круассаны', variants: ['с шоколадом', 'с миндалем', 'с сыром', 'с ветчиной', 'классические', 'с джемом', 'с кремом', 'с фруктами', 'с орехами', 'с сахаром'] }
+            ],
+            'Десерты': [
+                { baseId: 41, base: 'Медовик', variants: ['классический', 'с орехами', 'со сметаной', 'с вареной сгущенкой', 'медовый', 'с грецкими орехами', 'с изюмом', 'с цукатами', 'с карамелью', 'с ягодами'] },
+                { baseId: 42, base: 'Наполеон', variants: ['классический', 'с заварным кремом', 'с масляным кремом', 'с фруктами', 'быстрый', 'с шоколадом', 'с орехами', 'с ягодами', 'с лимоном', 'с ванилью'] },
+                { baseId: 43, base: 'Сырники', variants: ['творожные', 'с изюмом', 'с яблоком', 'с бананом', 'диетические', 'с шоколадом', 'с ягодами', 'с корицей', 'с ванилью', 'с орехами'] },
+                { baseId: 44, base: 'Тирамису', variants: ['классический', 'с маскарпоне', 'с кофе', 'с какао', 'итальянский', 'с шоколадом', 'с ликером', 'с ягодами', 'с фруктами', 'с орехами'] },
+                { baseId: 45, base: 'Чизкейк', variants: ['Нью-Йорк', 'с ягодами', 'шоколадный', 'лимонный', 'без выпечки', 'с карамелью', 'с фруктами', 'с орехами', 'с шоколадом', 'с ванилью'] },
+                { baseId: 46, base: 'Брауни', variants: ['шоколадный', 'с орехами', 'с вишней', 'с морской солью', 'веганский', 'с карамелью', 'с арахисом', 'с изюмом', 'с корицей', 'с ванилью'] },
+                { baseId: 47, base: 'Пудинг', variants: ['шоколадный', 'ванильный', 'рисовый', 'хлебный', 'с фруктами', 'с ягодами', 'с орехами', 'с изюмом', 'с корицей', 'с лимоном'] },
+                { baseId: 48, base: 'Мусс', variants: ['шоколадный', 'фруктовый', 'ягодный', 'кофейный', 'воздушный', 'с лимоном', 'с малиной', 'с клубникой', 'с ванилью', 'с карамелью'] },
+                { baseId: 49, base: 'Мороженое', variants: ['ванильное', 'шоколадное', 'фруктовое', 'ягодное', 'домашнее', 'с орехами', 'с шоколадом', 'с карамелью', 'с печеньем', 'с фруктами'] },
+                { baseId: 50, base: 'Фруктовый салат', variants: ['с йогуртом', 'с медом', 'с сиропом', 'с мороженым', 'тропический', 'с орехами', 'с мятой', 'с лимоном', 'с корицей', 'с шоколадом'] }
+            ],
+            'Закуски': [
+                { baseId: 51, base: 'Бутерброды', variants: ['с красной икрой', 'с семгой', 'с сыром', 'с ветчиной', 'с овощами', 'с паштетом', 'с колбасой', 'с зеленью', 'с яйцом', 'с грибами'] },
+                { baseId: 52, base: 'Канапе', variants: ['с сыром', 'с ветчиной', 'с оливками', 'с креветками', 'с фруктами', 'с овощами', 'с колбасой', 'с икрой', 'с лососем', 'с зеленью'] },
+                { baseId: 53, base: 'Тапасы', variants: ['испанские', 'с оливками', 'с сыром', 'с морепродуктами', 'с овощами', 'с мясом', 'с хлебом', 'с соусами', 'с грибами', 'с фруктами'] },
+                { baseId: 54, base: 'Рулетики', variants: ['с баклажанами', 'с лавашом', 'с сыром', 'с ветчиной', 'с творогом', 'с курицей', 'с грибами', 'с овощами', 'с рыбой', 'с зеленью'] },
+                { baseId: 55, base: 'Фаршированные яйца', variants: ['с икрой', 'с грибами', 'с ветчиной', 'с сыром', 'с зеленью', 'с майонезом', 'с горчицей', 'с луком', 'с крабовыми палочками', 'с тунцом'] },
+                { baseId: 56, base: 'Тарталетки', variants: ['с грибами', 'с сыром', 'с печенью', 'с овощами', 'с морепродуктами', 'с мясом', 'с курицей', 'с икрой', 'с лососем', 'с творогом'] },
+                { baseId: 57, base: 'Креветки', variants: ['в кляре', 'в соусе', 'на гриле', 'в чесночном соусе', 'с авокадо', 'в кокосовой стружке', 'с лимоном', 'с зеленью', 'с соевым соусом', 'с имбирем'] },
+                { baseId: 58, base: 'Сырная тарелка', variants: ['с фруктами', 'с орехами', 'с медом', 'с виноградом', 'с хлебом', 'с оливками', 'с крекерами', 'с джемом', 'с зеленью', 'с сухофруктами'] },
+                { baseId: 59, base: 'Оливки', variants: ['с сыром', 'с лимоном', 'с травами', 'маринованные', 'фаршированные', 'с чесноком', 'с перцем', 'с анчоусами', 'с миндалем', 'с луком'] },
+                { baseId: 60, base: 'Паштет', variants: ['печеночный', 'из курицы', 'из грибов', 'овощной', 'с травами', 'с луком', 'с чесноком', 'с специями', 'с орехами', 'с яблоком'] }
+            ],
+            'Напитки': [
+                { baseId: 61, base: 'Компот', variants: ['из сухофруктов', 'из ягод', 'из свежих фруктов', 'из вишни', 'из яблок', 'из груш', 'из слив', 'из абрикосов', 'из клубники', 'из малины'] },
+                { baseId: 62, base: 'Морс', variants: ['клюквенный', 'брусничный', 'смородиновый', 'вишневый', 'облепиховый', 'малиновый', 'клубничный', 'ежевичный', 'черничный', 'крыжовниковый'] },
+                { baseId: 63, base: 'Кисель', variants: ['молочный', 'фруктовый', 'ягодный', 'овсяный', 'шоколадный', 'вишневый', 'клюквенный', 'малиновый', 'черничный', 'клубничный'] },
+                { baseId: 64, base: 'Смузи', variants: ['фруктовый', 'ягодный', 'зеленый', 'белковый', 'овощной', 'банановый', 'клубничный', 'шоколадный', 'кофейный', 'ванильный'] },
+                { baseId: 65, base: 'Коктейли', variants: ['молочный', 'фруктовый', 'алкогольный', 'безалкогольный', 'с мороженым', 'шоколадный', 'ягодный', 'кофейный', 'цитрусовый', 'тропический'] },
+                { baseId: 66, base: 'Чай', variants: ['черный', 'зеленый', 'травяной', 'фруктовый', 'с пряностями', 'с лимоном', 'с медом', 'с мятой', 'с имбирем', 'с молоком'] },
+                { baseId: 67, base: 'Кофе', variants: ['эспрессо', 'американо', 'капучино', 'латте', 'мокко', 'гляссе', 'по-восточному', 'по-турецки', 'со сливками', 'с сиропом'] },
+                { baseId: 68, base: 'Какао', variants: ['классическое', 'с молоком', 'с зефиром', 'с корицей', 'горячий шоколад', 'с маршмеллоу', 'со сливками', 'с ванилью', 'с орехами', 'с бананом'] },
+                { baseId: 69, base: 'Лимонад', variants: ['классический', 'ягодный', 'имбирный', 'мятный', 'цитрусовый', 'клубничный', 'малиновый', 'лаймовый', 'с огурцом', 'с базиликом'] },
+                { baseId: 70, base: 'Глинтвейн', variants: ['классический', 'фруктовый', 'ягодный', 'пряный', 'безалкогольный', 'с медом', 'с корицей', 'с гвоздикой', 'с апельсином', 'с яблоком'] }
+            ]
+        };
+
+        const tags = {
+            'russian': '🇷🇺 Русская кухня',
+            'quick': '⚡ Быстрое',
+            'healthy': '🌿 Здоровое',
+            'cheap': '💰 Бюджетное',
+            'holiday': '🎉 Праздничное',
+            'vegetarian': '🥬 Вегетарианское',
+            'popular': '🔥 Популярное',
+            'new': '🆕 Новое'
+        };
+
+        let allRecipes = [];
+        let idCounter = 1;
+
+        // Общие ингредиенты по категориям
+        const categoryIngredients = {
+            'Супы': ['бульон', 'вода', 'соль', 'перец', 'лавровый лист', 'зелень', 'лук', 'морковь', 'картофель'],
+            'Основные блюда': ['масло растительное', 'соль', 'перец', 'специи', 'лук', 'чеснок', 'масло сливочное'],
+            'Салаты': ['майонез', 'сметана', 'масло растительное', 'соль', 'перец', 'лимонный сок', 'уксус', 'зелень'],
+            'Выпечка': ['мука', 'яйца', 'сахар', 'соль', 'разрыхлитель', 'дрожжи', 'масло сливочное', 'молоко'],
+            'Десерты': ['сахар', 'яйца', 'мука', 'сливки', 'масло сливочное', 'ванилин', 'корица', 'какао'],
+            'Закуски': ['хлеб', 'масло сливочное', 'майонез', 'зелень', 'специи', 'соль', 'перец', 'чеснок'],
+            'Напитки': ['вода', 'сахар', 'мед', 'лимон', 'мята', 'специи', 'фрукты', 'ягоды']
+        };
+
+        for (const [category, items] of Object.entries(categories)) {
+            items.forEach(item => {
+                item.variants.forEach((variant, idx) => {
+                    const recipeTags = [];
+
+                    // Добавляем теги в зависимости от типа рецепта
+                    if (category === 'Десерты' || category === 'Выпечка') {
+                        recipeTags.push(tags.holiday);
+                    }
+
+                    if (item.baseId <= 30 || category === 'Супы' || category === 'Основные блюда') {
+                        recipeTags.push(tags.russian);
+                    }
+
+                    if (category === 'Салаты' || category === 'Напитки') {
+                        recipeTags.push(tags.healthy);
+                    }
+
+                    if (idx % 2 === 0) {
+                        recipeTags.push(tags.cheap);
+                    }
+
+                    if (idx % 3 === 0) {
+                        recipeTags.push(tags.vegetarian);
+                    }
+
+                    if (idx % 4 === 0) {
+                        recipeTags.push(tags.popular);
+                    }
+
+                    if (idx % 5 === 0) {
+                        recipeTags.push(tags.new);
+                    }
+
+                    // Быстрые рецепты
+                    const time = category === 'Напитки' || category === 'Закуски' ? 
+                        Math.floor(Math.random() * 15) + 10 : 
+                        Math.floor(Math.random() * 60) + 30;
+
+                    if (time <= 30) {
+                        recipeTags.push(tags.quick);
+                    }
+
+                    // Генерация ингредиентов
+                    const baseIngredients = categoryIngredients[category] || [];
+                    const ingredients = baseIngredients.map(ing => {
+                        const measures = ['100 г', '200 г', '300 г', '1 шт.', '2 шт.', '3 шт.', 'по вкусу', '1 ст.л.', '2 ст.л.', '1 ч.л.', '2 ч.л.', '50 г', '150 г', '250 г', '500 г', '1 л', '0.5 л'];
+                        return `${ing} - ${measures[Math.floor(Math.random() * measures.length)]}`;
+                    });
+
+                    // Добавляем дополнительные специфические ингредиенты
+                    const specificIngredients = getSpecificIngredients(category, item.base);
+                    specificIngredients.forEach(ing => {
+                        const measures = ['100 г', '200 г', '300 г', '1 шт.', '2 шт.', '3 шт.', 'по вкусу', '1 ст.л.', '2 ст.л.'];
+                        ingredients.push(`${ing} - ${measures[Math.floor(Math.random() * measures.length)]}`);
+                    });
+
+                    // Генерация шагов приготовления
+                    const steps = generateSteps(category, item.base);
+
+                    // Выбор случайной картинки для категории
+                    const categoryImages = images[category] || images['Основные блюда'];
+                    const randomImage = categoryImages[Math.floor(Math.random() * categoryImages.length)];
+
+                    allRecipes.push({
+                        id: idCounter++,
+                        title: `${item.base} ${variant}`,
+                        category: category,
+                        time: time,
+                        difficulty: time <= 30 ? 'Легкая' : time <= 60 ? 'Средняя' : 'Сложная',
+                        servings: Math.floor(Math.random() * 6) + 2,
+                        description: `${item.base} ${variant} - это вкусное и сытное блюдо, которое порадует всю семью. Идеально подходит для ${['ежедневного ужина', 'праздничного стола', 'воскресного обеда', 'быстрого перекуса', 'здорового питания'][idx % 5]}. Простой рецепт с доступными ингредиентами!`,
+                        tags: recipeTags,
+                        image: randomImage,
+                        ingredients: ingredients,
+                        steps: steps,
+                        views: Math.floor(Math.random() * 1000),
+                        rating: (Math.random() * 2 + 3).toFixed(1)
+                    });
+                });
+            });
+        }
+
+        return allRecipes;
+    };
+
+    // Функция для получения специфических ингредиентов по категории
+    function getSpecificIngredients(category, baseName) {
+        const specific = {
+            'Борщ': ['свекла', 'капуста', 'томатная паста', 'уксус', 'сметана'],
+            'Щи': ['капуста', 'квашеная капуста', 'помидоры', 'яблоки', 'грибы'],
+            'Солянка': ['колбаса', 'огурцы соленые', 'оливки', 'каперсы', 'лимон'],
+            'Пельмени': ['фарш мясной', 'мука пшеничная', 'яйца', 'вода', 'специи'],
+            'Котлеты': ['фарш', 'лук репчатый', 'хлеб белый', 'яйца', 'панировочные сухари'],
+            'Оливье': ['картофель', 'морковь', 'яйца', 'огурцы соленые', 'горошек зеленый'],
+            'Блины': ['молоко', 'яйца', 'мука пшеничная', 'сахар', 'масло растительное'],
+            'Медовик': ['мед', 'сметана', 'мука пшеничная', 'яйца', 'сахар'],
+            'Компот': ['фрукты свежие', 'сухофрукты', 'сахар', 'вода', 'лимон'],
+            'Кофе': ['кофе молотый', 'вода', 'сахар', 'молоко', 'сливки']
+        };
+
+        return specific[baseName] || ['основной ингредиент', 'специи', 'зелень', 'соус', 'добавки'];
+    }
+
+    // Функция для генерации шагов приготовления
+    function generateSteps(category, baseName) {
+        const stepTemplates = {
+            'Супы': [
+                'Тщательно промойте все овощи и мясо.',
+                'Нарежьте овощи соломкой или кубиками.',
+                'В кастрюле разогрейте масло, обжарьте лук и морковь до мягкости.',
+                'Добавьте основной ингредиент (мясо/грибы/рыбу) и обжарьте 5-7 минут.',
+                'Залейте водой или бульоном, доведите до кипения.',
+                'Добавьте остальные овощи и специи.',
+                'Варите на среднем огне 20-30 минут до готовности всех ингредиентов.',
+                'Посолите, поперчите по вкусу, добавьте свежую зелень.',
+                'Дайте супу настояться 10-15 минут перед подачей.',
+                'Подавайте горячим со сметаной или хлебом.'
+            ],
+            'Основные блюда': [
+                'Подготовьте все ингредиенты: помойте, почистите, нарежьте.',
+                'При необходимости замаринуйте мясо или рыбу в специях.',
+                'Разогрейте сковороду или духовку до нужной температуры.',
+                'Обжарьте основные ингредиенты до золотистой корочки.',
+                'Добавьте овощи и специи, тушите 10-15 минут.',
+                'Приготовьте соус согласно рецепту.',
+                'Запекайте или тушите до полной готовности.',
+                'Проверьте готовность ножом или вилкой.',
+                'Дайте блюду настояться 5-10 минут.',
+                'Подавайте с гарниром и свежей зеленью.'
+            ],
+            'Салаты': [
+                'Отварите овощи и яйца до готовности (если требуется).',
+                'Остудите и очистите отварные ингредиенты.',
+                'Нарежьте все компоненты одинаковыми кубиками или соломкой.',
+                'Приготовьте заправку: смешайте все ингредиенты для соуса.',
+                'В большой миске соедините все компоненты салата.',
+                'Заправьте салат соусом и аккуратно перемешайте.',
+                'Дайте салату настояться в холодильнике 15-20 минут.',
+                'Выложите салат в салатник или на тарелку.',
+                'Украсьте свежей зеленью или дополнительными ингредиентами.',
+                'Подавайте охлажденным.'
+            ],
+            'Десерты': [
+                'Подготовьте все ингредиенты комнатной температуры.',
+                'Смешайте сухие ингредиенты в одной миске.',
+                'В другой миске взбейте жидкие ингредиенты до однородности.',
+                'Постепенно соедините обе смеси, аккуратно перемешивая.',
+                'Разогрейте духовку до нужной температуры.',
+                'Смажьте форму маслом или застелите бумагой для выпечки.',
+                'Вылейте тесто в подготовленную форму.',
+                'Выпекайте до золотистого цвета и готовности.',
+                'Дайте десерту полностью остыть.',
+                'Украсьте по желанию и подавайте.'
+            ]
+        };
+
+        // Выбираем случайные шаги из шаблона
+        const template = stepTemplates[category] || stepTemplates['Основные блюда'];
+        const stepsCount = Math.floor(Math.random() * 4) + 6; // 6-10 шагов
+        const steps = [];
+
+        for (let i = 0; i < stepsCount; i++) {
+            const stepIndex = i % template.length;
+            steps.push(`${i + 1}. ${template[stepIndex]}`);
+        }
+
+        return steps;
+    }
+
+    return generateRecipes();
+})();
+
+// ГЛОБАЛЬНЫЕ ПЕРЕМЕННЫЕ
+let allRecipes = RECIPES_DATABASE;
+let currentFilter = 'all';
+let currentCategory = 'all';
+let currentView = 'all';
+let currentPage = 1;
+const recipesPerPage = 12;
+let favorites = JSON.parse(localStorage.getItem('favorites')) || [];
+let currentDisplayedRecipes = [];
+let selectedIngredients = [];
+let searchHistory = JSON.parse(localStorage.getItem('searchHistory')) || [];
+
+// ИНИЦИАЛИЗАЦИЯ
+function init() {
+    updateFavoritesCount();
+    showAllRecipes();
+    updateStats();
+    loadSearchHistory();
+
+    // Показываем общее количество рецептов
+    document.getElementById('recipes-count').textContent = allRecipes.length;
+
+    // Фокус на поле ввода ингредиентов
+    setTimeout(() => {
+        document.getElementById('ingredients-input').focus();
+    }, 500);
+}
+
+// ОБРАБОТКА ВВОДА ИНГРЕДИЕНТОВ
+function handleIngredientInput(event) {
+    const input = document.getElementById('ingredients-input');
+    const value = input.value.trim().toLowerCase();
+    const suggestions = document.getElementById('ingredient-suggestions');
+
+    if (event.key === 'Enter') {
+        addIngredient(value);
+        input.value = '';
+        suggestions.classList.remove('active');
+        return;
+    }
+
+    if (event.key === ',') {
+        const ingredient = value.slice(0, -1).trim();
+        if (ingredient) {
+            addIngredient(ingredient);
+            input.value = '';
+        }
+        suggestions.classList.remove('active');
+        return;
+    }
+
+    if (!value) {
+        suggestions.classList.remove('active');
+        return;
+    }
+
+    // Поиск подсказок
+    const dictionary = [
+        'курица', 'говядина', 'свинина', 'рыба', 'фарш',
+        'картофель', 'морковь', 'лук', 'чеснок', 'помидоры',
+        'яйца', 'молоко', 'сметана', 'майонез', 'сыр',
+        'мука', 'сахар', 'соль', 'перец', 'специи',
+        'рис', 'гречка', 'макароны', 'вермишель',
+        'грибы', 'шампиньоны', 'творог', 'масло',
+        'зелень', 'укроп', 'петрушка', 'базилик'
+    ];
+
+    const matches = dictionary.filter(ing => 
+        ing.toLowerCase().includes(value) && 
+        !selectedIngredients.includes(ing)
+    ).slice(0, 8);
+
+    if (matches.length > 0) {
+        suggestions.innerHTML = matches.map(ing => `
+            <div class="suggestion-item" onclick="addIngredient('${ing}')">
+                <span>🥦</span> ${ing}
+            </div>
+        `).join('');
+        suggestions.classList.add('active');
+    } else {
+        suggestions.classList.remove('active');
+    }
+}
+
+// ДОБАВЛЕНИЕ ИНГРЕДИЕНТА
+function addIngredient(ingredient) {
+    ingredient = ingredient.trim().toLowerCase();
+    if (!ingredient || selectedIngredients.includes(ingredient)) return;
+
+    selectedIngredients.push(ingredient);
+    updateSelectedIngredients();
+
+    const input = document.getElementById('ingredients-input');
+    input.value = '';
+    document.getElementById('ingredient-suggestions').classList.remove('active');
+
+    showNotification(`Добавлен ингредиент: ${ingredient}`);
+}
+
+// УДАЛЕНИЕ ИНГРЕДИЕНТА
+function removeIngredient(index) {
+    const removed = selectedIngredients.splice(index, 1)[0];
+    updateSelectedIngredients();
+    showNotification(`Удален ингредиент: ${removed}`);
+}
+
+// ОБНОВЛЕНИЕ СПИСКА ВЫБРАННЫХ ИНГРЕДИЕНТОВ
+function updateSelectedIngredients() {
+    const container = document.getElementById('selected-ingredients');
+    container.innerHTML = selectedIngredients.map((ing, index) => `
+        <div class="ingredient-tag">
+            🥦 ${ing}
+            <button class="remove-ingredient" onclick="removeIngredient(${index})">×</button>
+        </div>
+    `).join('');
+
+    // Показываем историю поиска если есть ингредиенты
+    document.getElementById('search-history').style.display = selectedIngredients.length > 0 ? 'block' : 'none';
+}
+
+// ОЧИСТКА ВСЕХ ИНГРЕДИЕНТОВ
+function clearIngredients() {
+    if (selectedIngredients.length === 0) return;
+
+    selectedIngredients = [];
+    updateSelectedIngredients();
+    document.getElementById('search-results-info').style.display = 'none';
+    document.getElementById('search-history').style.display = 'none';
+    showNotification('Все ингредиенты очищены');
+}
+
+// ПОИСК ПО ИНГРЕДИЕНТАМ: подбор и ранжирование выполняет сервер
+async function searchByIngredients() {
+    if (selectedIngredients.length === 0) {
+        showNotification('Введите хотя бы один ингредиент');
+        return;
+    }
+
+    // Сохраняем в историю
+    saveToHistory(selectedIngredients.join(', '));
+
+    const searchUrl = document.querySelector('.ingredients-input-container').dataset.searchUrl;
+    const query = encodeURIComponent(selectedIngredients.join(','));
+    let matches;
+    try {
+        const response = await fetch(`${searchUrl}?ingredients=${query}&limit=100`,
+                                     {headers: {'Accept': 'application/json'}});
+        if (!response.ok) {
+            throw new Error(response.statusText);
+        }
+        matches = await response.json();
+    } catch (error) {
+        showNotification('Не удалось выполнить поиск');
+        return;
+    }
+    currentDisplayedRecipes = matches.map(match => match.recipe);
+
+    // Обновляем интерфейс
+    updateSearchResults(matches);
+    showSearchResults(matches);
+
+    // Показываем историю
+    document.getElementById('search-history').style.display = 'block';
+}
+
+// ОБНОВЛЕНИЕ РЕЗУЛЬТАТОВ ПОИСКА
+function updateSearchResults(matches) {
+    const info = document.getElementById('search-results-info');
+    const count = document.getElementById('results-count');
+    const missing = document.getElementById('missing-ingredients');
+
+    count.textContent = matches.length;
+
+    if (matches.length > 0) {
+        // Сервер отдает результаты по убыванию совпадения
+        missing.innerHTML = `
+            <div>Лучшее совпадение: <strong>${matches[0].match_percentage}%</strong></div>
+            <div>Найдено рецептов, которые можно приготовить из ваших ингредиентов</div>
+        `;
+    } else {
+        missing.innerHTML = `
+            <div><strong>Не найдено рецептов по вашим ингредиентам</strong></div>
+            <div>Попробуйте добавить больше ингредиентов</div>
+        `;
+    }
+
+    info.style.display = 'block';
+}
+
+// КАРТОЧКА НАЙДЕННОГО РЕЦЕПТА
+function searchResultCard(match) {
+    const recipe = match.recipe;
+    const detailUrl = document.getElementById('catalog-container').dataset.detailUrl;
+    const card = document.createElement('a');
+    card.className = 'recipe-card';
+    card.href = detailUrl.replace('/0/', `/${recipe.id}/`);
+    card.dataset.id = recipe.id;
+    card.innerHTML = `
+        <div class="card-content">
+            <h3 class="card-title"><span></span></h3>
+            <p class="card-description"></p>
+            <div class="card-meta"><span></span><span></span><span></span></div>
+            <div class="missing-ingredients"></div>
+        </div>
+    `;
+    card.querySelector('.card-title span').textContent = recipe.title;
+    card.querySelector('.card-description').textContent = recipe.description || '';
+    const meta = card.querySelectorAll('.card-meta span');
+    meta[0].textContent = `✅ ${match.match_percentage}%`;
+    meta[1].textContent = recipe.category_display;
+    meta[2].textContent = `⏱ ${recipe.cooking_time} мин`;
+    card.querySelector('.missing-ingredients').textContent = match.missing.length > 0 ?
+        `Не хватает: ${match.missing.join(', ')}` : 'Все ингредиенты есть';
+    return card;
+}
+
+// ПОКАЗ РЕЗУЛЬТАТОВ ПОИСКА
+function showSearchResults(matches) {
+    currentView = 'search';
+    currentPage = 1;
+    document.getElementById('pagination').style.display = 'none';
+
+    const container = document.getElementById('recipes-container');
+    if (matches.length === 0) {
+        container.innerHTML = `
+            <div style="grid-column: 1 / -1; text-align: center; padding: 60px; color: #666;">
+                <div style="font-size: 60px; margin-bottom: 20px;">🔍</div>
+                <h3 style="font-family: 'Dancing Script', cursive; font-size: 32px; color: #2d5a3b; margin-bottom: 15px;">
+                    Рецепты не найдены
+                </h3>
+                <p>Попробуйте изменить ингредиенты</p>
+                <button onclick="showAllRecipes()" style="margin-top: 20px; padding: 12px 24px; background: linear-gradient(135deg, #7cb342, #4caf50); color: white; border: none; border-radius: 12px; cursor: pointer; font-family: 'Raleway', sans-serif;">
+                    Показать все рецепты
+                </button>
+            </div>
+        `;
+        return;
+    }
+
+    container.replaceChildren(...matches.map(searchResultCard));
+    updateStats();
+
+    // Обновляем заголовок
+    document.getElementById('page-title').textContent = '🔍 Найденные рецепты';
+    document.getElementById('page-description').textContent = 
+        `По вашим ингредиентам найдено ${matches.length} рецептов`;
+}
+
+// ИСТОРИЯ ПОИСКА
+function saveToHistory(searchQuery) {
+    const historyItem = {
+        query: searchQuery,
+        timestamp: new Date().toISOString(),
+        count: selectedIngredients.length
+    };
+
+    searchHistory.unshift(historyItem);
+    if (searchHistory.length > 10) {
+        searchHistory = searchHistory.slice(0, 10);
+    }
+
+    localStorage.setItem('searchHistory', JSON.stringify(searchHistory));
+    loadSearchHistory();
+}
+
+function loadSearchHistory() {
+    const container = document.getElementById('history-items');
+    if (searchHistory.length === 0) {
+        container.innerHTML = '<div style="color: #666; font-style: italic;">История поиска пуста</div>';
+        return;
+    }
+
+    container.innerHTML = searchHistory.map((item, index) => `
+        <div class="history-item" onclick="loadHistorySearch(${index})">
+            🔍 ${item.query}
+            <span style="font-size: 12px; color: #666;">(${item.count} ингр.)</span>
+        </div>
+    `).join('');
+}
+
+function loadHistorySearch(index) {
+    const item = searchHistory[index];
+    selectedIngredients = item.query.split(', ').map(i => i.trim());
+    updateSelectedIngredients();
+    searchByIngredients();
+}
+
+function clearSearchHistory() {
+    if (confirm('Очистить всю историю поиска?')) {
+        searchHistory = [];
+        localStorage.removeItem('searchHistory');
+        loadSearchHistory();
+        showNotification('История поиска очищена');
+    }
+}
+
+// ОТОБРАЖЕНИЕ РЕЦЕПТОВ
+function displayRecipes(recipes, page = 1) {
+    const container = document.getElementById('recipes-container');
+    const pagination = document.getElementById('pagination');
+
+    currentPage = page;
+
+    if (recipes.length === 0) {
+        container.innerHTML = `
+            <div style="grid-column: 1 / -1; text-align: center; padding: 60px; color: #666;">
+                <div style="font-size: 60px; margin-bottom: 20px;">🍳</div>
+                <h3 style="font-family: 'Dancing Script', cursive; font-size: 32px; color: #2d5a3b; margin-bottom: 15px;">
+                    Рецепты не найдены
+                </h3>
+                <p>Попробуйте изменить фильтры или поисковый запрос</p>
+            </div>
+        `;
+        pagination.style.display = 'none';
+        return;
+    }
+
+    // Пагинация
+    const totalPages = Math.ceil(recipes.length / recipesPerPage);
+    const startIndex = (page - 1) * recipesPerPage;
+    const endIndex = startIndex + recipesPerPage;
+    const pageRecipes = recipes.slice(startIndex, endIndex);
+
+    container.innerHTML = '';
+
+    pageRecipes.forEach(recipe => {
+        const isFavorite = favorites.includes(recipe.id);
+        const icon = getCategoryIcon(recipe.category);
+        const difficultyColors = {
+            'Легкая': '#4CAF50',
+            'Средняя': '#FF9800',
+            'Сложная': '#F44336'
+        };
+
+        const card = document.createElement('div');
+        card.className = 'recipe-card';
+        card.setAttribute('data-id', recipe.id);
+        card.innerHTML = `
+            <div class="card-image">
+                <img src="${recipe.image}" alt="${recipe.title}" loading="lazy">
+                <div style="position: absolute; top: 10px; right: 10px; background: rgba(0,0,0,0.7); color: white; padding: 5px 10px; border-radius: 15px; font-size: 12px;">
+                    ⭐ ${recipe.rating}
+                </div>
+            </div>
+            <div class="card-content">
+                <h3 class="card-title">
+                    <span>${recipe.title}</span>
+                    <span class="favorite-icon" onclick="toggleFavorite(${recipe.id}, event)">${isFavorite ? '★' : '☆'}</span>
+                </h3>
+                <p class="card-description">${recipe.description}</p>
+                <div class="card-meta">
+                    <span>${icon} ${recipe.category}</span>
+                    <span>⏱ ${recipe.time} мин</span>
+                    <span style="color: ${difficultyColors[recipe.difficulty]}">${recipe.difficulty}</span>
+                </div>
+                <div style="margin-top: 15px; display: flex; flex-wrap: wrap; gap: 8px;">
+                    ${recipe.tags.map(tag => `
+                        <span style="background: #7cb342; color: white; padding: 4px 10px; border-radius: 12px; font-size: 12px;">
+                            ${tag}
+                        </span>
+                    `).join('')}
+                </div>
+            </div>
+        `;
+
+        card.addEventListener('click', (e) => {
+            if (!e.target.classList.contains('favorite-icon')) {
+                showRecipeModal(recipe.id);
+            }
+        });
+
+        container.appendChild(card);
+    });
+
+    // Настройка пагинации
+    if (totalPages > 1) {
+        pagination.style.display = 'flex';
+        document.getElementById('page-info').textContent = `Страница ${page} из ${totalPages}`;
+        document.getElementById('prev-btn').disabled = page === 1;
+        document.getElementById('next-btn').disabled = page === totalPages;
+    } else {
+        pagination.style.display = 'none';
+    }
+
+    updateStats();
+}
+
+// ФИЛЬТРАЦИЯ
+function filterRecipes(filterType) {
+    currentFilter = filterType;
+    document.querySelectorAll('.subcategory-btn').forEach(btn => {
+        btn.classList.remove('active');
+    });
+    event.target.classList.add('active');
+    applyFilters();
+}
+
+function loadCategory(category) {
+    currentCategory = category;
+    document.querySelectorAll('.category-btn').forEach(btn => {
+        btn.classList.remove('active');
+    });
+    event.target?.closest('.category-btn')?.classList.add('active');
+    applyFilters();
+}
+
+function applyFilters() {
+    let filteredRecipes = allRecipes;
+
+    // Фильтр по категории
+    if (currentCategory !== 'all') {
+        filteredRecipes = filteredRecipes.filter(recipe => 
+            recipe.category === currentCategory
+        );
+    }
+
+    // Фильтр по особенностям
+    if (currentFilter !== 'all') {
+        filteredRecipes = filteredRecipes.filter(recipe => {
+            if (currentFilter === 'russian') {
+                return recipe.tags.some(tag => tag.includes('Русская'));
+            } else if (currentFilter === 'quick') {
+                return recipe.time <= 30;
+            } else if (currentFilter === 'healthy') {
+                return recipe.tags.some(tag => tag.includes('Здоровое'));
+            } else if (currentFilter === 'cheap') {
+                return recipe.tags.some(tag => tag.includes('Бюджетное'));
+            } else if (currentFilter === 'holiday') {
+                return recipe.tags.some(tag => tag.includes('Праздничное'));
+            }
+            return true;
+        });
+    }
+
+    // Фильтр по виду
+    if (currentView === 'favorites') {
+        filteredRecipes = filteredRecipes.filter(recipe => 
+            favorites.includes(recipe.id)
+        );
+    } else if (currentView === 'popular') {
+        filteredRecipes = filteredRecipes.sort((a, b) => b.views - a.views);
+    } else if (currentView === 'new') {
+        filteredRecipes = filteredRecipes.sort((a, b) => b.id - a.id);
+    }
+
+    currentPage = 1;
+    currentDisplayedRecipes = filteredRecipes;
+    displayRecipes(filteredRecipes, 1);
+    updatePageTitle(filteredRecipes.length);
+}
+
+// ТАБЫ
+function showAllRecipes() {
+    currentView = 'all';
+    updateTabs('all');
+    document.getElementById('search-results-info').style.display = 'none';
+    applyFilters();
+}
+
+function showFavorites() {
+    currentView = 'favorites';
+    updateTabs('favorites');
+    document.getElementById('search-results-info').style.display = 'none';
+    applyFilters();
+}
+
+function showPopular() {
+    currentView = 'popular';
+    updateTabs('popular');
+    document.getElementById('search-results-info').style.display = 'none';
+    applyFilters();
+}
+
+function showNew() {
+    currentView = 'new';
+    updateTabs('new');
+    document.getElementById('search-results-info').style.display = 'none';
+    applyFilters();
+}
+
+function updateTabs(active) {
+    document.querySelectorAll('.tab-btn').forEach(btn => {
+        btn.classList.remove('active');
+    });
+    const tabs = document.querySelectorAll('.tab-btn');
+    const tabMap = { 'all': 0, 'favorites': 1, 'popular': 2, 'new': 3 };
+    if (tabs[tabMap[active]]) {
+        tabs[tabMap[active]].classList.add('active');
+    }
+}
+
+// ИЗБРАННОЕ
+function toggleFavorite(recipeId, event = null) {
+    if (event) event.stopPropagation();
+
+    const index = favorites.indexOf(recipeId);
+    if (index === -1) {
+        favorites.push(recipeId);
+        showNotification('Рецепт добавлен в избранное!');
+    } else {
+        favorites.splice(index, 1);
+        showNotification('Рецепт удален из избранного');
+    }
+
+    localStorage.setItem('favorites', JSON.stringify(favorites));
+    updateFavoritesCount();
+
+    // Обновляем отображение
+    if (currentView === 'favorites') {
+        showFavorites();
+    } else {
+        applyFilters();
+    }
+}
+
+function toggleFavoriteModal() {
+    const recipeId = parseInt(document.getElementById('recipe-modal').getAttribute('data-recipe-id'));
+    if (recipeId) {
+        toggleFavorite(recipeId);
+        const isFavorite = favorites.includes(recipeId);
+        document.getElementById('modal-favorite').textContent = isFavorite ? '★' : '☆';
+    }
+}
+
+function updateFavoritesCount() {
+    document.getElementById('favorites-count-tab').textContent = favorites.length;
+}
+
+// ПОИСК
+function searchRecipes() {
+    const searchTerm = document.getElementById('search-input').value.toLowerCase().trim();
+
+    if (searchTerm.length < 2) {
+        applyFilters();
+        return;
+    }
+
+    const filteredRecipes = allRecipes.filter(recipe => 
+        recipe.title.toLowerCase().includes(searchTerm) ||
+        recipe.description.toLowerCase().includes(searchTerm) ||
+        recipe.tags.some(tag => tag.toLowerCase().includes(searchTerm)) ||
+        recipe.ingredients.some(ing => ing.toLowerCase().includes(searchTerm))
+    );
+
+    currentPage = 1;
+    currentDisplayedRecipes = filteredRecipes;
+    displayRecipes(filteredRecipes, 1);
+
+    document.getElementById('page-title').textContent = `🔍 Результаты поиска`;
+    document.getElementById('page-description').textContent = 
+        `Найдено ${filteredRecipes.length} рецептов по запросу "${searchTerm}"`;
+}
+
+// ПАГИНАЦИЯ
+function nextPage() {
+    const totalPages = Math.ceil(currentDisplayedRecipes.length / recipesPerPage);
+    if (currentPage < totalPages) {
+        displayRecipes(currentDisplayedRecipes, currentPage + 1);
+    }
+}
+
+function prevPage() {
+    if (currentPage > 1) {
+        displayRecipes(currentDisplayedRecipes, currentPage - 1);
+    }
+}
+
+// МОДАЛЬНОЕ ОКНО
+function showRecipeModal(recipeId) {
+    const recipe = allRecipes.find(r => r.id === recipeId);
+    if (!recipe) return;
+
+    const modal = document.getElementById('recipe-modal');
+    modal.setAttribute('data-recipe-id', recipeId);
+    modal.classList.add('active');
+    document.body.style.overflow = 'hidden';
+
+    const isFavorite = favorites.includes(recipeId);
+
+    document.getElementById('modal-recipe-title').innerHTML = `
+        <span>${recipe.title}</span>
+        <span class="modal-favorite" id="modal-favorite" onclick="toggleFavoriteModal()">${isFavorite ? '★' : '☆'}</span>
+    `;
+
+    document.getElementById('modal-recipe-category').innerHTML = `
+        <span>${getCategoryIcon(recipe.category)} ${recipe.category}</span>
+        <span>⏱ ${recipe.time} мин</span>
+        <span>👥 ${recipe.servings} порций</span>
+        <span style="background: white; color: #2d5a3b; padding: 2px 8px; border-radius: 10px;">${recipe.difficulty}</span>
+        <span style="background: white; color: #2d5a3b; padding: 2px 8px; border-radius: 10px;">⭐ ${recipe.rating}</span>
+    `;
+
+    const ingredientsList = document.getElementById('modal-ingredients');
+    ingredientsList.innerHTML = '';
+    recipe.ingredients.forEach(ingredient => {
+        const li = document.createElement('li');
+        li.textContent = ingredient;
+        ingredientsList.appendChild(li);
+    });
+
+    const stepsList = document.getElementById('modal-steps');
+    stepsList.innerHTML = '';
+    recipe.steps.forEach((step, index) => {
+        const li = document.createElement('li');
+        li.textContent = step;
+        stepsList.appendChild(li);
+    });
+
+    const tagsContainer = document.getElementById('modal-tags');
+    tagsContainer.innerHTML = '';
+    recipe.tags.forEach(tag => {
+        const tagSpan = document.createElement('span');
+        tagSpan.className = 'recipe-tag';
+        tagSpan.innerHTML = `🏷️ ${tag}`;
+        tagsContainer.appendChild(tagSpan);
+    });
+}
+
+function closeRecipe() {
+    document.getElementById('recipe-modal').classList.remove('active');
+    document.body.style.overflow = 'auto';
+}
+
+// СТАТИСТИКА
+function updateStats() {
+    const totalRecipes = allRecipes.length;
+    let displayedCount = currentDisplayedRecipes.length;
+
+    // Для избранного считаем только избранные рецепты
+    if (currentView === 'favorites') {
+        displayedCount = favorites.length;
+    }
+
+    document.getElementById('recipes-count').textContent = totalRecipes;
+    document.getElementById('active-count').textContent = displayedCount;
+    document.getElementById('favorites-total').textContent = favorites.length;
+}
+
+function updatePageTitle(count) {
+    const filterNames = {
+        'all': 'Все рецепты',
+        'russian': 'Русские',
+        'quick': 'Быстрые',
+        'healthy': 'Здоровые',
+        'cheap': 'Бюджетные',
+        'holiday': 'Праздничные'
+    };
+
+    const categoryNames = {
+        'all': 'всех блюд',
+        'Супы': 'супов',
+        'Основные блюда': 'основных блюд',
+        'Салаты': 'салатов',
+        'Выпечка': 'выпечки',
+        'Десерты': 'десертов',
+        'Закуски': 'закусок',
+        'Напитки': 'напитков'
+    };
+
+    const viewNames = {
+        'all': 'Все рецепты',
+        'favorites': 'Избранное',
+        'popular': 'Популярные',
+        'new': 'Новые'
+    };
+
+    let title = '✨ Кулинарная книга';
+    let description = `${allRecipes.length} рецептов`;
+
+    if (currentView !== 'all') {
+        title = `✨ ${viewNames[currentView]}`;
+    }
+
+    if (currentCategory !== 'all') {
+        title = `✨ ${categoryNames[currentCategory]}`;
+    }
+
+    if (currentFilter !== 'all') {
+        title = `✨ ${filterNames[currentFilter]} рецепты`;
+    }
+
+    document.getElementById('page-title').textContent = title;
+    document.getElementById('page-description').textContent = `${count} рецептов найдено`;
+}
+
+// УТИЛИТЫ
+function getCategoryIcon(category) {
+    const icons = {
+        'Супы': '🥣',
+        'Основные блюда': '🍛',
+        'Салаты': '🥗',
+        'Выпечка': '🥐',
+        'Десерты': '🍰',
+        'Закуски': '🍤',
+        'Напитки': '🥤'
+    };
+    return icons[category] || '✨';
+}
+
+function showNotification(message) {
+    const notification = document.createElement('div');
+    notification.style.cssText = `
+        position: fixed;
+        top: 20px;
+        right: 20px;
+        background: linear-gradient(135deg, #7cb342, #4caf50);
+        color: white;
+        padding: 15px 25px;
+        border-radius: 10px;
+        box-shadow: 0 5px 15px rgba(0,0,0,0.3);
+        z-index: 10000;
+        font-family: 'Raleway', sans-serif;
+        animation: slideIn 0.3s ease;
+    `;
+
+    notification.innerHTML = `
+        <div style="display: flex; align-items: center; gap: 10px;">
+            <span>⭐</span>
+            <span>${message}</span>
+        </div>
+    `;
+
+    document.body.appendChild(notification);
+
+    setTimeout(() => {
+        notification.style.animation = 'slideOut 0.3s ease';
+        setTimeout(() => {
+            document.body.removeChild(notification);
+        }, 300);
+    }, 3000);
+}
+
+// ЗАГРУЗКА
+document.addEventListener('DOMContentLoaded', () => {
+    init();
+
+    // Добавляем стили для анимации уведомлений
+    const style = document.createElement('style');
+    style.textContent = `
+        @keyframes slideIn {
+            from { transform: translateX(100%); opacity: 0; }
+            to { transform: translateX(0); opacity: 1; }
+        }
+        @keyframes slideOut {
+            from { transform: translateX(0); opacity: 1; }
+            to { transform: translateX(100%); opacity: 0; }
+        }
+    `;
+    document.head.appendChild(style);
+
+    // Закрытие модального окна
+    document.getElementById('recipe-modal').addEventListener('click', function(e) {
+        if (e.target === this) {
+            closeRecipe();
+        }
+    });
+
+    // Закрытие по Escape
+    document.addEventListener('keydown', function(e) {
+        if (e.key === 'Escape') {
+            closeRecipe();
+        }
+    });
+
+    // Закрытие подсказок при клике вне
+    document.addEventListener('click', function(e) {
+        const suggestions = document.getElementById('ingredient-suggestions');
+        const input = document.getElementById('ingredients-input');
+
+        if (suggestions && suggestions.classList.contains('active') && 
+            !suggestions.contains(e.target) && e.target !== input) {
+            suggestions.classList.remove('active');
+        }
+    });
+});
+
+// БЕСКОНЕЧНАЯ ПРОКРУТКА КАТАЛОГА
+// Следующая страница ленты запрашивается, когда индикатор загрузки
+// появляется на экране; ссылку на следующую страницу дает сам API
+(function() {
+    const container = document.getElementById('catalog-container');
+    const loader = document.getElementById('catalog-loader');
+    if (!loader || !('IntersectionObserver' in window)) {
+        return;
+    }
+
+    let nextUrl = loader.dataset.nextUrl;
+    let loading = false;
+
+    function catalogCard(recipe) {
+        const card = document.createElement('a');
+        card.className = 'recipe-card';
+        card.href = container.dataset.detailUrl.replace('/0/', `/${recipe.id}/`);
+        card.dataset.id = recipe.id;
+        card.innerHTML = `
+            <div class="card-content">
+                <h3 class="card-title"><span></span></h3>
+                <p class="card-description"></p>
+                <div class="card-meta"><span></span><span></span></div>
+            </div>
+        `;
+        const description = recipe.description || '';
+        card.querySelector('.card-title span').textContent = recipe.title;
+        card.querySelector('.card-description').textContent =
+            description.length > 140 ? description.slice(0, 139) + '…' : description;
+        const meta = card.querySelectorAll('.card-meta span');
+        meta[0].textContent = recipe.category_display;
+        meta[1].textContent = `⏱ ${recipe.cooking_time} мин`;
+        return card;
+    }
+
+    const observer = new IntersectionObserver(async function(entries) {
+        if (!entries[0].isIntersecting || loading || !nextUrl) {
+            return;
+        }
+        loading = true;
+        try {
+            const response = await fetch(nextUrl, {headers: {'Accept': 'application/json'}});
+            if (!response.ok) {
+                throw new Error(response.statusText);
+            }
+            const page = await response.json();
+            page.results.forEach(recipe => container.appendChild(catalogCard(recipe)));
+            nextUrl = page.next;
+            if (!nextUrl) {
+                observer.disconnect();
+                loader.remove();
+            } else {
+                // Индикатор мог остаться на экране: наблюдение заново вызовет проверку
+                observer.unobserve(loader);
+                observer.observe(loader);
+            }
+        } catch (error) {
+            loader.textContent = 'Не удалось загрузить рецепты';
+            observer.disconnect();
+        } finally {
+            loading = false;
+        }
+    }, {rootMargin: '600px'});
+
+    observer.observe(loader);
+})();
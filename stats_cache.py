@@ -0,0 +1,150 @@
+import copy
+import logging
+import threading
+import time
+
+logger = logging.getLogger('stats_cache')
+
+COUNTED_TABLES = ('recipes', 'users', 'categories', 'favorites')
+
+
+def ensure_counters(conn):
+    """Создание таблиц счетчиков и триггеров, которые их поддерживают
+
+    table_counters хранит число строк в каждой таблице из COUNTED_TABLES,
+    author_stats - число рецептов каждого автора. После создания статистика
+    читается по первичному ключу вместо COUNT(*) и GROUP BY по всей таблице.
+    """
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'table_counters'"
+    ).fetchone()
+    if exists:
+        return
+
+    tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    with conn:
+        conn.execute('''
+            CREATE TABLE table_counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        ''')
+        for table in COUNTED_TABLES:
+            if table not in tables:
+                continue
+            conn.execute(f"INSERT INTO table_counters (name, value) "
+                         f"SELECT '{table}', COUNT(*) FROM {table}")
+            conn.execute(f'''
+                CREATE TRIGGER {table}_count_ai AFTER INSERT ON {table} BEGIN
+                    UPDATE table_counters SET value = value + 1 WHERE name = '{table}';
+                END
+            ''')
+            conn.execute(f'''
+                CREATE TRIGGER {table}_count_ad AFTER DELETE ON {table} BEGIN
+                    UPDATE table_counters SET value = value - 1 WHERE name = '{table}';
+                END
+            ''')
+
+        conn.execute('''
+            CREATE TABLE author_stats (
+                author_id INTEGER PRIMARY KEY,
+                recipe_count INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        conn.execute('CREATE INDEX idx_author_stats_count ON author_stats (recipe_count)')
+        conn.execute('''
+            INSERT INTO author_stats (author_id, recipe_count)
+            SELECT author_id, COUNT(*) FROM recipes
+            WHERE author_id IS NOT NULL GROUP BY author_id
+        ''')
+        conn.execute('''
+            CREATE TRIGGER author_stats_ai AFTER INSERT ON recipes
+            WHEN new.author_id IS NOT NULL BEGIN
+                INSERT INTO author_stats (author_id, recipe_count) VALUES (new.author_id, 1)
+                ON CONFLICT (author_id) DO UPDATE SET recipe_count = recipe_count + 1;
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER author_stats_ad AFTER DELETE ON recipes
+            WHEN old.author_id IS NOT NULL BEGIN
+                UPDATE author_stats SET recipe_count = recipe_count - 1
+                WHERE author_id = old.author_id;
+            END
+        ''')
+        conn.execute('''
+            CREATE TRIGGER author_stats_au AFTER UPDATE OF author_id ON recipes
+            WHEN old.author_id IS NOT new.author_id BEGIN
+                UPDATE author_stats SET recipe_count = recipe_count - 1
+                WHERE author_id = old.author_id;
+                INSERT INTO author_stats (author_id, recipe_count)
+                SELECT new.author_id, 1 WHERE new.author_id IS NOT NULL
+                ON CONFLICT (author_id) DO UPDATE SET recipe_count = recipe_count + 1;
+            END
+        ''')
+
+
+def read_counters(conn):
+    """Значения всех счетчиков одним запросом: {'recipes': 350, ...}"""
+    counters = {table: 0 for table in COUNTED_TABLES}
+    counters.update(conn.execute('SELECT name, value FROM table_counters').fetchall())
+    return counters
+
+
+class StatsSnapshot:
+    """Кэш статистики с временем жизни ttl секунд
+
+    Пока снимок свежий, get() отдает его без обращения к базе. Устаревший
+    снимок тоже отдается сразу, а новый строится в фоновом потоке, так что
+    ждать загрузки приходится только при самом первом обращении.
+    Каждый вызов получает свою копию снимка, поэтому изменения результата
+    у одного вызывающего не видны остальным.
+    """
+
+    def __init__(self, loader, ttl=30.0, clock=time.monotonic):
+        self.loader = loader
+        self.ttl = ttl
+        self.clock = clock
+        self._value = None
+        self._loaded_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+
+    def _load(self):
+        value = self.loader()
+        with self._lock:
+            self._value = value
+            self._loaded_at = self.clock()
+        return copy.deepcopy(value)
+
+    def _refresh_in_background(self):
+        try:
+            self._load()
+        except Exception:
+            logger.exception('Ошибка обновления статистики')
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def get(self):
+        """Текущий снимок статистики"""
+        with self._lock:
+            value = self._value
+            stale = self.clock() - self._loaded_at >= self.ttl
+            start_refresh = value is not None and stale and not self._refreshing
+            if start_refresh:
+                self._refreshing = True
+        if value is None:
+            return self._load()
+        if start_refresh:
+            threading.Thread(target=self._refresh_in_background,
+                             name='stats-refresh', daemon=True).start()
+        return copy.deepcopy(value)
+
+    def invalidate(self):
+        """Пометить снимок устаревшим"""
+        with self._lock:
+            self._loaded_at = 0.0
+
+    def age(self):
+        """Возраст снимка в секундах"""
+        return self.clock() - self._loaded_at if self._value is not None else None
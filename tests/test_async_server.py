@@ -0,0 +1,140 @@
+"""Асинхронный сервер (async_server.py) отдает то же API, что и Flask
+
+Запуск из корня проекта:
+    python -m unittest tests.test_async_server
+"""
+import asyncio
+import http.client
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from urllib.parse import quote
+
+from async_server import AsyncWSGIServer
+from benchmarks.fixtures import create_api_database
+from database import app
+
+
+class AsyncServerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+        db_name = create_api_database(os.path.join(self.tmpdir, 'recipes.db'), recipes=60)
+        old_config = dict(app.config)
+        app.config.update(DATABASE=db_name, DB_POOL_ENABLED=False, STREAM_BATCH_SIZE=7)
+        self.addCleanup(app.config.update, old_config)
+        self.flask = app.test_client()
+
+        self.loop = asyncio.new_event_loop()
+        thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        thread.start()
+        self.server = AsyncWSGIServer(app, workers=1)
+        self.address = self.run_async(self.server.start('127.0.0.1', 0))
+        self.addCleanup(self.stop, thread)
+
+    def run_async(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result(10)
+
+    def stop(self, thread):
+        self.run_async(self.server.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        thread.join(5)
+        self.loop.close()
+
+    def connection(self):
+        conn = http.client.HTTPConnection(*self.address, timeout=10)
+        self.addCleanup(conn.close)
+        return conn
+
+    def request(self, conn, method, url, body=None, headers=None):
+        conn.request(method, url, body=body, headers=headers or {})
+        response = conn.getresponse()
+        return response, response.read()
+
+    def test_same_json_as_flask(self):
+        conn = self.connection()  # все запросы - через одно keep-alive соединение
+        for url in ['/api/recipes?limit=5', '/api/recipes/3', '/api/categories',
+                    '/api/recipes/search?q=' + quote('борщ'), '/api/authors',
+                    '/api/recipes?stream=1']:
+            with self.subTest(url=url):
+                response, body = self.request(conn, 'GET', url)
+                self.assertEqual(response.status, 200)
+                received, expected = json.loads(body), self.flask.get(url).get_json()
+                if 'recipe' in expected:
+                    # просмотры копятся между запросами
+                    received['recipe'].pop('views')
+                    expected['recipe'].pop('views')
+                self.assertEqual(received, expected)
+
+    def test_session_and_post(self):
+        conn = self.connection()
+        response, body = self.request(
+            conn, 'POST', '/api/auth/login',
+            body=json.dumps({'email': 'user1@mail.ru', 'password': 'pass1'}),
+            headers={'Content-Type': 'application/json'})
+        self.assertTrue(json.loads(body)['success'])
+        cookie = response.getheader('Set-Cookie').split(';')[0]
+
+        response, body = self.request(conn, 'GET', '/api/favorites?limit=100',
+                                      headers={'Cookie': cookie})
+        with self.flask.session_transaction() as session:
+            session['user_id'] = 1
+        self.assertEqual(json.loads(body), self.flask.get('/api/favorites?limit=100').get_json())
+
+    def test_repeated_cookie_headers(self):
+        conn = self.connection()
+        response, _ = self.request(
+            conn, 'POST', '/api/auth/login',
+            body=json.dumps({'email': 'user1@mail.ru', 'password': 'pass1'}),
+            headers={'Content-Type': 'application/json'})
+        cookie = response.getheader('Set-Cookie').split(';')[0]
+
+        conn.putrequest('GET', '/api/favorites?limit=100')
+        conn.putheader('Cookie', 'theme=dark')
+        conn.putheader('Cookie', cookie)
+        conn.endheaders()
+        body = json.loads(conn.getresponse().read())
+        with self.flask.session_transaction() as session:
+            session['user_id'] = 1
+        self.assertEqual(body, self.flask.get('/api/favorites?limit=100').get_json())
+
+    def test_header_names(self):
+        writer = mock.Mock()
+        writer.get_extra_info.return_value = ('127.0.0.1', 8000)
+        head = (b'GET / HTTP/1.1\r\nX-Forwarded-For: 10.0.0.1\r\nX_Forwarded_For: 6.6.6.6\r\n'
+                b'Accept: text/html\r\nAccept: application/json\r\n\r\n')
+        environ, _ = self.run_async(self.server.read_request(head, None, writer))
+        self.assertEqual(environ['HTTP_X_FORWARDED_FOR'], '10.0.0.1')  # с «_» отброшен
+        self.assertEqual(environ['HTTP_ACCEPT'], 'text/html,application/json')
+
+    def test_stream_is_chunked(self):
+        response, body = self.request(self.connection(), 'GET', '/api/recipes?stream=1')
+        self.assertEqual(response.getheader('Transfer-Encoding'), 'chunked')
+        self.assertEqual(len(json.loads(body)['recipes']), 60)
+
+    def test_slow_clients_do_not_block_workers(self):
+        # Клиенты, которые не дописали заголовки, не занимают единственный поток
+        slow = []
+        for _ in range(20):
+            sock = socket.create_connection(self.address)
+            self.addCleanup(sock.close)
+            sock.sendall(b'GET /api/recipes HTTP/1.1\r\nHost: x\r\n')
+            slow.append(sock)
+        response, body = self.request(self.connection(), 'GET', '/api/categories')
+        self.assertEqual(response.status, 200)
+        self.assertEqual(self.server.connections, 21)
+
+    def test_bad_request(self):
+        with socket.create_connection(self.address) as sock:
+            sock.sendall(b'garbage\r\n\r\n')
+            self.assertTrue(sock.recv(1024).startswith(b'HTTP/1.1 400'))
+
+
+if __name__ == '__main__':
+    unittest.main()
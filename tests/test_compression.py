@@ -0,0 +1,89 @@
+"""Сжатие JSON-ответов и отдача собранных страниц (asset_pipeline.py) в Flask
+
+Запуск из корня проекта:
+    python -m unittest tests.test_compression
+"""
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from asset_pipeline import build_site, extract_inline_assets
+from benchmarks.fixtures import create_api_database
+from database import app
+
+
+class JsonCompressionTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+        db_name = create_api_database(os.path.join(self.tmpdir, 'recipes.db'), recipes=30)
+        old_config = dict(app.config)
+        app.config.update(DATABASE=db_name, DB_POOL_ENABLED=False, TESTING=True)
+        self.addCleanup(app.config.update, old_config)
+        self.client = app.test_client()
+
+    def test_large_json_is_gzipped(self):
+        plain = self.client.get('/api/recipes')
+        response = self.client.get('/api/recipes', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response.headers['Vary'])
+        self.assertLess(len(response.data), len(plain.data) / 2)
+        self.assertEqual(json.loads(gzip.decompress(response.data)), plain.get_json())
+
+    def test_small_json_and_streams_are_not_compressed(self):
+        headers = {'Accept-Encoding': 'gzip'}
+        small = self.client.get('/api/categories', headers=headers)
+        self.assertLess(len(small.data), app.config['GZIP_MIN_SIZE'])
+        self.assertNotIn('Content-Encoding', small.headers)
+        stream = self.client.get('/api/recipes?stream=1', headers=headers)
+        self.assertNotIn('Content-Encoding', stream.headers)
+
+
+class SitePipelineTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+        page = os.path.join(self.tmpdir, 'page.html')
+        with open(page, 'w', encoding='utf-8') as file:
+            file.write('<html><head><style>' + 'body { color: red; }' * 100 + '</style></head>'
+                       '<body><script src="lib.js"></script><script>' + 'init();' * 300 +
+                       '</script></body></html>')
+        self.site_dir = os.path.join(self.tmpdir, 'dist')
+        self.manifest = build_site([page], self.site_dir)
+        old_config = dict(app.config)
+        app.config.update(SITE_DIR=self.site_dir, TESTING=True)
+        self.addCleanup(app.config.update, old_config)
+        self.client = app.test_client()
+
+    def test_inline_blocks_are_extracted_in_place(self):
+        html, assets = extract_inline_assets('<style>a{}</style><p></p><script>go()</script>', 'x.html')
+        css, js = sorted(assets)
+        self.assertRegex(css, r'^x\.[0-9a-f]{10}\.css$')
+        self.assertEqual(html, f'<link rel="stylesheet" href="assets/{css}"><p></p>'
+                               f'<script src="assets/{js}"></script>')
+
+    def test_assets_are_immutable_and_precompressed(self):
+        name = next(name for name in self.manifest['page.html']['assets'] if name.endswith('.js'))
+        response = self.client.get(f'/assets/{name}', headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(response.mimetype, 'text/javascript')
+        self.assertIn('immutable', response.headers['Cache-Control'])
+        self.assertTrue(gzip.decompress(response.data).startswith(b'init();'))
+        response.close()
+
+        page = self.client.get('/page.html')
+        self.assertIn('no-cache', page.headers['Cache-Control'])
+        self.assertIn(f'assets/{name}'.encode(), page.data)
+        self.assertIn(b'<script src="lib.js"></script>', page.data)
+        page.close()
+        self.assertEqual(self.client.get('/assets/missing.js').status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
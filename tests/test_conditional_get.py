@@ -0,0 +1,108 @@
+"""Условные запросы (ETag / Last-Modified / 304) в Flask API
+
+Запуск из корня проекта:
+    python -m unittest tests.test_conditional_get
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from benchmarks.fixtures import create_api_database
+from database import app, ensure_schema
+from tests.test_query_plans import QueryRecorder
+
+READ_URLS = ['/api/recipes', '/api/recipes/1', '/api/categories', '/api/favorites',
+             '/api/favorites/1/check', '/api/favorites/check?ids=1,2,3',
+             '/api/recipes/search?q=борщ', '/api/recipes/my', '/api/authors']
+
+
+class ConditionalGetTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+        self.db_name = create_api_database(os.path.join(self.tmpdir, 'recipes.db'), recipes=30)
+        ensure_schema(self.db_name)
+        old_config = dict(app.config)
+        app.config.update(DATABASE=self.db_name, DB_POOL_ENABLED=False, TESTING=True)
+        self.addCleanup(app.config.update, old_config)
+        self.client = app.test_client()
+        with self.client.session_transaction() as session:
+            session['user_id'] = 1
+
+    def execute(self, sql, params=()):
+        conn = sqlite3.connect(self.db_name)
+        with conn:
+            conn.execute(sql, params)
+        conn.close()
+
+    def revalidate(self, url, response):
+        return self.client.get(url, headers={'If-None-Match': response.headers['ETag']})
+
+    def test_every_read_endpoint_answers_304(self):
+        for url in READ_URLS:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertIn('no-cache', response.headers['Cache-Control'])
+                self.assertEqual(self.revalidate(url, response).status_code, 304)
+                # У избранного без единой записи еще нет времени изменения
+                if 'Last-Modified' in response.headers:
+                    by_date = self.client.get(url, headers={
+                        'If-Modified-Since': response.headers['Last-Modified']})
+                    self.assertEqual(by_date.status_code, 304)
+
+    def test_304_runs_only_version_lookup(self):
+        response = self.client.get('/api/recipes')
+        recorder = QueryRecorder()
+        with mock.patch('sqlite3.connect', recorder.connect):
+            self.assertEqual(self.revalidate('/api/recipes', response).status_code, 304)
+        self.assertEqual(len(recorder.statements), 1)
+        self.assertIn('data_versions', recorder.statements[0])
+
+    def test_writes_change_validators(self):
+        recipes = self.client.get('/api/recipes')
+        recipe = self.client.get('/api/recipes/2')
+        other = self.client.get('/api/recipes/3')
+        categories = self.client.get('/api/categories')
+
+        self.execute("UPDATE recipes SET title = 'Новый' WHERE id = 2")
+        self.assertEqual(self.revalidate('/api/recipes', recipes).status_code, 200)
+        self.assertEqual(self.revalidate('/api/recipes/2', recipe).status_code, 200)
+        self.assertEqual(self.revalidate('/api/recipes/3', other).status_code, 304)
+        self.assertEqual(self.revalidate('/api/categories', categories).status_code, 304)
+
+    def test_reinserted_recipe_gets_new_validators(self):
+        url = '/api/recipes/30'
+        response = self.client.get(url)
+        self.execute('DELETE FROM recipes WHERE id = 30')
+        self.assertFalse(self.client.get(url).get_json()['success'])
+        self.execute("""
+            INSERT INTO recipes (id, title, category, difficulty, servings, author_id)
+            VALUES (30, 'Другой рецепт', 'Супы', 'Легкая', 2, 1)
+        """)
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_views_do_not_change_validators(self):
+        response = self.client.get('/api/recipes')
+        self.execute('UPDATE recipes SET views = views + 5 WHERE id = 2')
+        self.assertEqual(self.revalidate('/api/recipes', response).status_code, 304)
+
+    def test_favorites_are_per_user(self):
+        mine = self.client.get('/api/favorites')
+        my_recipes = self.client.get('/api/recipes/my')
+        self.execute('INSERT OR IGNORE INTO favorites (user_id, recipe_id) VALUES (2, 5)')
+        self.assertEqual(self.revalidate('/api/favorites', mine).status_code, 304)
+        self.client.post('/api/favorites/5')
+        self.assertEqual(self.revalidate('/api/favorites', mine).status_code, 200)
+
+        with self.client.session_transaction() as session:
+            session['user_id'] = 2
+        self.assertEqual(self.revalidate('/api/recipes/my', my_recipes).status_code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+"""Пул соединений SQLite (db_pool.py) и его использование во Flask API
+
+Запуск из корня проекта:
+    python -m unittest tests.test_db_pool
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from benchmarks.fixtures import create_api_database
+from database import app, get_pool
+from db_pool import ConnectionPool, PoolTimeoutError
+
+
+class ConnectionPoolTests(unittest.TestCase):
+
+    def setUp(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir, ignore_errors=True)
+        self.db_name = create_api_database(os.path.join(tmpdir, 'recipes.db'), recipes=5)
+
+    def pool(self, **kwargs):
+        pool = ConnectionPool(self.db_name, **kwargs)
+        self.addCleanup(pool.close_all)
+        return pool
+
+    def test_checkout_and_return(self):
+        pool = self.pool(size=2)
+        conn = pool.acquire()
+        self.assertEqual(conn.execute('PRAGMA journal_mode').fetchone()[0], 'wal')
+        self.assertEqual(conn.execute('SELECT COUNT(*) FROM recipes').fetchone()[0], 5)
+        self.assertEqual(pool.stats(), {'size': 2, 'created': 1, 'idle': 0})
+
+        pool.release(conn)
+        self.assertEqual(pool.stats(), {'size': 2, 'created': 1, 'idle': 1})
+        self.assertIs(pool.acquire(), conn)  # свободное соединение выдается повторно
+
+    def test_release_rolls_back(self):
+        pool = self.pool(size=1)
+        conn = pool.acquire()
+        conn.execute("UPDATE recipes SET title = 'Черновик' WHERE id = 1")
+        self.assertTrue(conn.in_transaction)
+        pool.release(conn)
+
+        conn = pool.acquire()
+        self.assertFalse(conn.in_transaction)
+        self.assertNotEqual(conn.execute('SELECT title FROM recipes WHERE id = 1').fetchone()[0],
+                            'Черновик')
+
+    def test_broken_connection_is_discarded(self):
+        pool = self.pool(size=1)
+        conn = pool.acquire()
+        conn.execute('BEGIN')
+        conn.close()  # rollback при возврате падает
+        pool.release(conn)
+        self.assertEqual(pool.stats()['created'], 0)
+        self.assertIsNot(pool.acquire(), conn)
+
+    def test_exhausted_pool_times_out(self):
+        pool = self.pool(size=2, timeout=0.05)
+        first, second = pool.acquire(), pool.acquire()
+        with self.assertRaises(PoolTimeoutError):
+            pool.acquire()
+        self.assertEqual(pool.stats()['created'], 2)
+        pool.release(first)
+        pool.release(second)
+
+    def test_waiter_gets_released_connection(self):
+        pool = self.pool(size=1, timeout=5.0)
+        conn = pool.acquire()
+        acquired = []
+        waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+        waiter.start()
+        pool.release(conn)
+        waiter.join(5)
+        self.assertEqual(acquired, [conn])
+
+    def test_failed_connect_frees_slot(self):
+        pool = ConnectionPool(os.path.join(os.path.dirname(self.db_name), 'missing', 'x.db'),
+                              size=1, timeout=0.05)
+        with self.assertRaises(sqlite3.OperationalError):
+            pool.acquire()
+        self.assertEqual(pool.stats()['created'], 0)
+
+    def test_closed_pool_closes_returned_connections(self):
+        pool = self.pool(size=2)
+        idle, busy = pool.acquire(), pool.acquire()
+        pool.release(idle)
+        pool.close_all()
+        pool.release(busy)
+        self.assertEqual(pool.stats(), {'size': 2, 'created': 0, 'idle': 0})
+        with self.assertRaises(sqlite3.ProgrammingError):
+            busy.execute('SELECT 1')
+
+
+class FlaskPoolTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+        old_config = dict(app.config)
+        self.addCleanup(app.config.update, old_config)
+        self.addCleanup(self.close_pool)
+        app.config.update(DB_POOL_ENABLED=True, TESTING=True)
+        self.client = app.test_client()
+
+    def close_pool(self):
+        pool = app.extensions.pop('db_pool', None)
+        if pool is not None:
+            pool.close_all()
+
+    def use_database(self, name, recipes):
+        app.config['DATABASE'] = create_api_database(os.path.join(self.tmpdir, name),
+                                                     recipes=recipes)
+
+    def count(self):
+        response = self.client.get('/api/recipes?limit=100').get_json()
+        self.assertTrue(response['success'])
+        return len(response['recipes'])
+
+    def test_pool_follows_database_setting(self):
+        self.use_database('first.db', recipes=3)
+        self.assertEqual(self.count(), 3)
+        first = get_pool()
+        self.assertEqual(first.stats()['idle'], 1)  # соединение вернулось после запроса
+
+        self.use_database('second.db', recipes=7)
+        self.assertEqual(self.count(), 7)
+        self.assertIsNot(get_pool(), first)
+        self.assertEqual(first.stats()['created'], 0)  # старый пул закрыт
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""Готовые JSON-фрагменты рецептов должны совпадать с обычной выдачей API
+
+Запуск из корня проекта:
+    python -m unittest tests.test_json_fragments
+"""
+import contextlib
+import io
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from benchmarks.fixtures import create_api_database
+from create_database import create_database
+from database import app
+from database_manager import DatabaseManager
+
+
+class FlaskJsonFragmentsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+        self.db_name = create_api_database(os.path.join(self.tmpdir, 'recipes.db'), recipes=50)
+        old_config = dict(app.config)
+        app.config.update(DATABASE=self.db_name, DB_POOL_ENABLED=False, TESTING=True)
+        self.addCleanup(app.config.update, old_config)
+        self.client = app.test_client()
+        with self.client.session_transaction() as session:
+            session['user_id'] = 1
+
+    def get_both(self, url):
+        """Ответы эндпоинта в режиме фрагментов и в обычном режиме"""
+        responses = []
+        for fragments in (True, False):
+            app.config['JSON_FRAGMENTS'] = fragments
+            response = self.client.get(url)
+            self.assertEqual(response.mimetype, 'application/json')
+            responses.append(json.loads(response.data))
+        return responses
+
+    def test_lists_match_regular_output(self):
+        for url in ['/api/recipes?limit=7', '/api/favorites', '/api/recipes/my',
+                    '/api/recipes/search?q=борщ&limit=3']:
+            with self.subTest(url=url):
+                fragments, regular = self.get_both(url)
+                self.assertTrue(regular['recipes'])
+                self.assertEqual(fragments, regular)
+
+    def test_fragment_follows_writes(self):
+        conn = sqlite3.connect(self.db_name)
+        self.addCleanup(conn.close)
+        self.client.get('/api/recipes')  # миграции базы
+        with conn:
+            conn.execute('''UPDATE recipes SET title = 'Новый', ingredients = '["Соль"]'
+                            WHERE id = (SELECT max(id) FROM recipes)''')
+        with conn:
+            conn.execute('DELETE FROM recipes WHERE id = 1')
+
+        fragments, regular = self.get_both('/api/recipes?limit=100')
+        self.assertEqual(fragments, regular)
+        titles = [recipe['title'] for recipe in fragments['recipes']]
+        self.assertIn('Новый', titles)
+        count = conn.execute('SELECT COUNT(*) FROM recipe_json').fetchone()[0]
+        self.assertEqual(count, 49)
+
+
+class DatabaseManagerJsonFragmentsTests(unittest.TestCase):
+
+    def test_page_json_matches_page(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir, ignore_errors=True)
+        db_name = os.path.join(tmpdir, 'cookbook.db')
+        with contextlib.redirect_stdout(io.StringIO()):
+            create_database(db_name)
+        db = DatabaseManager(db_name)
+        db.connect()
+        self.addCleanup(db.close)
+        db.add_rating(1, 1, 2)
+
+        cursor = None
+        while True:
+            page = db.get_recipes_page(limit=2, cursor=cursor)
+            self.assertEqual(json.loads(db.get_recipes_page_json(limit=2, cursor=cursor)), page)
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+"""Нагрузочный тест (benchmarks/loadtest.py): прогон и сравнение с базовой линией
+
+Запуск из корня проекта:
+    python -m unittest tests.test_loadtest
+"""
+import copy
+import unittest
+
+from benchmarks.loadtest import build_parser, compare, parse_mix, percentile, run
+
+
+class LoadTestTests(unittest.TestCase):
+
+    def test_short_flask_run(self):
+        args = build_parser().parse_args(['--stack', 'flask', '--duration', '0.5',
+                                          '--concurrency', '2', '--recipes', '50'])
+        report = run(args)
+        self.assertEqual(set(report['operations']), {'list', 'detail', 'search', 'favorite', 'login'})
+        self.assertGreater(report['total']['requests'], 0)
+        self.assertEqual(report['total']['errors'], 0)
+        self.assertLessEqual(report['total']['p50_ms'], report['total']['p99_ms'])
+
+    def test_mix_is_checked_against_stack(self):
+        operations = {'list': None, 'detail': None}
+        self.assertEqual(parse_mix('list=3,detail', operations), {'list': 3.0, 'detail': 1.0})
+        with self.assertRaises(ValueError):
+            parse_mix('list=1,favorite=1', operations)
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_compare_flags_regressions(self):
+        row = {'requests': 1000, 'errors': 0, 'rps': 100.0,
+               'p50_ms': 5.0, 'p95_ms': 10.0, 'p99_ms': 20.0}
+        baseline = {'config': {'stack': 'flask'}, 'total': dict(row), 'operations': {'list': dict(row)}}
+
+        same = copy.deepcopy(baseline)
+        same['total'].update(rps=95.0, p99_ms=20.5)
+        self.assertEqual(compare(baseline, same), [])
+
+        slower = copy.deepcopy(baseline)
+        slower['operations']['list'].update(rps=70.0, p95_ms=15.0, errors=50)
+        self.assertEqual(len(compare(baseline, slower)), 3)
+
+        other = copy.deepcopy(baseline)
+        other['config']['stack'] = 'django'
+        with self.assertRaises(ValueError):
+            compare(baseline, other)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+"""Учет SQL по маршрутам (sql_metrics.py) и /metrics во Flask API
+
+Запуск из корня проекта:
+    python -m unittest tests.test_metrics
+"""
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+import sql_metrics
+from benchmarks.fixtures import create_api_database
+from create_database import create_database
+from database import app
+from database_manager import DatabaseManager
+
+
+def series(text, name, **labels):
+    prefix = name + '{' + ','.join(f'{key}="{value}"' for key, value in labels.items()) + '} '
+    return next(float(line[len(prefix):]) for line in text.splitlines() if line.startswith(prefix))
+
+
+class FlaskMetricsTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+        self.db_name = create_api_database(os.path.join(self.tmpdir, 'recipes.db'), recipes=30)
+        old_config = dict(app.config)
+        app.config.update(DATABASE=self.db_name, DB_POOL_ENABLED=False, TESTING=True)
+        self.addCleanup(app.config.update, old_config)
+        self.client = app.test_client()
+        self.client.get('/api/categories')  # миграции схемы
+        sql_metrics.REGISTRY.reset()
+
+    def metrics(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.headers['Content-Type'], sql_metrics.CONTENT_TYPE)
+        return response.get_data(as_text=True)
+
+    def test_queries_and_rows_by_route(self):
+        self.client.get('/api/recipes/5')
+        self.client.get('/api/recipes/5')
+        text = self.metrics()
+        route = '/api/recipes/<int:recipe_id>'
+        self.assertEqual(series(text, 'http_requests_total', route=route, method='GET',
+                                status='200'), 2)
+        # версии данных для ETag и сам рецепт
+        self.assertEqual(series(text, 'db_queries_per_request_sum', route=route), 4)
+        self.assertEqual(series(text, 'db_rows_per_request_count', route=route), 2)
+        self.assertGreater(series(text, 'db_query_seconds_per_request_sum', route=route), 0)
+        self.assertEqual(series(text, 'http_request_duration_seconds_bucket', route=route,
+                                method='GET', le='+Inf'), 2)
+
+    def test_streamed_rows_are_counted(self):
+        self.client.get('/api/recipes?stream=1').get_data()
+        self.assertGreaterEqual(series(self.metrics(), 'db_rows_per_request_sum',
+                                       route='/api/recipes'), 30)
+
+    def test_disabled(self):
+        app.config['METRICS_ENABLED'] = False
+        self.client.get('/api/recipes/5')
+        self.assertNotIn('/api/recipes/<int:recipe_id>', self.metrics())
+
+    def test_database_manager_inside_track(self):
+        db_name = os.path.join(self.tmpdir, 'cookbook.db')
+        with contextlib.redirect_stdout(io.StringIO()):
+            create_database(db_name)
+        db = DatabaseManager(db_name)
+        self.assertTrue(db.connect())
+        self.addCleanup(db.close)
+        db.get_categories()  # вне track() не учитывается
+        with sql_metrics.track('import', 'CLI') as stats:
+            categories = db.get_categories()
+            db.get_recipe(1)
+        self.assertEqual(stats.queries, 2)
+        self.assertEqual(stats.rows, len(categories) + 1)
+        self.assertIn('http_requests_total{route="import",method="CLI",status="200"} 1',
+                      sql_metrics.REGISTRY.render())
+
+
+class HistogramTests(unittest.TestCase):
+
+    def test_prometheus_text(self):
+        histogram = sql_metrics.Histogram('x_seconds', 'Пример', ('route',), (0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(('a"b',), value)
+        self.assertEqual(histogram.render(), [
+            '# HELP x_seconds Пример',
+            '# TYPE x_seconds histogram',
+            'x_seconds_bucket{route="a\\"b",le="0.1"} 2',
+            'x_seconds_bucket{route="a\\"b",le="1.0"} 3',
+            'x_seconds_bucket{route="a\\"b",le="+Inf"} 4',
+            'x_seconds_sum{route="a\\"b"} 3.65',
+            'x_seconds_count{route="a\\"b"} 4',
+        ])
+
+    def test_cursor_without_request_is_plain(self):
+        conn = sqlite3.connect(':memory:', factory=sql_metrics.InstrumentedConnection)
+        self.assertEqual(conn.execute('SELECT 1').fetchall(), [(1,)])
+        with sql_metrics.track('test') as stats:
+            self.assertEqual(list(conn.execute('SELECT 1 UNION ALL SELECT 2')), [(1,), (2,)])
+        self.assertEqual((stats.queries, stats.rows), (1, 2))
+        conn.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,175 @@
+"""Курсорная пагинация (pagination.py) в Flask API и DatabaseManager
+
+Запуск из корня проекта:
+    python -m unittest tests.test_pagination
+"""
+import base64
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from urllib.parse import quote
+
+from benchmarks.fixtures import create_api_database
+from create_database import create_database
+from database import app
+from database_manager import DatabaseManager
+from pagination import (MAX_PAGE_SIZE, InvalidCursorError, decode_cursor, encode_cursor,
+                        page_size, split_page)
+
+
+class CursorTests(unittest.TestCase):
+
+    def test_round_trip(self):
+        for values in [('2025-01-02 10:00:00', 15), (-3.25, 7), ('Щи «постные»', 0)]:
+            token = encode_cursor(values)
+            self.assertNotIn('=', token)
+            self.assertEqual(decode_cursor(token), values)
+        self.assertEqual(decode_cursor(encode_cursor([1, 2, 3]), size=3), (1, 2, 3))
+        self.assertIsNone(decode_cursor(''))
+        self.assertIsNone(decode_cursor(None))
+
+    def test_invalid(self):
+        def token(raw):
+            return base64.urlsafe_b64encode(raw.encode()).decode()
+        for bad in ['не-base64!', token('not json'), token('{"a": 1}'), token('[1]'),
+                    token('[1, 2, 3]'), token('[[1], 2]'), token('[null, 2]')]:
+            with self.subTest(token=bad), self.assertRaises(InvalidCursorError):
+                decode_cursor(bad)
+
+    def test_page_size(self):
+        self.assertEqual(page_size(None), 20)
+        self.assertEqual(page_size('abc', default=5), 5)
+        self.assertEqual(page_size('0'), 1)
+        self.assertEqual(page_size('-7'), 1)
+        self.assertEqual(page_size('35'), 35)
+        self.assertEqual(page_size('100000'), MAX_PAGE_SIZE)
+
+    def test_split_page(self):
+        rows = [{'k': n} for n in range(4)]
+        self.assertEqual(split_page(rows, 4, lambda row: (row['k'], 0)), (rows, None))
+        page, cursor = split_page(rows, 3, lambda row: (row['k'], 0))
+        self.assertEqual(page, rows[:3])
+        self.assertEqual(decode_cursor(cursor), (2, 0))
+
+
+class FlaskPaginationTests(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.db_name = create_api_database(os.path.join(cls.tmpdir, 'recipes.db'), recipes=150)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmpdir, ignore_errors=True)
+
+    def setUp(self):
+        old_config = dict(app.config)
+        app.config.update(DATABASE=self.db_name, DB_POOL_ENABLED=False, TESTING=True)
+        self.addCleanup(app.config.update, old_config)
+        self.client = app.test_client()
+        self.conn = sqlite3.connect(self.db_name)
+        self.addCleanup(self.conn.close)
+        self.user_id = self.conn.execute('''
+            SELECT user_id FROM favorites GROUP BY user_id ORDER BY COUNT(*) DESC, user_id LIMIT 1
+        ''').fetchone()[0]
+        with self.client.session_transaction() as session:
+            session['user_id'] = self.user_id
+
+    def ids(self, sql, params=()):
+        return [row[0] for row in self.conn.execute(sql, params)]
+
+    def walk(self, url, limit):
+        """id всех рецептов, пройденных по курсорам страница за страницей"""
+        ids, cursor = [], None
+        separator = '&' if '?' in url else '?'
+        while True:
+            page_url = f'{url}{separator}limit={limit}'
+            if cursor:
+                page_url += f'&cursor={cursor}'
+            response = self.client.get(page_url).get_json()
+            self.assertTrue(response['success'])
+            self.assertLessEqual(len(response['recipes']), limit)
+            ids += [recipe['id'] for recipe in response['recipes']]
+            cursor = response['next_cursor']
+            if cursor is None:
+                return ids
+
+    def test_round_trips(self):
+        cases = [
+            ('/api/recipes', self.ids('SELECT id FROM recipes ORDER BY created_at DESC, id DESC')),
+            ('/api/favorites', self.ids('''
+                SELECT recipe_id FROM favorites WHERE user_id = ? ORDER BY created_at DESC, id DESC
+            ''', (self.user_id,))),
+            ('/api/recipes/my', self.ids('''
+                SELECT id FROM recipes WHERE author_id = ? ORDER BY created_at DESC, id DESC
+            ''', (self.user_id,))),
+        ]
+        for fragments in (True, False):
+            app.config['JSON_FRAGMENTS'] = fragments
+            for url, expected in cases:
+                with self.subTest(url=url, fragments=fragments):
+                    self.assertGreater(len(expected), 2)
+                    self.assertEqual(self.walk(url, 2 if url != '/api/recipes' else 7), expected)
+
+    def test_search_round_trip(self):
+        url = '/api/recipes/search?q=' + quote('борщ')
+        everything = self.client.get(url + '&limit=100').get_json()
+        self.assertIsNone(everything['next_cursor'])
+        expected = [recipe['id'] for recipe in everything['recipes']]
+        self.assertGreater(len(expected), 3)
+        self.assertEqual(self.walk(url, 3), expected)
+
+    def test_invalid_cursor(self):
+        for url in ['/api/recipes', '/api/favorites', '/api/recipes/my',
+                    '/api/recipes/search?q=' + quote('борщ')]:
+            separator = '&' if '?' in url else '?'
+            with self.subTest(url=url):
+                response = self.client.get(f'{url}{separator}cursor=garbage').get_json()
+                self.assertEqual(response, {'success': False, 'error': 'Некорректный курсор'})
+
+    def test_limit_is_clamped(self):
+        self.assertEqual(len(self.client.get('/api/recipes?limit=100000').get_json()['recipes']),
+                         MAX_PAGE_SIZE)
+        self.assertEqual(len(self.client.get('/api/recipes?limit=0').get_json()['recipes']), 1)
+        self.assertEqual(len(self.client.get('/api/recipes?limit=x').get_json()['recipes']), 20)
+
+    def test_favorites_keep_recipe_fields(self):
+        for fragments in (True, False):
+            app.config['JSON_FRAGMENTS'] = fragments
+            recipe = self.client.get('/api/favorites?limit=1').get_json()['recipes'][0]
+            self.assertNotIn('favorited_at', recipe)
+            self.assertNotIn('favorite_id', recipe)
+
+
+class DatabaseManagerPaginationTests(unittest.TestCase):
+
+    def test_recipes_page_round_trip(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir, ignore_errors=True)
+        db_name = os.path.join(tmpdir, 'cookbook.db')
+        with contextlib.redirect_stdout(io.StringIO()):
+            create_database(db_name)
+        db = DatabaseManager(db_name)
+        self.assertTrue(db.connect())
+        self.addCleanup(db.close)
+
+        expected = [recipe['id'] for recipe in db.get_recipes(limit=1000)]
+        ids, cursor = [], None
+        while True:
+            page = db.get_recipes_page(limit=3, cursor=cursor)
+            ids += [recipe['id'] for recipe in page['recipes']]
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        self.assertEqual(ids, expected)
+        with self.assertRaises(InvalidCursorError):
+            db.get_recipes_page(cursor='garbage')
+
+
+if __name__ == '__main__':
+    unittest.main()
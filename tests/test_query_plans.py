@@ -0,0 +1,250 @@
+"""Проверка планов запросов: ни один запрос приложения не должен читать
+большую таблицу полным сканированием
+
+Все соединения SQLite перехватываются, каждый выполненный запрос
+записывается, а затем для него строится EXPLAIN QUERY PLAN.
+
+Запуск из корня проекта:
+    python -m unittest tests.test_query_plans
+"""
+import contextlib
+import io
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from benchmarks.fixtures import create_api_database
+from create_database import create_database
+from database import app, ensure_schema
+from database_manager import DatabaseManager
+from schema_migrations import LATEST_VERSION, migrate, schema_version
+
+LARGE_TABLES = {'recipes', 'favorites', 'ratings', 'users', 'activity_logs'}
+CHECKED_STATEMENTS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')
+SQL_KEYWORDS = {'JOIN', 'LEFT', 'INNER', 'CROSS', 'WHERE', 'ON', 'ORDER', 'GROUP',
+                'LIMIT', 'SET', 'VALUES', 'USING'}
+
+_connect = sqlite3.connect
+
+
+class QueryRecorder:
+    """Запись всех запросов, выполненных через sqlite3.connect"""
+
+    def __init__(self):
+        self.statements = []
+
+    def connect(self, *args, **kwargs):
+        conn = _connect(*args, **kwargs)
+        conn.set_trace_callback(self.statements.append)
+        return conn
+
+
+def table_aliases(sql):
+    """Соответствие «псевдоним -> таблица» для FROM и JOIN запроса"""
+    aliases = {}
+    for table, alias in re.findall(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', sql, re.I):
+        aliases[table] = table
+        if alias and alias.upper() not in SQL_KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+
+def full_scans(db_name, statements):
+    """Запросы, план которых содержит SCAN большой таблицы без индекса"""
+    conn = _connect(db_name)
+    found = []
+    try:
+        for sql in dict.fromkeys(s.strip() for s in statements):
+            # Тела триггеров приходят с префиксом «--», служебные команды пропускаем
+            if not sql.upper().startswith(CHECKED_STATEMENTS):
+                continue
+            aliases = table_aliases(sql)
+            for row in conn.execute('EXPLAIN QUERY PLAN ' + sql):
+                match = re.match(r'SCAN (?:TABLE )?(\w+)(?: AS \w+)?$', row[3])
+                if match and aliases.get(match.group(1), match.group(1)) in LARGE_TABLES:
+                    found.append(f'{row[3]}: {" ".join(sql.split())}')
+    finally:
+        conn.close()
+    return found
+
+
+class QueryPlanTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.recorder = QueryRecorder()
+        patcher = mock.patch('sqlite3.connect', self.recorder.connect)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+
+    def assertNoFullScans(self, db_name):
+        self.assertTrue(self.recorder.statements)
+        self.assertEqual(full_scans(db_name, self.recorder.statements), [])
+
+    def test_flask_api_queries_use_indexes(self):
+        db_name = create_api_database(os.path.join(self.tmpdir, 'recipes.db'), recipes=2000)
+        old_config = dict(app.config)
+        app.config.update(DATABASE=db_name, DB_POOL_ENABLED=False, TESTING=True)
+        self.addCleanup(app.config.update, old_config)
+        client = app.test_client()
+        ensure_schema(db_name)  # миграции выполняются один раз и не проверяются
+
+        self.recorder.statements.clear()
+        client.post('/api/auth/register', json={'email': 'plan@mail.ru', 'name': 'План',
+                                                'password': 'secret'})
+        client.post('/api/auth/login', json={'email': 'plan@mail.ru', 'password': 'secret'})
+        client.get('/api/auth/me')
+        client.post('/api/recipes', json={'title': 'Борщ', 'category': 'Супы',
+                                          'difficulty': 'Легкая', 'servings': 4})
+        page = client.get('/api/recipes?limit=5').get_json()
+        client.get(f'/api/recipes?limit=5&cursor={page["next_cursor"]}')
+        client.get('/api/recipes/1')
+        client.get('/api/categories')
+        for recipe_id in (1, 2, 3):
+            client.post(f'/api/favorites/{recipe_id}')
+        client.post('/api/favorites/3')
+        client.get('/api/favorites/1/check')
+        page = client.get('/api/favorites?limit=1').get_json()
+        client.get(f'/api/favorites?limit=1&cursor={page["next_cursor"]}')
+        page = client.get('/api/recipes/search?q=борщ&limit=2').get_json()
+        client.get(f'/api/recipes/search?q=борщ&limit=2&cursor={page["next_cursor"]}')
+        client.get('/api/recipes/my')
+        client.get('/api/favorites?stream=1')
+        # Списки в другом режиме выдачи (готовый JSON или строки таблицы)
+        app.config['JSON_FRAGMENTS'] = not app.config['JSON_FRAGMENTS']
+        client.get('/api/recipes?limit=5')
+        client.get('/api/favorites')
+        client.get('/api/recipes/search?q=борщ')
+        client.get('/api/recipes/my')
+        client.get('/api/authors')
+        client.get('/api/stats')
+        client.get('/api/stats/views')
+        app.extensions['view_counter'].flush()
+
+        self.assertNoFullScans(db_name)
+
+    def test_database_manager_queries_use_indexes(self):
+        db_name = os.path.join(self.tmpdir, 'cookbook.db')
+        with contextlib.redirect_stdout(io.StringIO()):
+            create_database(db_name)
+        db = DatabaseManager(db_name)
+        db.connect()
+        self.addCleanup(db.close)
+
+        self.recorder.statements.clear()
+        user_id = db.create_user('plan@mail.ru', 'secret', 'План')
+        db.get_user('plan@mail.ru')
+        db.verify_user('plan@mail.ru', 'secret')
+        db.get_user_by_id(user_id)
+        db.get_categories()
+        db.get_category(1)
+        recipe_id = db.create_recipe('Борщ', 'Красный', 1, user_id, 60, 4, 'Легкая',
+                                     tags=['суп'], ingredients=['свекла'], steps=['варить'])
+        db.get_recipes(limit=5)
+        db.get_recipes(category_id=1)
+        db.get_recipes(author_id=user_id)
+        page = db.get_recipes_page(limit=1)
+        db.get_recipes_page(limit=1, cursor=page['next_cursor'])
+        db.get_recipes_page(category_id=1)
+        db.get_recipes_page(author_id=user_id)
+        db.get_recipes_page_json(limit=1, cursor=page['next_cursor'])
+        db.get_recipe(recipe_id)
+        db.search_recipes('борщ')
+        db.search_recipes_page('борщ')
+        db.add_to_favorites(user_id, recipe_id)
+        db.add_to_favorites(user_id, 1)
+        db.is_favorite(user_id, recipe_id)
+        db.get_favorites(user_id)
+        page = db.get_favorites_page(user_id, limit=1)
+        db.get_favorites_page(user_id, limit=1, cursor=page['next_cursor'])
+        db.remove_from_favorites(user_id, 1)
+        db.add_rating(user_id, recipe_id, 5)
+        db.add_rating(user_id, recipe_id, 4)
+        db.add_ratings_bulk([(user_id, 1, 3), (user_id, 2, 5)])
+        db.get_recipe_ratings(recipe_id)
+        db._load_statistics()
+        db.view_counter.flush()
+
+        self.assertNoFullScans(db_name)
+
+
+class SchemaMigrationTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+
+    def test_migrate_existing_database(self):
+        db_name = create_api_database(os.path.join(self.tmpdir, 'recipes.db'))
+        conn = sqlite3.connect(db_name)
+        self.addCleanup(conn.close)
+        self.assertEqual(schema_version(conn), 0)
+
+        self.assertEqual(migrate(conn), list(range(1, LATEST_VERSION + 1)))
+        self.assertEqual(schema_version(conn), LATEST_VERSION)
+        indexes = {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'")}
+        self.assertIn('idx_recipes_created', indexes)
+        self.assertIn('idx_favorites_user_created', indexes)
+        # Повторный запуск ничего не делает
+        self.assertEqual(migrate(conn), [])
+
+    def test_upgrade_ratings_index(self):
+        db_name = os.path.join(self.tmpdir, 'cookbook.db')
+        with contextlib.redirect_stdout(io.StringIO()):
+            create_database(db_name)
+        conn = sqlite3.connect(db_name)
+        self.addCleanup(conn.close)
+        conn.execute('CREATE INDEX idx_ratings_recipe ON ratings (recipe_id)')
+        conn.execute('PRAGMA user_version = 2')
+
+        self.assertEqual(migrate(conn), list(range(3, LATEST_VERSION + 1)))
+        indexes = {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'ratings'")}
+        self.assertIn('idx_ratings_recipe_created', indexes)
+        self.assertNotIn('idx_ratings_recipe', indexes)
+
+    def test_empty_database_is_not_stamped(self):
+        db_name = os.path.join(self.tmpdir, 'cookbook.db')
+        db = DatabaseManager(db_name)
+        with contextlib.redirect_stdout(io.StringIO()):
+            db.connect()  # файла еще нет - создается пустая база
+        db.close()
+        conn = sqlite3.connect(db_name)
+        self.assertEqual((migrate(conn), schema_version(conn)), ([], 0))
+        conn.close()
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            create_database(db_name)
+        db = DatabaseManager(db_name)
+        self.assertTrue(db.connect())
+        self.addCleanup(db.close)
+        self.assertEqual(schema_version(db.conn), LATEST_VERSION)
+        self.assertGreater(db.get_statistics()['recipes_count'], 0)
+        tables = {row[0] for row in db.conn.execute("SELECT name FROM sqlite_master")}
+        self.assertLessEqual({'table_counters', 'recipe_json', 'data_versions',
+                              'idx_recipes_created'}, tables)
+
+    def test_flask_migrates_database_created_later(self):
+        db_name = os.path.join(self.tmpdir, 'recipes.db')
+        old_config = dict(app.config)
+        app.config.update(DATABASE=db_name, DB_POOL_ENABLED=False, TESTING=True)
+        self.addCleanup(app.config.update, old_config)
+        ensure_schema(db_name)  # базы еще нет
+
+        create_api_database(db_name, recipes=5)
+        ensure_schema(db_name)
+        conn = sqlite3.connect(db_name)
+        self.addCleanup(conn.close)
+        self.assertEqual(schema_version(conn), LATEST_VERSION)
+        response = app.test_client().get('/api/stats').get_json()
+        self.assertEqual(response['stats']['total_recipes'], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""Инкрементальные агрегаты оценок в DatabaseManager (add_rating, add_ratings_bulk)
+
+Запуск из корня проекта:
+    python -m unittest tests.test_ratings
+"""
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from create_database import create_database
+from database_manager import DatabaseManager
+
+
+class RatingAggregateTests(unittest.TestCase):
+
+    def setUp(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir, ignore_errors=True)
+        db_name = os.path.join(tmpdir, 'cookbook.db')
+        with contextlib.redirect_stdout(io.StringIO()):
+            create_database(db_name)
+        self.db = DatabaseManager(db_name)
+        self.assertTrue(self.db.connect())
+        self.addCleanup(self.db.close)
+        self.users = [row[0] for row in self.db.conn.execute('SELECT id FROM users ORDER BY id')]
+        self.recipes = [row[0] for row in self.db.conn.execute('SELECT id FROM recipes ORDER BY id')]
+        self.assertGreaterEqual(len(self.users), 3)
+
+    def aggregates(self):
+        """{id рецепта: (сумма, количество, среднее)} из колонок recipes"""
+        return {row[0]: (row[1], row[2], round(row[3], 6)) for row in self.db.conn.execute(
+            'SELECT id, rating_sum, rating_count, average_rating FROM recipes')}
+
+    def recomputed(self):
+        """То же, посчитанное заново по всей таблице ratings"""
+        return {row[0]: (row[1], row[2], round(row[3], 6)) for row in self.db.conn.execute('''
+            SELECT r.id, coalesce(SUM(x.value), 0), COUNT(x.id),
+                   coalesce(CAST(SUM(x.value) AS REAL) / COUNT(x.id), 0)
+            FROM recipes r LEFT JOIN ratings x ON x.recipe_id = r.id
+            GROUP BY r.id
+        ''')}
+
+    def assertConsistent(self):
+        self.assertEqual(self.aggregates(), self.recomputed())
+
+    def test_migration_matches_recompute(self):
+        self.assertConsistent()
+
+    def test_add_rating(self):
+        recipe_id = self.recipes[0]
+        for user_id, value in zip(self.users, (1, 4, 2)):
+            self.assertTrue(self.db.add_rating(user_id, recipe_id, value))
+            self.assertConsistent()
+
+    def test_rerate_same_user(self):
+        recipe_id = self.recipes[1]
+        user_id = self.users[1]
+        self.db.add_rating(user_id, recipe_id, 1)
+        before = self.aggregates()[recipe_id]
+        self.assertTrue(self.db.add_rating(user_id, recipe_id, 5, 'передумал'))
+        after = self.aggregates()[recipe_id]
+        self.assertEqual(after[:2], (before[0] + 4, before[1]))
+        self.assertConsistent()
+        self.db.add_rating(user_id, recipe_id, 5)  # та же оценка - без изменений
+        self.assertEqual(self.aggregates()[recipe_id], after)
+
+    def test_rerate_racing_with_another_connection(self):
+        recipe_id, user_id = self.recipes[0], self.users[0]
+        self.db.add_rating(user_id, recipe_id, 1)
+        other = DatabaseManager(self.db.db_name)
+        self.assertTrue(other.connect())
+        self.addCleanup(other.close)
+        other.conn.execute('PRAGMA busy_timeout = 50')
+        results = []
+
+        def race(statement):
+            # Другой процесс переоценивает рецепт, пока первый прочитал прежнюю оценку
+            if statement.startswith('SELECT value FROM ratings') and not results:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    results.append(other.add_rating(user_id, recipe_id, 5))
+
+        self.db.conn.set_trace_callback(race)
+        self.assertTrue(self.db.add_rating(user_id, recipe_id, 3))
+        self.db.conn.set_trace_callback(None)
+        self.assertEqual(results, [False])  # ждет блокировку записи и сдается
+        self.assertConsistent()
+
+    def test_invalid_rating_changes_nothing(self):
+        before = self.aggregates()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertFalse(self.db.add_rating(self.users[0], self.recipes[0], 9))
+        self.assertEqual(self.aggregates(), before)
+        self.assertConsistent()
+
+    def test_bulk_load(self):
+        ratings = [(user_id, recipe_id, (user_id + recipe_id) % 5 + 1)
+                   for user_id in self.users for recipe_id in self.recipes]
+        # повтор оценки в той же пачке - побеждает последняя
+        ratings.append((self.users[0], self.recipes[0], 2, 'вторая попытка'))
+        self.assertEqual(self.db.add_ratings_bulk(ratings), len(ratings))
+        self.assertConsistent()
+        value = self.db.conn.execute('SELECT value FROM ratings WHERE user_id = ? AND recipe_id = ?',
+                                     (self.users[0], self.recipes[0])).fetchone()[0]
+        self.assertEqual(value, 2)
+
+        # поверх инкрементальных оценок
+        self.db.add_rating(self.users[2], self.recipes[-1], 1)
+        self.assertEqual(self.db.add_ratings_bulk([(self.users[2], self.recipes[-1], 5)]), 1)
+        self.assertConsistent()
+
+    def test_bulk_failure_rolls_back(self):
+        before = self.aggregates()
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertEqual(self.db.add_ratings_bulk([(self.users[0], self.recipes[0], 3),
+                                                       (self.users[1], self.recipes[0], 0)]), 0)
+        self.assertEqual(self.aggregates(), before)
+        self.assertConsistent()
+        self.assertEqual(self.db.add_ratings_bulk([]), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
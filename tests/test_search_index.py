@@ -0,0 +1,136 @@
+"""Полнотекстовый поиск (search_index.py) и запасной поиск через LIKE во Flask API
+
+Запуск из корня проекта:
+    python -m unittest tests.test_search_index
+"""
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+from urllib.parse import quote
+
+import search_index
+from benchmarks.fixtures import create_api_database
+from database import app
+from search_index import FTS_TABLE, build_match_query, ensure_search_index, stem
+
+RECIPES = [
+    ('Грибной суп', 'Густой суп из лесных грибов', 'Супы', ['Грибы - 300 г', 'Лук - 1 шт'],
+     ['Русская кухня']),
+    ('Курица с рисом', 'Сытное второе', 'Основные блюда', ['Курица - 500 г', 'Рис - 200 г'],
+     ['С мясом']),
+    ('Ёлочный салат', 'Праздничный салат с грибами', 'Салаты', ['Шампиньоны - 200 г'],
+     ['Праздничное']),
+]
+
+
+def create_search_database(path):
+    create_api_database(path, recipes=0)
+    conn = sqlite3.connect(path)
+    with conn:
+        conn.executemany('''
+            INSERT INTO recipes (title, description, category, difficulty, servings,
+                                 ingredients, tags, created_at)
+            VALUES (?, ?, ?, 'Легкая', 2, ?, ?, ?)
+        ''', [(title, description, category, json.dumps(ingredients, ensure_ascii=False),
+               json.dumps(tags, ensure_ascii=False), f'2025-01-0{n} 12:00:00')
+              for n, (title, description, category, ingredients, tags) in enumerate(RECIPES, 1)])
+    conn.close()
+    return path
+
+
+class MatchQueryTests(unittest.TestCase):
+
+    def test_stem(self):
+        self.assertEqual(stem('грибами'), 'гриб')
+        self.assertEqual(stem('супы'), 'суп')
+        self.assertEqual(stem('уха'), 'уха')  # короткие основы не режутся
+
+    def test_build_match_query(self):
+        self.assertEqual(build_match_query('Грибной  Ёжик!'), '"грибн"* "ежик"*')
+        self.assertIsNone(build_match_query(' - !'))
+
+
+class SearchIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir, ignore_errors=True)
+        self.conn = sqlite3.connect(create_search_database(os.path.join(tmpdir, 'recipes.db')))
+        self.addCleanup(self.conn.close)
+        if not search_index.fts5_available(self.conn):
+            self.skipTest('SQLite собран без FTS5')
+
+    def search(self, text):
+        return [row[0] for row in self.conn.execute(f'''
+            SELECT r.title FROM {FTS_TABLE} JOIN recipes r ON r.id = {FTS_TABLE}.rowid
+            WHERE {FTS_TABLE} MATCH ? ORDER BY {FTS_TABLE}.rank
+        ''', (build_match_query(text),))]
+
+    def test_stemming_and_ranking(self):
+        self.assertTrue(ensure_search_index(self.conn))
+        # название весит больше описания
+        self.assertEqual(self.search('грибами'), ['Грибной суп', 'Ёлочный салат'])
+        self.assertEqual(self.search('елочный'), ['Ёлочный салат'])
+        self.assertEqual(self.search('рис курица'), ['Курица с рисом'])
+
+    def test_triggers_keep_index_in_sync(self):
+        ensure_search_index(self.conn)
+        with self.conn:
+            self.conn.execute("UPDATE recipes SET title = 'Рыбный суп' WHERE title = 'Грибной суп'")
+            self.conn.execute("DELETE FROM recipes WHERE title = 'Курица с рисом'")
+            self.conn.execute("UPDATE recipes SET views = 10")  # индекс не трогается
+        self.assertEqual(self.search('рыбный'), ['Рыбный суп'])
+        self.assertEqual(self.search('курица'), [])
+
+    def test_failed_build_leaves_no_index(self):
+        with mock.patch.object(search_index, '_fill_search_index',
+                               side_effect=sqlite3.OperationalError('disk I/O error')), \
+                self.assertLogs('search_index', 'ERROR') as logs:
+            self.assertFalse(ensure_search_index(self.conn))
+        self.assertIn('disk I/O error', logs.output[0])
+        self.assertIsNone(self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name LIKE 'recipes_fts%'").fetchone())
+        self.assertTrue(ensure_search_index(self.conn))
+        self.assertEqual(self.search('курица'), ['Курица с рисом'])
+
+    def test_orphan_table_is_rebuilt(self):
+        # Таблица без триггеров и строк - как после прерванного создания
+        self.conn.execute(f'CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(title)')
+        self.assertTrue(ensure_search_index(self.conn))
+        self.assertEqual(self.search('суп'), ['Грибной суп'])
+
+
+class FlaskSearchTests(unittest.TestCase):
+
+    def setUp(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir, ignore_errors=True)
+        db_name = create_search_database(os.path.join(tmpdir, 'recipes.db'))
+        old_config = dict(app.config)
+        app.config.update(DATABASE=db_name, DB_POOL_ENABLED=False, TESTING=True)
+        self.addCleanup(app.config.update, old_config)
+        self.client = app.test_client()
+
+    def titles(self, query):
+        response = self.client.get('/api/recipes/search?q=' + quote(query)).get_json()
+        self.assertTrue(response['success'])
+        return [recipe['title'] for recipe in response['recipes']]
+
+    def test_fts(self):
+        self.assertEqual(self.titles('грибами'), ['Грибной суп', 'Ёлочный салат'])
+        self.assertEqual(self.titles('!!!'), [])
+
+    def test_like_fallback(self):
+        app.config['SEARCH_USE_FTS'] = False
+        # LIKE ищет подстроку как есть, новые сначала
+        self.assertEqual(self.titles('салат'), ['Ёлочный салат'])
+        self.assertEqual(self.titles('гриб'), ['Ёлочный салат', 'Грибной суп'])
+        self.assertEqual(self.titles('грибами'), ['Ёлочный салат'])
+
+
+if __name__ == '__main__':
+    unittest.main()
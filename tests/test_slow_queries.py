@@ -0,0 +1,99 @@
+"""Журнал медленных запросов (slow_queries.py) и его подключение к DatabaseManager
+
+Запуск из корня проекта:
+    python -m unittest tests.test_slow_queries
+"""
+import contextlib
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import slow_queries
+from create_database import create_database
+from database_manager import DatabaseManager
+from slow_queries import SlowQueryLog, normalize, params_shape
+
+
+class NormalizeTests(unittest.TestCase):
+
+    def test_literals_and_in_lists(self):
+        self.assertEqual(
+            normalize("SELECT * FROM t1\n  WHERE a = 10 AND b = 'it''s' AND c IN (?, ?,?)"),
+            'SELECT * FROM t1 WHERE a = ? AND b = ? AND c IN (?, ...)')
+
+    def test_params_shape_hides_values(self):
+        self.assertEqual(params_shape((1, 'secret', None, 2.5)), '(int, str[6], None, float)')
+        self.assertEqual(params_shape({'email': 'a@b.c'}), '{email: str[5]}')
+        self.assertEqual(params_shape([(1, 2), (3, 4)], many=True), '2 x (int, int)')
+
+
+class SlowQueryLogTests(unittest.TestCase):
+
+    def setUp(self):
+        self.log = SlowQueryLog(threshold=0.0)
+        self.conn = slow_queries.connect(':memory:', self.log)
+        self.addCleanup(self.conn.close)
+        self.conn.execute('CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)')
+        self.conn.executemany('INSERT INTO items (name) VALUES (?)', [(str(n),) for n in range(50)])
+        self.log.reset()
+
+    def test_slow_query_is_logged_with_plan(self):
+        with self.assertLogs('slow_queries', 'WARNING') as logs:
+            rows = self.conn.execute('SELECT * FROM items WHERE name = ?', ('7',)).fetchall()
+        self.assertEqual(len(rows), 1)
+        self.assertIn('параметры: (str[1])', logs.output[0])
+        self.assertIn('SCAN items', logs.output[0])
+        entry = self.log.slow[-1]
+        self.assertEqual((entry['sql'], entry['rows']), ('SELECT * FROM items WHERE name = ?', 1))
+
+    def test_fast_queries_are_only_aggregated(self):
+        self.log.threshold = 10.0
+        for n in range(1, 4):
+            list(self.conn.execute(f'SELECT * FROM items WHERE id > {n * 10}'))
+        cursor = self.conn.cursor()
+        cursor.execute('SELECT * FROM items')
+        while cursor.fetchmany(20):
+            pass
+        self.assertEqual(len(self.log.slow), 0)
+        by_sql = {entry['sql']: entry for entry in self.log.top()}
+        self.assertEqual(by_sql['SELECT * FROM items WHERE id > ?']['count'], 3)
+        self.assertEqual(by_sql['SELECT * FROM items WHERE id > ?']['rows'], 40 + 30 + 20)
+        self.assertEqual(by_sql['SELECT * FROM items']['rows'], 50)
+
+    def test_statement_limit_evicts_cheapest(self):
+        self.log.max_statements = 2
+        self.log.threshold = 10.0
+        self.log.record(None, 'SELECT 1 FROM a', (), 0.5, 1)
+        self.log.record(None, 'SELECT 1 FROM b', (), 0.1, 1)
+        self.log.record(None, 'SELECT 1 FROM c', (), 0.2, 1)
+        self.assertEqual([entry['sql'] for entry in self.log.top()],
+                         ['SELECT ? FROM a', 'SELECT ? FROM c'])
+
+
+class DatabaseManagerSlowLogTests(unittest.TestCase):
+
+    def test_report_covers_manager_queries(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir, ignore_errors=True)
+        db_name = os.path.join(tmpdir, 'cookbook.db')
+        with contextlib.redirect_stdout(io.StringIO()):
+            create_database(db_name)
+
+        log = SlowQueryLog(threshold=10.0)
+        db = DatabaseManager(db_name, slow_query_log=log)
+        self.assertTrue(db.connect())
+        self.addCleanup(db.close)
+        log.reset()
+        slow_queries.run_workload(db, repeat=2)
+
+        statements = [entry['sql'] for entry in log.top(50)]
+        self.assertTrue(any('recipes_fts MATCH ?' in sql for sql in statements))
+        self.assertIn('SELECT name, value FROM table_counters', statements)  # отдельное соединение
+        report = log.report(n=3)
+        self.assertEqual(len(report.splitlines()), 2 + 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
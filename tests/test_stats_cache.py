@@ -0,0 +1,155 @@
+"""Снимок статистики (StatsSnapshot) и счетчики на триггерах (stats_cache.py)
+
+Запуск из корня проекта:
+    python -m unittest tests.test_stats_cache
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from benchmarks.fixtures import create_api_database
+from stats_cache import COUNTED_TABLES, StatsSnapshot, ensure_counters, read_counters
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class StatsSnapshotTests(unittest.TestCase):
+
+    def setUp(self):
+        self.loads = 0
+        self.loaded = threading.Event()
+        self.clock = FakeClock()
+        self.snapshot = StatsSnapshot(self.load, ttl=30.0, clock=self.clock)
+
+    def load(self):
+        self.loads += 1
+        self.loaded.set()
+        return {'total_recipes': self.loads, 'top_author': {'name': 'Анна'}}
+
+    def test_first_get_loads_synchronously(self):
+        self.assertIsNone(self.snapshot.age())
+        self.assertEqual(self.snapshot.get()['total_recipes'], 1)
+        self.assertEqual(self.snapshot.age(), 0.0)
+
+    def test_fresh_snapshot_skips_loader(self):
+        self.snapshot.get()
+        self.clock.now += 29.9
+        self.assertEqual(self.snapshot.get()['total_recipes'], 1)
+        self.assertEqual(self.loads, 1)
+
+    def test_stale_snapshot_refreshes_in_background(self):
+        self.snapshot.get()
+        self.loaded.clear()
+        self.clock.now += 30.0
+        self.assertEqual(self.snapshot.get()['total_recipes'], 1)  # старый, без ожидания
+        deadline = time.monotonic() + 5
+        while self.snapshot.get()['total_recipes'] != 2:
+            self.assertLess(time.monotonic(), deadline)
+            time.sleep(0.01)
+        self.assertEqual(self.loads, 2)
+
+    def test_invalidate(self):
+        self.snapshot.get()
+        self.loaded.clear()
+        self.snapshot.invalidate()
+        self.snapshot.get()
+        self.assertTrue(self.loaded.wait(5))
+
+    def test_failed_refresh_is_logged_and_keeps_snapshot(self):
+        self.snapshot.get()
+        self.clock.now += 30.0
+        self.snapshot.loader = mock.Mock(side_effect=RuntimeError('база недоступна'))
+        with self.assertLogs('stats_cache', 'ERROR') as logs:
+            self.assertEqual(self.snapshot.get()['total_recipes'], 1)
+            deadline = time.monotonic() + 5
+            while not logs.output:
+                self.assertLess(time.monotonic(), deadline)
+                time.sleep(0.01)
+        self.assertIn('база недоступна', logs.output[0])
+
+    def test_callers_get_copies(self):
+        first = self.snapshot.get()
+        first['total_recipes'] = -1
+        first['top_author']['name'] = 'испорчено'
+        second = self.snapshot.get()
+        self.assertEqual(second, {'total_recipes': 1, 'top_author': {'name': 'Анна'}})
+
+
+class CountersTests(unittest.TestCase):
+
+    def setUp(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir, ignore_errors=True)
+        self.conn = sqlite3.connect(create_api_database(os.path.join(tmpdir, 'recipes.db'),
+                                                        recipes=40))
+        self.addCleanup(self.conn.close)
+        ensure_counters(self.conn)
+
+    def assertNoDrift(self):
+        expected = {table: self.conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0]
+                    for table in COUNTED_TABLES}
+        self.assertEqual(read_counters(self.conn), expected)
+        authors = dict(self.conn.execute('SELECT author_id, recipe_count FROM author_stats '
+                                         'WHERE recipe_count > 0'))
+        self.assertEqual(authors, dict(self.conn.execute(
+            'SELECT author_id, COUNT(*) FROM recipes WHERE author_id IS NOT NULL '
+            'GROUP BY author_id')))
+
+    def add_recipe(self, author_id):
+        self.conn.execute('''
+            INSERT INTO recipes (title, category, difficulty, servings, author_id)
+            VALUES ('Новый', 'Супы', 'Легкая', 2, ?)
+        ''', (author_id,))
+
+    def test_initial_counts(self):
+        self.assertNoDrift()
+        ensure_counters(self.conn)  # повторный вызов ничего не пересчитывает
+        self.assertNoDrift()
+
+    def test_writes_keep_counters_exact(self):
+        with self.conn:
+            self.conn.execute("INSERT INTO users (email, name, password) VALUES ('n@m.ru', 'Н', 'x')")
+            self.conn.execute("INSERT OR IGNORE INTO users (email, name, password) "
+                              "VALUES ('n@m.ru', 'Н', 'x')")  # дубликат не считается
+            self.conn.execute("INSERT OR IGNORE INTO categories (name, icon) VALUES ('Супы', '')")
+            self.conn.execute("INSERT INTO categories (name, icon) VALUES ('Соусы', '🥫')")
+            self.add_recipe(3)
+            self.add_recipe(None)
+            self.add_recipe(999)  # первый рецепт нового автора
+            self.conn.execute('DELETE FROM favorites WHERE user_id IN (1, 2)')
+            self.conn.execute('INSERT OR IGNORE INTO favorites (user_id, recipe_id) '
+                              'SELECT 5, id FROM recipes')
+        self.assertNoDrift()
+
+        with self.conn:
+            self.conn.execute('UPDATE recipes SET author_id = 7 WHERE author_id = 3')
+            self.conn.execute('UPDATE recipes SET author_id = NULL WHERE id = 1')
+            self.conn.execute('UPDATE recipes SET author_id = 4 WHERE author_id IS NULL')
+            self.conn.execute('UPDATE recipes SET views = views + 1')
+            self.conn.execute('DELETE FROM recipes WHERE id % 3 = 0')
+            self.conn.execute("DELETE FROM users WHERE email = 'n@m.ru'")
+        self.assertNoDrift()
+
+    def test_rollback_keeps_counters(self):
+        before = read_counters(self.conn)
+        with self.assertRaises(sqlite3.IntegrityError), self.conn:
+            self.add_recipe(1)
+            self.conn.execute("INSERT INTO users (email, name, password) "
+                              "VALUES ('user1@mail.ru', 'Дубль', 'x')")
+        self.assertEqual(read_counters(self.conn), before)
+        self.assertNoDrift()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+"""Потоковая выдача списков рецептов (?stream=1) в Flask API
+
+Запуск из корня проекта:
+    python -m unittest tests.test_streaming
+"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from benchmarks.fixtures import create_api_database
+from database import app
+
+
+class StreamingTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+        db_name = create_api_database(os.path.join(self.tmpdir, 'recipes.db'), recipes=120)
+        old_config = dict(app.config)
+        app.config.update(DATABASE=db_name, DB_POOL_ENABLED=False, TESTING=True,
+                          STREAM_BATCH_SIZE=7)
+        self.addCleanup(app.config.update, old_config)
+        self.client = app.test_client()
+        with self.client.session_transaction() as session:
+            session['user_id'] = 1
+
+    def all_pages(self, url):
+        recipes, cursor = [], None
+        while True:
+            separator = '&' if '?' in url else '?'
+            page = self.client.get(url + (f'{separator}cursor={cursor}' if cursor else '')).get_json()
+            recipes.extend(page['recipes'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                return recipes
+
+    def test_stream_matches_pages(self):
+        for fragments in (True, False):
+            app.config['JSON_FRAGMENTS'] = fragments
+            for url in ['/api/recipes', '/api/favorites', '/api/recipes/my',
+                        '/api/recipes/search?q=борщ']:
+                with self.subTest(url=url, fragments=fragments):
+                    separator = '&' if '?' in url else '?'
+                    response = self.client.get(f'{url}{separator}stream=1')
+                    self.assertTrue(response.is_streamed)
+                    body = json.loads(response.data)
+                    self.assertTrue(body['success'])
+                    self.assertIsNone(body['next_cursor'])
+                    self.assertTrue(body['recipes'])
+                    self.assertEqual(body['recipes'], self.all_pages(url))
+
+    def test_stream_starts_after_cursor(self):
+        page = self.client.get('/api/recipes?limit=100').get_json()
+        rest = self.client.get(f'/api/recipes?stream=1&cursor={page["next_cursor"]}').get_json()
+        self.assertEqual(len(page['recipes']) + len(rest['recipes']), 120)
+        self.assertEqual(rest['recipes'], self.all_pages('/api/recipes')[100:])
+
+
+if __name__ == '__main__':
+    unittest.main()
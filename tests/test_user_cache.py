@@ -0,0 +1,243 @@
+"""Кэши пользователей и избранного (user_cache.py) и их использование во Flask API
+
+Запуск из корня проекта:
+    python -m unittest tests.test_user_cache
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+import sql_metrics
+from benchmarks.fixtures import create_api_database
+from database import app, get_favorites_cache, get_user_cache
+from tests.test_metrics import series
+from user_cache import FavoritesCache, UserCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class UserCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.loads = []
+        self.clock = FakeClock()
+        self.cache = UserCache(self.load, maxsize=2, ttl=10.0, clock=self.clock)
+
+    def load(self, user_id):
+        self.loads.append(user_id)
+        return {'id': user_id, 'name': f'Повар {user_id}'} if user_id < 100 else None
+
+    def test_hit_after_miss(self):
+        self.assertEqual(self.cache.get(1)['name'], 'Повар 1')
+        self.cache.get(1)['name'] = 'изменено'  # наружу отдается копия
+        self.assertEqual(self.cache.get(1)['name'], 'Повар 1')
+        self.assertEqual(self.loads, [1])
+        self.assertEqual(self.cache.stats()['hit_rate'], round(2 / 3, 4))
+
+    def test_lru_eviction(self):
+        self.cache.get(1)
+        self.cache.get(2)
+        self.cache.get(1)
+        self.cache.get(3)  # вытесняет 2
+        self.cache.get(1)
+        self.cache.get(2)
+        self.assertEqual(self.loads, [1, 2, 3, 2])
+        self.assertEqual(self.cache.stats()['evictions'], 2)
+
+    def test_ttl(self):
+        self.cache.get(1)
+        self.clock.now = 9.9
+        self.cache.get(1)
+        self.clock.now = 10.0
+        self.cache.get(1)
+        self.assertEqual(self.loads, [1, 1])
+
+    def test_missing_user_is_not_cached(self):
+        self.assertIsNone(self.cache.get(100))
+        self.assertIsNone(self.cache.get(100))
+        self.assertEqual(self.loads, [100, 100])
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+    def test_invalidate_during_load(self):
+        def load(user_id):
+            self.cache.invalidate(user_id)  # пользователя изменили, пока шло чтение
+            return {'id': user_id, 'name': 'старое имя'}
+        self.cache.loader = load
+        self.assertEqual(self.cache.get(1)['name'], 'старое имя')
+        self.assertEqual(self.cache.stats()['size'], 0)
+
+    def test_put_and_invalidate(self):
+        self.cache.put({'id': 5, 'name': 'Новый'})
+        self.assertEqual(self.cache.get(5)['name'], 'Новый')
+        self.cache.invalidate(5)
+        self.assertEqual(self.cache.get(5)['name'], 'Повар 5')
+        self.cache.invalidate()
+        self.assertEqual(self.cache.stats()['size'], 0)
+        self.assertEqual(self.loads, [5])
+
+
+class FavoritesCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.loads = []
+        self.cache = FavoritesCache(self.load)
+
+    def load(self, user_id):
+        self.loads.append(user_id)
+        return {1, 3}
+
+    def test_check_and_version(self):
+        self.assertEqual(self.cache.check(7, [1, 2, 3], version=4), {1: True, 2: False, 3: True})
+        self.cache.check(7, [2], version=4)
+        self.assertEqual(self.loads, [7])
+        self.cache.check(7, [2], version=5)  # избранное изменили в другом процессе
+        self.assertEqual(self.loads, [7, 7])
+
+    def test_toggle_in_place(self):
+        self.cache.check(7, [1], version=4)
+        self.cache.toggle(7, 2, added=True, version=5)
+        self.cache.toggle(7, 1, added=False, version=6)
+        self.assertEqual(self.cache.check(7, [1, 2], version=6), {1: False, 2: True})
+        self.assertEqual(self.loads, [7])
+        self.cache.toggle(8, 1, added=True, version=1)  # не загружено - нечего менять
+        self.assertEqual(self.cache.stats()['size'], 1)
+
+    def test_toggle_after_foreign_write_drops_entry(self):
+        self.cache.check(7, [1], version=4)
+        self.cache.toggle(7, 2, added=True, version=6)  # версию 5 записал кто-то другой
+        self.assertEqual(self.cache.stats()['size'], 0)
+        self.assertEqual(self.cache.check(7, [2], version=6), {2: False})
+        self.assertEqual(self.loads, [7, 7])
+
+
+class FlaskUserCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+        db_name = create_api_database(os.path.join(self.tmpdir, 'recipes.db'), recipes=10)
+        old_config = dict(app.config)
+        app.config.update(DATABASE=db_name, DB_POOL_ENABLED=False, TESTING=True)
+        self.addCleanup(app.config.update, old_config)
+        self.client = app.test_client()
+        self.client.get('/api/categories')  # миграции схемы
+        sql_metrics.REGISTRY.reset()
+
+    def test_me_skips_users_query(self):
+        response = self.client.post('/api/auth/login',
+                                    json={'email': 'user3@mail.ru', 'password': 'pass3'})
+        self.assertTrue(response.get_json()['success'])
+        for _ in range(3):
+            user = self.client.get('/api/auth/me').get_json()['user']
+        self.assertEqual(user['name'], 'Повар 3')
+
+        text = self.client.get('/metrics').get_data(as_text=True)
+        self.assertEqual(series(text, 'db_queries_per_request_sum', route='/api/auth/me'), 0)
+        self.assertEqual(series(text, 'user_cache_requests_total', result='hit'), 3)
+        self.assertIn('user_cache_hit_ratio 1.0', text)
+
+    def test_register_fills_cache(self):
+        response = self.client.post('/api/auth/register', json={
+            'email': 'new@mail.ru', 'name': 'Новичок', 'password': 'secret'})
+        user_id = response.get_json()['user']['id']
+        self.assertEqual(get_user_cache().get(user_id)['name'], 'Новичок')
+        self.assertEqual(get_user_cache().stats()['misses'], 0)
+
+    def test_cache_follows_database(self):
+        first = get_user_cache()
+        self.assertIs(get_user_cache(), first)
+        app.config['DATABASE'] = os.path.join(self.tmpdir, 'other.db')
+        self.assertIsNot(get_user_cache(), first)
+
+
+class FlaskFavoritesTests(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir, ignore_errors=True)
+        self.db_name = create_api_database(os.path.join(self.tmpdir, 'recipes.db'), recipes=10)
+        old_config = dict(app.config)
+        app.config.update(DATABASE=self.db_name, DB_POOL_ENABLED=False, TESTING=True)
+        self.addCleanup(app.config.update, old_config)
+        self.client = app.test_client()
+        with self.client.session_transaction() as session:
+            session['user_id'] = 1
+        self.client.get('/api/categories')  # миграции схемы
+        conn = sqlite3.connect(self.db_name)
+        self.favorites = {row[0] for row in conn.execute(
+            'SELECT recipe_id FROM favorites WHERE user_id = 1')}
+        conn.close()
+
+    def check(self, ids='1,2,3,4,5,6,7,8,9,10'):
+        sql_metrics.REGISTRY.reset()
+        response = self.client.get(f'/api/favorites/check?ids={ids}').get_json()
+        text = self.client.get('/metrics').get_data(as_text=True)
+        return response, series(text, 'db_queries_per_request_sum', route='/api/favorites/check')
+
+    def expected(self):
+        return {str(recipe_id): recipe_id in self.favorites for recipe_id in range(1, 11)}
+
+    def test_batch_check(self):
+        response, queries = self.check()
+        self.assertEqual(response['is_favorite'], self.expected())
+        self.assertEqual(queries, 2)  # версия избранного и само избранное
+        response, queries = self.check()
+        self.assertEqual(queries, 1)  # только версия
+        self.assertFalse(self.check('1,x')[0]['success'])
+
+    def test_toggle_updates_cache(self):
+        self.check()
+        for recipe_id in (4, 4, 5):
+            sql_metrics.REGISTRY.reset()
+            added = self.client.post(f'/api/favorites/{recipe_id}').get_json()['added']
+            self.assertEqual(added, recipe_id not in self.favorites)
+            self.favorites ^= {recipe_id}
+            text = self.client.get('/metrics').get_data(as_text=True)
+            # BEGIN IMMEDIATE, DELETE (при добавлении - еще INSERT) и новая версия избранного
+            self.assertEqual(series(text, 'db_queries_per_request_sum',
+                                    route='/api/favorites/<int:recipe_id>'), 3 if not added else 4)
+        response, queries = self.check()
+        self.assertEqual(response['is_favorite'], self.expected())
+        self.assertEqual(queries, 1)
+        self.assertEqual(get_favorites_cache().stats()['misses'], 1)
+
+    def write_from_other_process(self, recipe_id):
+        conn = sqlite3.connect(self.db_name)
+        with conn:
+            if recipe_id in self.favorites:
+                conn.execute('DELETE FROM favorites WHERE user_id = 1 AND recipe_id = ?',
+                             (recipe_id,))
+            else:
+                conn.execute('INSERT INTO favorites (user_id, recipe_id) VALUES (1, ?)',
+                             (recipe_id,))
+        conn.close()
+        self.favorites ^= {recipe_id}
+
+    def test_write_from_other_process(self):
+        self.check()
+        self.write_from_other_process(7)
+        response, queries = self.check()
+        self.assertEqual(response['is_favorite'], self.expected())
+        self.assertEqual(queries, 2)
+
+
+    def test_toggle_after_write_from_other_process(self):
+        self.check()
+        self.write_from_other_process(7)  # кэш об этой записи не знает
+        self.client.post('/api/favorites/8')
+        self.favorites ^= {8}
+        response, queries = self.check()
+        self.assertEqual(response['is_favorite'], self.expected())
+        self.assertEqual(queries, 2)  # запись кэша сброшена, избранное перечитано
+
+
+if __name__ == '__main__':
+    unittest.main()
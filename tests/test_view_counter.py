@@ -0,0 +1,125 @@
+"""Отложенная запись просмотров (view_counter.py) и ее работа в DatabaseManager
+
+Запуск из корня проекта:
+    python -m unittest tests.test_view_counter
+"""
+import contextlib
+import io
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from benchmarks.fixtures import create_api_database
+from create_database import create_database
+from database_manager import DatabaseManager
+from view_counter import ViewCounter
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('условие не выполнилось за отведенное время')
+        time.sleep(0.01)
+
+
+class ViewCounterTests(unittest.TestCase):
+
+    def setUp(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir, ignore_errors=True)
+        self.db_name = create_api_database(os.path.join(tmpdir, 'recipes.db'), recipes=5)
+        self.initial = self.views()
+
+    def views(self):
+        conn = sqlite3.connect(self.db_name)
+        try:
+            return dict(conn.execute('SELECT id, views FROM recipes'))
+        finally:
+            conn.close()
+
+    def added(self):
+        return {recipe_id: views - self.initial[recipe_id]
+                for recipe_id, views in self.views().items() if views != self.initial[recipe_id]}
+
+    def counter(self, **kwargs):
+        counter = ViewCounter(self.db_name, **kwargs)
+        self.addCleanup(counter.stop)
+        return counter
+
+    def test_increments_are_batched(self):
+        counter = self.counter()
+        for recipe_id in (1, 2, 1, 3, 1):
+            counter.increment(recipe_id)
+        self.assertEqual(counter.pending(1), 3)
+        self.assertEqual(self.added(), {})
+
+        self.assertEqual(counter.flush(), 5)
+        self.assertEqual(self.added(), {1: 3, 2: 1, 3: 1})
+        self.assertEqual(counter.pending(1), 0)
+        self.assertEqual(counter.flush(), 0)  # пустой буфер не пишется
+        self.assertEqual((counter.flush_count, counter.flushed_views), (1, 5))
+
+    def test_threshold_wakes_writer(self):
+        counter = self.counter(flush_interval=60.0, flush_threshold=3).start()
+        counter.increment(1, 2)
+        counter.increment(2)
+        wait_for(lambda: counter.flush_count == 1)
+        self.assertEqual(self.added(), {1: 2, 2: 1})
+
+    def test_stop_flushes_rest(self):
+        counter = self.counter(flush_interval=60.0).start()
+        counter.increment(4, 7)
+        counter.stop()
+        self.assertEqual(self.added(), {4: 7})
+        self.assertEqual(counter.backlog()['pending_views'], 0)
+
+    def test_failed_flush_keeps_views(self):
+        counter = self.counter()
+        counter.increment(1, 2)
+        counter.db_name = os.path.join(os.path.dirname(self.db_name), 'missing', 'x.db')
+        self.assertEqual(counter.flush(), 0)
+        self.assertIsNotNone(counter.last_error)
+        self.assertEqual(counter.pending(1), 2)
+
+    def test_restart_after_stop(self):
+        counter = self.counter(flush_interval=0.05)
+        with mock.patch('atexit.register') as register, \
+                mock.patch('atexit.unregister') as unregister:
+            counter.start()
+            counter.stop()
+            counter.start()
+        self.assertEqual(register.call_count, 2)
+        unregister.assert_called_once_with(counter.stop)
+
+        counter.increment(5)
+        wait_for(lambda: self.added() == {5: 1})  # пишет фоновый поток, без stop()
+
+
+class DatabaseManagerViewsTests(unittest.TestCase):
+
+    def test_views_after_reconnect(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir, ignore_errors=True)
+        db_name = os.path.join(tmpdir, 'cookbook.db')
+        with contextlib.redirect_stdout(io.StringIO()):
+            create_database(db_name)
+        db = DatabaseManager(db_name, view_flush_interval=0.05)
+        self.addCleanup(db.close)
+
+        self.assertTrue(db.connect())
+        before = db.get_recipe(1)['views']
+        db.close()
+        self.assertTrue(db.connect())
+        self.assertEqual(db.get_recipe(1)['views'], before + 1)  # 1-й записан при close()
+        # 2-й просмотр записывает фоновый поток, запущенный заново
+        wait_for(lambda: db.conn.execute(
+            'SELECT views FROM recipes WHERE id = 1').fetchone()['views'] == before + 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """LRU-кэш записей по ключу со временем жизни ttl секунд
+
+    loader(key) читает значение из базы и вызывается только при промахе;
+    None не кэшируется. Больше maxsize записей не хранится - вытесняются
+    давно не использованные. get(key, version) считает запись устаревшей,
+    если она загружена при другой версии данных (см. data_versions).
+    После invalidate() загрузка, начатая раньше, в кэш уже не попадает.
+    """
+    metric = 'cache'
+    description = 'кэш'
+
+    def __init__(self, loader, maxsize=10000, ttl=300.0, clock=time.monotonic):
+        self.loader = loader
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()  # ключ -> (истекает в, версия, значение)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, version=None):
+        """Значение по ключу (копия записи) или None"""
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now and (version is None or entry[1] == version):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self.copy(entry[2])
+            self.misses += 1
+            generation = self._generation
+
+        value = self.loader(key)
+        if value is None:
+            return None
+        value = self.copy(value)
+        with self._lock:
+            if generation == self._generation:
+                self._store(key, value, version, now)
+        return self.copy(value)
+
+    def copy(self, value):
+        return value
+
+    def _store(self, key, value, version, now):
+        self._entries[key] = (now + self.ttl, version, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, key=None):
+        """Удаление записи (или всех) после изменения в базе"""
+        with self._lock:
+            self._generation += 1
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def metrics(self):
+        """Строки для /metrics в формате Prometheus"""
+        stats = self.stats()
+        name, description = self.metric, self.description
+        return [
+            f'# HELP {name}_requests_total Обращения: {description}',
+            f'# TYPE {name}_requests_total counter',
+            f'{name}_requests_total{{result="hit"}} {stats["hits"]}',
+            f'{name}_requests_total{{result="miss"}} {stats["misses"]}',
+            f'# HELP {name}_evictions_total Вытеснения: {description}',
+            f'# TYPE {name}_evictions_total counter',
+            f'{name}_evictions_total {stats["evictions"]}',
+            f'# HELP {name}_entries Записей: {description}',
+            f'# TYPE {name}_entries gauge',
+            f'{name}_entries {stats["size"]}',
+            f'# HELP {name}_hit_ratio Доля попаданий: {description}',
+            f'# TYPE {name}_hit_ratio gauge',
+            f'{name}_hit_ratio {stats["hit_rate"]}',
+        ]
+
+
+class UserCache(LRUCache):
+    """Записи пользователей по id: loader(user_id) -> dict или None"""
+    metric = 'user_cache'
+    description = 'кэш пользователей'
+
+    def copy(self, user):
+        return dict(user)
+
+    def put(self, user):
+        """Свежая запись пользователя, например после регистрации или входа"""
+        with self._lock:
+            self._store(user['id'], dict(user), None, self.clock())
+
+
+class FavoritesCache(LRUCache):
+    """Множества id избранных рецептов по пользователям
+
+    loader(user_id) читает все избранное пользователя одним запросом.
+    Версия - версия 'favorites:<user_id>' из data_versions: она уже
+    прочитана conditional(), поэтому проверка свежести бесплатна.
+    Множества неизменяемые, toggle() заменяет их целиком.
+    """
+    metric = 'favorites_cache'
+    description = 'кэш избранного'
+
+    def copy(self, recipe_ids):
+        return frozenset(recipe_ids)
+
+    def check(self, user_id, recipe_ids, version=None):
+        """{id рецепта: в избранном ли} для списка id"""
+        favorites = self.get(user_id, version)
+        return {recipe_id: recipe_id in favorites for recipe_id in recipe_ids}
+
+    def toggle(self, user_id, recipe_id, added, version=None):
+        """Изменение избранного на месте после записи в базу
+
+        version - версия избранного, прочитанная из базы в транзакции записи.
+        Запись в favorites увеличивает версию на 1 (триггер), поэтому запись
+        кэша обновляется, только если она была загружена при version - 1:
+        иначе между ними писал кто-то еще, и запись удаляется.
+        """
+        with self._lock:
+            self._generation += 1
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return
+            expires, cached_version, favorites = entry
+            if version is None or cached_version != version - 1:
+                del self._entries[user_id]
+                return
+            favorites = favorites | {recipe_id} if added else favorites - {recipe_id}
+            self._entries[user_id] = (expires, version, favorites)
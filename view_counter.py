@@ -0,0 +1,134 @@
+import atexit
+import sqlite3
+import threading
+import time
+
+
+class ViewCounter:
+    """Счетчик просмотров рецептов с отложенной пакетной записью
+
+    increment() только увеличивает число в памяти, поэтому чтение рецепта
+    не ждет блокировки записи SQLite. Накопленные приращения записываются
+    одной транзакцией фоновым потоком: раз в flush_interval секунд или сразу,
+    как только в буфере наберется flush_threshold просмотров.
+    """
+
+    def __init__(self, db_name, flush_interval=5.0, flush_threshold=500, timeout=5.0):
+        self.db_name = db_name
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.timeout = timeout
+
+        self._pending = {}           # id рецепта -> число непрочитанных просмотров
+        self._pending_total = 0
+        self._oldest_pending = None  # время первого незаписанного просмотра
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._conn = None
+
+        self.flushed_views = 0
+        self.flush_count = 0
+        self.last_flush_at = None
+        self.last_error = None
+
+    def start(self):
+        """Запуск фонового потока записи (и повторный - после stop())"""
+        if self._thread is None:
+            # У каждого потока свой флаг остановки: поток, не успевший
+            # завершиться за timeout в stop(), не оживет при новом start()
+            self._stopped = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(self._stopped,),
+                                            name='view-counter', daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        """Остановка потока и запись всего, что осталось в буфере"""
+        self._stopped.set()
+        self._wakeup.set()
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            atexit.unregister(self.stop)
+            if thread is not threading.current_thread():
+                thread.join(self.timeout)
+        self.flush()
+        with self._flush_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _run(self, stopped):
+        while not stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def increment(self, recipe_id, amount=1):
+        """Учет просмотра; запись в базу произойдет позже"""
+        with self._lock:
+            self._pending[recipe_id] = self._pending.get(recipe_id, 0) + amount
+            self._pending_total += amount
+            if self._oldest_pending is None:
+                self._oldest_pending = time.monotonic()
+            full = self._pending_total >= self.flush_threshold
+        if full:
+            self._wakeup.set()
+
+    def pending(self, recipe_id):
+        """Просмотры рецепта, которые еще не записаны в базу"""
+        with self._lock:
+            return self._pending.get(recipe_id, 0)
+
+    def flush(self):
+        """Запись накопленных просмотров одной транзакцией"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+                total, self._pending_total = self._pending_total, 0
+                oldest, self._oldest_pending = self._oldest_pending, None
+            if not batch:
+                return 0
+
+            try:
+                if self._conn is None:
+                    self._conn = sqlite3.connect(self.db_name, timeout=self.timeout,
+                                                 check_same_thread=False)
+                with self._conn:
+                    self._conn.executemany(
+                        'UPDATE recipes SET views = views + ? WHERE id = ?',
+                        [(count, recipe_id) for recipe_id, count in batch.items()]
+                    )
+            except sqlite3.Error as e:
+                # Возвращаем приращения в буфер, чтобы не потерять их
+                self.last_error = str(e)
+                with self._lock:
+                    for recipe_id, count in batch.items():
+                        self._pending[recipe_id] = self._pending.get(recipe_id, 0) + count
+                    self._pending_total += total
+                    if self._oldest_pending is None or oldest < self._oldest_pending:
+                        self._oldest_pending = oldest
+                return 0
+
+            self.flushed_views += total
+            self.flush_count += 1
+            self.last_flush_at = time.time()
+            self.last_error = None
+            return total
+
+    def backlog(self):
+        """Насколько запись отстает от просмотров"""
+        with self._lock:
+            oldest = self._oldest_pending
+            return {
+                'pending_views': self._pending_total,
+                'pending_recipes': len(self._pending),
+                'lag_seconds': round(time.monotonic() - oldest, 3) if oldest else 0.0,
+                'flushed_views': self.flushed_views,
+                'flush_count': self.flush_count,
+                'last_flush_at': self.last_flush_at,
+                'last_error': self.last_error,
+            }